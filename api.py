@@ -0,0 +1,275 @@
+# api.py - HEADLESS JSON API FOR THE CONSULT PIPELINE, SERVED NEXT TO THE GRADIO UI
+
+import os
+import re
+import base64
+import socket
+import asyncio
+import tempfile
+import ipaddress
+from urllib.parse import urlparse
+
+import httpx
+import gradio as gr
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from serving import CONSULT_CONCURRENCY, consult_slot, apply_worker_limits, get_queue_metrics
+from pipeline import get_stage_timings, get_pipeline_pool_stats
+from router import get_routing_stats
+from dashboard import get_dashboard_cache_stats, DASHBOARD_FORMAT_HTML, DASHBOARD_FORMAT_MODEL
+from voice_of_the_doctor import TTS_CACHE_DIR
+
+API_PREFIX = os.environ.get("API_PREFIX", "/api/v1")
+API_MAX_UPLOAD_BYTES = int(os.environ.get("API_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+API_FETCH_TIMEOUT = float(os.environ.get("API_FETCH_TIMEOUT", "20"))
+API_FETCH_MAX_REDIRECTS = int(os.environ.get("API_FETCH_MAX_REDIRECTS", "5"))
+# Comma-separated hosts audio_url / image_url may point at; empty = any host with a public address
+API_FETCH_ALLOWED_HOSTS = frozenset(host.strip().lower()
+                                    for host in os.environ.get("API_FETCH_ALLOWED_HOSTS", "").split(",") if host.strip())
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
+# Spoken answers served by GET {API_PREFIX}/voice/<name>: content-addressed files in the TTS cache
+_VOICE_FILE = re.compile(r"[0-9a-f]{64}\.[a-z0-9]+")
+_VOICE_MEDIA_TYPES = {".mp3": "audio/mpeg", ".wav": "audio/wav"}
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in _TRUE_VALUES
+
+
+def _as_symptom_list(values):
+    """Accept a list, or one comma-separated string, per form/JSON convention"""
+    if values is None:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    symptoms = []
+    for value in values:
+        symptoms.extend(part.strip() for part in str(value).split(",") if part.strip())
+    return symptoms
+
+
+def _temp_path(suffix):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+
+async def _save_upload(upload, temp_paths):
+    data = await upload.read(API_MAX_UPLOAD_BYTES + 1)
+    if len(data) > API_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"{upload.filename} exceeds {API_MAX_UPLOAD_BYTES} bytes")
+    path = _temp_path(os.path.splitext(upload.filename or "")[1])
+    temp_paths.append(path)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+async def _check_fetch_url(url):
+    """Reject URLs the server must not fetch for a client: other schemes, hosts outside
+    API_FETCH_ALLOWED_HOSTS and (without an allowlist) names resolving to private, loopback,
+    link-local or other non-public addresses"""
+    parsed = urlparse(str(url))
+    if parsed.scheme not in ("http", "https"):
+        raise HTTPException(status_code=400, detail=f"Unsupported URL scheme: {url}")
+    host = (parsed.hostname or "").lower()
+    if not host:
+        raise HTTPException(status_code=400, detail=f"No host in URL: {url}")
+    if API_FETCH_ALLOWED_HOSTS:
+        if host not in API_FETCH_ALLOWED_HOSTS:
+            raise HTTPException(status_code=400, detail=f"Host not allowed: {host}")
+        return
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, parsed.port or 0, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise HTTPException(status_code=400, detail=f"Could not resolve {host}: {e}")
+    for *_, sockaddr in addresses:
+        if not _is_public_address(sockaddr[0]):
+            raise HTTPException(status_code=400, detail=f"Host not allowed: {host} resolves to a non-public address")
+
+
+def _is_public_address(address):
+    address = ipaddress.ip_address(address.split("%")[0])
+    return address.is_global and not address.is_multicast
+
+
+def _check_peer(response):
+    """Reject a response whose connection ended up at a non-public address.
+
+    httpx resolves the name again when it connects, so a name that passed _check_fetch_url can
+    re-resolve (DNS rebinding) to an internal host; this checks the address actually connected
+    to, before any of the body is read. Not needed with an allowlist of trusted hosts.
+    """
+    if API_FETCH_ALLOWED_HOSTS:
+        return
+    stream = response.extensions.get("network_stream")
+    server_addr = stream.get_extra_info("server_addr") if stream is not None else None
+    if not server_addr or not _is_public_address(server_addr[0]):
+        raise HTTPException(status_code=400,
+                            detail=f"Host not allowed: {response.url.host} connected to a non-public address")
+
+
+async def _fetch_url(client, url, temp_paths):
+    """Download url into a temp file; redirects are followed here so every hop is checked"""
+    await _check_fetch_url(url)
+    path = _temp_path(os.path.splitext(urlparse(url).path)[1])
+    temp_paths.append(path)
+    size = 0
+    try:
+        request = client.build_request("GET", url)
+        for _ in range(API_FETCH_MAX_REDIRECTS + 1):
+            response = await client.send(request, stream=True)
+            try:
+                _check_peer(response)
+            except HTTPException:
+                await response.aclose()
+                raise
+            if not response.is_redirect:
+                break
+            await response.aclose()
+            request = response.next_request
+            await _check_fetch_url(request.url)
+        else:
+            raise HTTPException(status_code=400, detail=f"Too many redirects: {url}")
+        try:
+            response.raise_for_status()
+            with open(path, "wb") as f:
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > API_MAX_UPLOAD_BYTES:
+                        raise HTTPException(status_code=413, detail=f"{url} exceeds {API_MAX_UPLOAD_BYTES} bytes")
+                    f.write(chunk)
+        finally:
+            await response.aclose()
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=400, detail=f"Could not fetch {url}: {e}")
+    return path
+
+
+async def _media_path(client, upload, url, temp_paths):
+    if upload is not None and getattr(upload, "filename", None):
+        return await _save_upload(upload, temp_paths)
+    if url:
+        return await _fetch_url(client, url, temp_paths)
+    return None
+
+
+def _run_consult_in_slot(run_consult, *args, **kwargs):
+    with consult_slot():
+        return run_consult(*args, **kwargs)
+
+
+def _voice_for_client(request, result, temp_paths):
+    """Replace run_consult's server-side "audio_path" with something an HTTP client can use:
+    "voice_url" for audio in the TTS cache, else (TTS_CACHE=0) the audio inline as "voice_base64"."""
+    if "audio_path" not in result:
+        return result
+    path = result.pop("audio_path")
+    if path is None:
+        result["voice_url"] = None
+        return result
+    name = os.path.basename(path)
+    extension = os.path.splitext(name)[1]
+    result["voice_media_type"] = _VOICE_MEDIA_TYPES.get(extension, "application/octet-stream")
+    if os.path.dirname(os.path.abspath(path)) == os.path.abspath(TTS_CACHE_DIR) and _VOICE_FILE.fullmatch(name):
+        result["voice_url"] = str(request.url_for("voice", name=name))
+    else:
+        temp_paths.append(path)
+        with open(path, "rb") as f:
+            result["voice_base64"] = base64.b64encode(f.read()).decode("ascii")
+    return result
+
+
+def create_app(demo, run_consult, ui_path="/", allowed_paths=None):
+    """FastAPI app with POST {API_PREFIX}/consult and the Gradio UI mounted at ui_path.
+
+    POST /consult takes either JSON {"symptoms": [...], "audio_url", "image_url",
+    "include_dashboard", "dashboard_format", "include_voice"} or multipart form data with the
+    same fields plus "audio"/"image" file parts, and returns run_consult()'s structured result;
+    with include_voice the spoken answer comes as "voice_url" (GET {API_PREFIX}/voice/<name>).
+    dashboard_format is "html" (default) or "model" for the compact JSON dashboard model, with its texts included.
+    """
+    app = FastAPI(title="AI Doctor API", docs_url=f"{API_PREFIX}/docs", openapi_url=f"{API_PREFIX}/openapi.json")
+    # At most CONSULT_CONCURRENCY API consults take a worker thread; the consult itself then waits
+    # for one of the slots it shares with the UI, so a burst can't overrun the Groq pool
+    api_consults = asyncio.Semaphore(CONSULT_CONCURRENCY)
+
+    @app.post(f"{API_PREFIX}/consult")
+    async def consult(request: Request):
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("multipart/") or content_type.startswith("application/x-www-form-urlencoded"):
+            form = await request.form()
+            fields = {
+                "symptoms": form.getlist("symptoms"),
+                "audio": form.get("audio"),
+                "image": form.get("image"),
+                "audio_url": form.get("audio_url"),
+                "image_url": form.get("image_url"),
+                "include_dashboard": form.get("include_dashboard"),
+                "dashboard_format": form.get("dashboard_format"),
+                "include_voice": form.get("include_voice"),
+            }
+        else:
+            try:
+                fields = await request.json()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Expected a JSON body or multipart form data")
+            if not isinstance(fields, dict):
+                raise HTTPException(status_code=400, detail="Expected a JSON object")
+
+        dashboard_format = fields.get("dashboard_format") or DASHBOARD_FORMAT_HTML
+        if dashboard_format not in (DASHBOARD_FORMAT_HTML, DASHBOARD_FORMAT_MODEL):
+            raise HTTPException(status_code=422, detail=f"Unknown dashboard_format: {dashboard_format}")
+
+        temp_paths = []
+        try:
+            # Direct connections only (no proxy from the environment), so the peer check sees the real server
+            async with httpx.AsyncClient(timeout=API_FETCH_TIMEOUT, trust_env=False) as client:
+                audio_path = await _media_path(client, fields.get("audio"), fields.get("audio_url"), temp_paths)
+                image_path = await _media_path(client, fields.get("image"), fields.get("image_url"), temp_paths)
+
+            symptoms = _as_symptom_list(fields.get("symptoms"))
+            if not (symptoms or audio_path or image_path):
+                raise HTTPException(status_code=422, detail="Provide symptoms, audio or an image")
+
+            async with api_consults:
+                result = await run_in_threadpool(
+                    _run_consult_in_slot, run_consult, symptoms,
+                    audio_filepath=audio_path,
+                    image_filepath=image_path,
+                    include_dashboard=_as_bool(fields.get("include_dashboard")),
+                    include_voice=_as_bool(fields.get("include_voice")),
+                    dashboard_format=dashboard_format,
+                )
+            return _voice_for_client(request, result, temp_paths)
+        finally:
+            for path in temp_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @app.get(f"{API_PREFIX}/voice/{{name}}", name="voice")
+    async def voice(name: str):
+        path = os.path.join(TTS_CACHE_DIR, name)
+        if not _VOICE_FILE.fullmatch(name) or not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail="No such voice file (it may have been evicted from the cache)")
+        return FileResponse(path, media_type=_VOICE_MEDIA_TYPES.get(os.path.splitext(name)[1]))
+
+    @app.get(f"{API_PREFIX}/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get(f"{API_PREFIX}/metrics")
+    async def metrics():
+        return {"queue": get_queue_metrics(demo), "stages": get_stage_timings(), "routes": get_routing_stats(),
+                "pipeline_pool": get_pipeline_pool_stats(), "dashboard_cache": get_dashboard_cache_stats()}
+
+    apply_worker_limits(demo)
+    return gr.mount_gradio_app(app, demo, path=ui_path, allowed_paths=allowed_paths)
@@ -0,0 +1,205 @@
+# batch_analyze.py - OFFLINE BATCH CONSULTS FROM A JSONL/CSV CASE FILE, RESUMABLE JSONL OUTPUT
+#
+#   python batch_analyze.py cases.jsonl -o results.jsonl --workers 4 --retries 2
+#
+# Each case has an optional "id" (or "case_id"), "symptoms" (a list, or one string separated by
+# ";" or ","), and optional "audio" / "image" file paths (relative paths are resolved against the
+# case file's folder). Results are appended to the output as they finish, one JSON object per line;
+# rerunning the same command skips cases already in the output, so an interrupted run resumes.
+
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+from serving import CONSULT_CONCURRENCY
+from pipeline import size_pipeline_pool
+
+BATCH_RETRIES = int(os.environ.get("BATCH_RETRIES", "2"))                # extra attempts per failed case
+BATCH_RETRY_DELAY = float(os.environ.get("BATCH_RETRY_DELAY", "2.0"))    # seconds, doubled on each retry
+
+# Output statuses: "ok", "degraded" (answered with a fallback after every retry) or "failed"
+STATUS_OK = "ok"
+STATUS_DEGRADED = "degraded"
+STATUS_FAILED = "failed"
+
+
+def _split_symptoms(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.replace(";", ",").split(",")
+    return [str(symptom).strip() for symptom in value if str(symptom).strip()]
+
+
+def _resolve_path(value, base_dir):
+    if not value:
+        return None
+    path = os.path.expanduser(str(value).strip())
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+def _normalize_case(raw, row_number, base_dir):
+    case_id = raw.get("id") or raw.get("case_id") or f"row-{row_number}"
+    return {
+        "case_id": str(case_id),
+        "symptoms": _split_symptoms(raw.get("symptoms")),
+        "audio": _resolve_path(raw.get("audio") or raw.get("audio_path"), base_dir),
+        "image": _resolve_path(raw.get("image") or raw.get("image_path"), base_dir),
+    }
+
+
+def read_cases(path):
+    """Yield normalized cases from a .jsonl or .csv file, in file order"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            for row_number, row in enumerate(csv.DictReader(f), 1):
+                yield _normalize_case(row, row_number, base_dir)
+        else:
+            for row_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield _normalize_case(json.loads(line), row_number, base_dir)
+
+
+def load_finished_ids(output_path, retry_failed=False):
+    """Case ids already written to output_path (the last record per id wins)"""
+    statuses = {}
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # half-written line from an interrupted run
+            statuses[record.get("case_id")] = record.get("status")
+    if retry_failed:
+        return {case_id for case_id, status in statuses.items() if status == STATUS_OK}
+    return set(statuses)
+
+
+def analyze_case(case, run_consult, retries=BATCH_RETRIES, retry_delay=BATCH_RETRY_DELAY, include_dashboard=False):
+    """Run one case through the consult pipeline, retrying failed or degraded attempts"""
+    missing = [path for path in (case["audio"], case["image"]) if path and not os.path.exists(path)]
+    if missing:
+        return {"case_id": case["case_id"], "status": STATUS_FAILED, "attempts": 0,
+                "error": f"File not found: {', '.join(missing)}"}
+    if not (case["symptoms"] or case["audio"] or case["image"]):
+        return {"case_id": case["case_id"], "status": STATUS_FAILED, "attempts": 0,
+                "error": "Case has no symptoms, audio or image"}
+
+    start = time.perf_counter()
+    result, error = None, None
+    for attempt in range(1, retries + 2):
+        try:
+            result, error = run_consult(case["symptoms"], audio_filepath=case["audio"],
+                                        image_filepath=case["image"], include_dashboard=include_dashboard), None
+            if not result["errors"]:
+                break
+        except Exception as e:
+            # A degraded result from an earlier attempt still beats none
+            error = f"{type(e).__name__}: {e}"
+        if attempt <= retries:
+            time.sleep(retry_delay * 2 ** (attempt - 1))
+
+    if result is None:
+        status = STATUS_FAILED
+    else:
+        status = STATUS_DEGRADED if result["errors"] else STATUS_OK
+    record = {"case_id": case["case_id"], "status": status, "attempts": attempt,
+              "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
+    if error:
+        record["error"] = error
+    if result is not None:
+        record["result"] = result
+    return record
+
+
+def run_batch(cases, output_path, run_consult, workers=CONSULT_CONCURRENCY, retries=BATCH_RETRIES,
+              retry_delay=BATCH_RETRY_DELAY, include_dashboard=False, resume=True, retry_failed=False):
+    """Analyze cases with at most `workers` consults in flight, appending results to output_path.
+
+    Returns the number of cases per status, plus "skipped" for cases finished by an earlier run.
+    """
+    # More workers than the serving limit need a bigger stage pool, or they queue for its threads
+    size_pipeline_pool(workers)
+    finished = load_finished_ids(output_path, retry_failed) if resume else set()
+    counts = {STATUS_OK: 0, STATUS_DEGRADED: 0, STATUS_FAILED: 0, "skipped": 0}
+    mode = "a" if resume else "w"
+    if resume and os.path.exists(output_path) and os.path.getsize(output_path):
+        # Don't glue the first new record onto a half-written last line
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    else:
+        needs_newline = False
+
+    with open(output_path, mode, encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        if needs_newline:
+            out.write("\n")
+
+        def write(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            done = counts[STATUS_OK] + counts[STATUS_DEGRADED] + counts[STATUS_FAILED]
+            print(f"[{done}] {record['case_id']}: {record['status']} "
+                  f"({record['attempts']} attempt(s), {record.get('elapsed_ms', 0):.0f}ms)", flush=True)
+
+        # Bounded window of submitted cases, so a file of thousands isn't all queued up front
+        pending = set()
+        seen = set()
+        try:
+            for case in cases:
+                if case["case_id"] in finished or case["case_id"] in seen:
+                    counts["skipped"] += 1
+                    continue
+                seen.add(case["case_id"])
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(future.result())
+                pending.add(executor.submit(analyze_case, case, run_consult, retries, retry_delay, include_dashboard))
+            for future in as_completed(pending):
+                write(future.result())
+        except KeyboardInterrupt:
+            for future in pending:
+                future.cancel()
+            print("Interrupted - finished cases are saved; rerun the same command to resume", file=sys.stderr)
+            raise
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a file of intake cases through the consult pipeline")
+    parser.add_argument("cases", help="Case file (.jsonl or .csv)")
+    parser.add_argument("-o", "--output", help="Results file (JSONL, default: <cases>.results.jsonl)")
+    parser.add_argument("--workers", type=int, default=CONSULT_CONCURRENCY, help="Consults run in parallel")
+    parser.add_argument("--retries", type=int, default=BATCH_RETRIES, help="Extra attempts for failed or degraded cases")
+    parser.add_argument("--retry-delay", type=float, default=BATCH_RETRY_DELAY, help="Seconds before the first retry (doubles)")
+    parser.add_argument("--include-dashboard", action="store_true", help="Store the dashboard HTML with each result")
+    parser.add_argument("--retry-failed", action="store_true", help="On resume, rerun cases recorded as failed or degraded")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the results file instead of resuming")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.cases)[0] + ".results.jsonl"
+
+    # Imported here so --help doesn't build the whole UI
+    from gradio_app import run_consult
+
+    start = time.perf_counter()
+    counts = run_batch(read_cases(args.cases), output, run_consult, workers=max(1, args.workers),
+                       retries=max(0, args.retries), retry_delay=args.retry_delay,
+                       include_dashboard=args.include_dashboard, resume=not args.no_resume,
+                       retry_failed=args.retry_failed)
+    print(f"Done in {time.perf_counter() - start:.1f}s - {counts[STATUS_OK]} ok, {counts[STATUS_DEGRADED]} degraded, "
+          f"{counts[STATUS_FAILED]} failed, {counts['skipped']} already done -> {output}")
+    return 1 if counts[STATUS_FAILED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,43 +9,197 @@ GROQ_API_KEY=os.environ.get("GROQ_API_KEY")
 
 #Step2: Convert image to required format
 import base64
+import io
+import mimetypes
+from PIL import Image, ImageOps
 
+# Preprocessing knobs - smaller payloads mean faster vision calls and less egress
+IMAGE_MAX_EDGE=int(os.environ.get("IMAGE_MAX_EDGE", "1024"))        # longest side in pixels
+IMAGE_QUALITY=int(os.environ.get("IMAGE_QUALITY", "85"))            # JPEG/WebP quality 1-95
+IMAGE_FORMAT=os.environ.get("IMAGE_FORMAT", "JPEG").upper()         # JPEG or WEBP
+
+IMAGE_MIME_TYPES={"JPEG": "image/jpeg", "WEBP": "image/webp"}
 
 #image_path="acne.jpg"
 
+def prepare_image(image_path, max_edge=None, quality=None, image_format=None):
+    """Decode, EXIF-orient, downscale and re-encode an image. Returns (bytes, mime_type)."""
+    max_edge=max_edge or IMAGE_MAX_EDGE
+    quality=quality or IMAGE_QUALITY
+    image_format=(image_format or IMAGE_FORMAT).upper()
+    if image_format not in IMAGE_MIME_TYPES:
+        raise ValueError(f"Unsupported image format: {image_format}")
+
+    with open(image_path, "rb") as image_file:
+        original_bytes=image_file.read()
+
+    try:
+        with Image.open(io.BytesIO(original_bytes)) as image:
+            source_format=image.format
+            rotated=image.getexif().get(0x0112, 1) != 1  # EXIF Orientation tag
+            oriented=ImageOps.exif_transpose(image)
+            resized=max(oriented.size) > max_edge
+            if resized:
+                oriented.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+            # JPEG has no alpha channel - flatten transparent images onto white
+            if image_format == "JPEG" and oriented.mode != "RGB":
+                rgba=oriented.convert("RGBA")
+                oriented=Image.new("RGB", rgba.size, (255, 255, 255))
+                oriented.paste(rgba, mask=rgba.getchannel("A"))
+            elif image_format == "WEBP" and oriented.mode not in ("RGB", "RGBA"):
+                oriented=oriented.convert("RGBA" if "A" in oriented.getbands() else "RGB")
+
+            buffer=io.BytesIO()
+            oriented.save(buffer, format=image_format, quality=quality, optimize=True)
+            encoded_bytes=buffer.getvalue()
+    except (OSError, Image.DecompressionBombError):
+        # Not decodable by Pillow - send the original file with its real MIME type
+        mime_type=mimetypes.guess_type(image_path)[0] or "image/jpeg"
+        return original_bytes, mime_type
+
+    # Recompressing a small, upright image in the target format can grow it - keep the original then
+    if source_format == image_format and not resized and not rotated and len(original_bytes) <= len(encoded_bytes):
+        return original_bytes, IMAGE_MIME_TYPES[image_format]
+
+    return encoded_bytes, IMAGE_MIME_TYPES[image_format]
+
+def encode_image_with_mime(image_path):
+    """Preprocess an image and return (base64_string, mime_type)"""
+    image_bytes, mime_type=prepare_image(image_path)
+    return base64.b64encode(image_bytes).decode('utf-8'), mime_type
+
 def encode_image(image_path):   
-    image_file=open(image_path, "rb")
-    return base64.b64encode(image_file.read()).decode('utf-8')
+    return encode_image_with_mime(image_path)[0]
 
 #Step3: Setup Multimodal LLM 
-from groq import Groq
+from groq_client import get_groq_client, GROQ_VISION_TIMEOUT, GROQ_TEXT_TIMEOUT
 
 query="Is there something wrong with my face?"
 # UPDATED: Fixed typo and upgraded model
 model = "meta-llama/llama-4-scout-17b-16e-instruct"  # ✅ FIXED TYPO
 #model = "llama-3.3-70b-versatile"  # 🚀 Alternative upgrade option
 
-def analyze_image_with_query(query, model, encoded_image):
-    client=Groq()  
-    messages=[
+def build_vision_messages(query, encoded_image, mime_type="image/jpeg"):
+    content=[
+        {
+            "type": "text", 
+            "text": query
+        }
+    ]
+    # Text-only consults carry no image part (text models reject one)
+    if encoded_image is not None:
+        content.append({
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:{mime_type};base64,{encoded_image}",
+            },
+        })
+    return [
         {
             "role": "user",
-            "content": [
-                {
-                    "type": "text", 
-                    "text": query
-                },
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/jpeg;base64,{encoded_image}",
-                    },
-                },
-            ],
+            "content": content,
         }]
+
+#Step4: Cache completions - identical (image or none, prompt + case text, model) requests skip the network
+from cache import build_tiered_cache, make_cache_key
+
+COMPLETION_CACHE_ENABLED=os.environ.get("COMPLETION_CACHE", "1") != "0"
+COMPLETION_CACHE_TTL=float(os.environ.get("COMPLETION_CACHE_TTL", str(7 * 24 * 3600)))    # seconds
+COMPLETION_CACHE_MEMORY_ENTRIES=int(os.environ.get("COMPLETION_CACHE_MEMORY_ENTRIES", "256"))
+COMPLETION_CACHE_DISK_ENTRIES=int(os.environ.get("COMPLETION_CACHE_DISK_ENTRIES", "10000"))
+COMPLETION_CACHE_DISK_BYTES=int(os.environ.get("COMPLETION_CACHE_DISK_BYTES", str(50 * 1024 * 1024)))
+
+completion_cache=build_tiered_cache(
+    "completions",
+    memory_entries=COMPLETION_CACHE_MEMORY_ENTRIES,
+    disk_entries=COMPLETION_CACHE_DISK_ENTRIES,
+    disk_bytes=COMPLETION_CACHE_DISK_BYTES,
+    ttl=COMPLETION_CACHE_TTL,
+    persist=COMPLETION_CACHE_ENABLED
+)
+
+def vision_cache_key(query, model, encoded_image, mime_type="image/jpeg"):
+    # query already carries the system prompt followed by the case text
+    return make_cache_key("vision", model, query, mime_type, encoded_image)
+
+def get_completion_cache_stats():
+    return completion_cache.stats()
+
+def _complete(messages, model, timeout, cache_key=None):
+    if cache_key is not None:
+        cached=completion_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    client=get_groq_client()  # pooled, keep-alive client shared across requests
     chat_completion=client.chat.completions.create(
         messages=messages,
-        model=model
+        model=model,
+        timeout=timeout
+    )
+
+    response=chat_completion.choices[0].message.content
+    if cache_key is not None and response:
+        completion_cache.set(cache_key, response)
+    return response
+
+def _stream_completion(messages, model, timeout, cache_key=None):
+    if cache_key is not None:
+        cached=completion_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    client=get_groq_client()
+    stream=client.chat.completions.create(
+        messages=messages,
+        model=model,
+        timeout=timeout,
+        stream=True
     )
 
-    return chat_completion.choices[0].message.content
\ No newline at end of file
+    chunks=[]
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta=chunk.choices[0].delta.content
+        if delta:
+            chunks.append(delta)
+            yield delta
+
+    # Only complete responses are cached
+    if cache_key is not None and chunks:
+        completion_cache.set(cache_key, "".join(chunks))
+
+def analyze_image_with_query(query, model, encoded_image, mime_type="image/jpeg", timeout=GROQ_VISION_TIMEOUT, use_cache=True):
+    cache_key=vision_cache_key(query, model, encoded_image, mime_type) if use_cache and COMPLETION_CACHE_ENABLED else None
+    return _complete(build_vision_messages(query, encoded_image, mime_type), model, timeout, cache_key)
+
+#Step5: Streaming variant - yields text chunks as the model produces them
+def stream_image_analysis(query, model, encoded_image, mime_type="image/jpeg", timeout=GROQ_VISION_TIMEOUT, use_cache=True):
+    cache_key=vision_cache_key(query, model, encoded_image, mime_type) if use_cache and COMPLETION_CACHE_ENABLED else None
+    yield from _stream_completion(build_vision_messages(query, encoded_image, mime_type), model, timeout, cache_key)
+
+#Step6: Text-only consults - system + user messages, no image part, smaller text model
+GROQ_TEXT_MODEL=os.environ.get("GROQ_TEXT_MODEL", "llama-3.1-8b-instant")
+
+def build_text_messages(query, system_prompt=None):
+    messages=[]
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": query})
+    return messages
+
+def text_cache_key(query, model, system_prompt=None):
+    return make_cache_key("text", model, system_prompt, query)
+
+def analyze_text_with_query(query, model=None, system_prompt=None, timeout=GROQ_TEXT_TIMEOUT, use_cache=True):
+    model=model or GROQ_TEXT_MODEL
+    cache_key=text_cache_key(query, model, system_prompt) if use_cache and COMPLETION_CACHE_ENABLED else None
+    return _complete(build_text_messages(query, system_prompt), model, timeout, cache_key)
+
+def stream_text_analysis(query, model=None, system_prompt=None, timeout=GROQ_TEXT_TIMEOUT, use_cache=True):
+    model=model or GROQ_TEXT_MODEL
+    cache_key=text_cache_key(query, model, system_prompt) if use_cache and COMPLETION_CACHE_ENABLED else None
+    yield from _stream_completion(build_text_messages(query, system_prompt), model, timeout, cache_key)
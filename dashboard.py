@@ -1,9 +1,58 @@
 # dashboard.py - OPTIMIZED BODY SYSTEM IMPACT SECTION
+#
+# The markup lives in Jinja2 templates compiled once at import. Everything that depends only on
+# one symptom (its severity, body system and HTML rows) or on a small fixed set of states (risk
+# card, insights, recovery plan) is rendered once and memoized, so a dashboard render is one
+# template pass that joins precomputed fragments with the few per-request values. Whole dashboards
+# are cached too, keyed on the set of canonical symptoms, since the same combinations keep recurring.
 
-def create_enhanced_symptom_dashboard(selected_symptoms, matched_condition=None):
-    """Create advanced visual analysis with AI insights and recovery tracking"""
-    if not selected_symptoms:
-        return """
+import os
+import json
+from collections import namedtuple
+from functools import lru_cache
+
+from jinja2 import Environment
+
+from symptom_set import SymptomSet, symptom_display_label
+from keyword_matcher import match_symptom_keywords
+from symptom_database import SYMPTOM_SOLUTIONS, MATCH_THRESHOLD, rank_conditions_from_symptoms
+from cache import LRUCache
+from styles import DASHBOARD_TONES, DASHBOARD_CSS, DASHBOARD_RENDERER_JS
+
+DASHBOARD_CACHE_ENABLED = os.environ.get("DASHBOARD_CACHE", "1") != "0"
+DASHBOARD_CACHE_ENTRIES = int(os.environ.get("DASHBOARD_CACHE_ENTRIES", "512"))
+DASHBOARD_CACHE_BYTES = int(os.environ.get("DASHBOARD_CACHE_BYTES", str(16 * 1024 * 1024)))
+# How the Gradio page gets its dashboard: "client" sends the compact JSON model and renders it in
+# the browser (DASHBOARD_JS), "server" sends the rendered HTML
+DASHBOARD_RENDER = os.environ.get("DASHBOARD_RENDER", "client").lower()
+if DASHBOARD_RENDER not in ("client", "server"):
+    raise ValueError(f"Unknown DASHBOARD_RENDER: {DASHBOARD_RENDER} (expected client or server)")
+# Size budget per rendered dashboard (fixed part + per symptom), checked by tests/test_dashboard_size.py
+DASHBOARD_BUDGET_BYTES = int(os.environ.get("DASHBOARD_BUDGET_BYTES", "8192"))
+DASHBOARD_BUDGET_PER_SYMPTOM = int(os.environ.get("DASHBOARD_BUDGET_PER_SYMPTOM", "768"))
+
+dashboard_cache = LRUCache(max_entries=DASHBOARD_CACHE_ENTRIES, max_bytes=DASHBOARD_CACHE_BYTES)
+
+_TONE_CLASSES = {color: f"t-{name}" for name, color in DASHBOARD_TONES.items()}
+
+# create_enhanced_symptom_dashboard outputs: rendered HTML, the JSON model, or whatever the page
+# uses (the HTML, or with DASHBOARD_RENDER=client a placeholder carrying the model)
+DASHBOARD_FORMAT_HTML = "html"
+DASHBOARD_FORMAT_MODEL = "model"
+DASHBOARD_FORMAT_PAGE = "page"
+
+# No autoescaping: most values are fragments rendered by these templates and are written through
+# as-is. Free text (symptom labels from the API / batch input, condition names, remedies) is
+# escaped explicitly with |e.
+_TEMPLATES = Environment(autoescape=False)
+
+
+def _compile(source):
+    """Compile a template with the source indentation and line breaks dropped - they'd only add bytes"""
+    return _TEMPLATES.from_string("".join(line.strip() for line in source.splitlines()))
+
+
+EMPTY_DASHBOARD_HTML = """
         <div style='
             background: linear-gradient(135deg, #1a1f36 0%, #2d3748 100%);
             color: #e2e8f0;
@@ -19,863 +68,612 @@ def create_enhanced_symptom_dashboard(selected_symptoms, matched_condition=None)
             <p style='color: #a0aec0;'>Select symptoms to begin analysis and see immediate remedies</p>
         </div>
         """
-    
-    # Severity scale function
-    def get_severity_label(percentage):
-        if percentage <= 30:
-            return "🟢 Mild", "#48bb78", "Minor impact"
-        elif percentage <= 60:
-            return "🟡 Moderate", "#ed8936", "Noticeable but manageable"
-        elif percentage <= 80:
-            return "🟠 Significant", "#dd6b20", "Substantial impact"
-        else:
-            return "🔴 Severe", "#e53e3e", "Major health concern"
-    
-    # Symptom severity mapping
-    def get_symptom_severity(symptom):
-        """Determine severity level based on symptom type"""
-        symptom_lower = symptom.lower()
-        
-        # Critical symptoms (red)
-        critical_keywords = ["chest pain", "difficulty breathing", "severe bleeding", 
-                           "sudden weakness", "suicidal thoughts", "seizure", 
-                           "severe head injury", "paralysis", "numbness"]
-        if any(keyword in symptom_lower for keyword in critical_keywords):
-            return {"level": "critical", "percentage": 90, "color": "#e53e3e", "emoji": "🔴"}
-        
-        # Moderate symptoms (orange)
-        moderate_keywords = ["fever", "high pain", "head injury", "vision problems", 
-                           "heart palpitations", "shortness of breath", "fainting",
-                           "vomiting", "severe headache", "burning sensation"]
-        if any(keyword in symptom_lower for keyword in moderate_keywords):
-            return {"level": "moderate", "percentage": 60, "color": "#ed8936", "emoji": "🟡"}
-        
-        # Mild symptoms (green)
-        mild_keywords = ["cough", "runny nose", "sneezing", "mild headache", "fatigue",
-                        "allergies", "itching", "dry skin", "congestion"]
-        if any(keyword in symptom_lower for keyword in mild_keywords):
-            return {"level": "mild", "percentage": 30, "color": "#48bb78", "emoji": "🟢"}
-        
-        # Default to moderate
-        return {"level": "moderate", "percentage": 50, "color": "#ed8936", "emoji": "🟡"}
-    
-    def create_progress_bar(percentage, color, width=200):
-        filled_width = (percentage / 100) * width
-        return f"""
-        <div style="
-            width: {width}px; 
-            height: 12px; 
-            background: #4a5568; 
-            border-radius: 10px; 
-            overflow: hidden;
-            display: inline-block;
-            margin: 0 10px;
-            vertical-align: middle;
-        ">
-            <div style="
-                width: {filled_width}px;
-                height: 100%;
-                background: {color};
-                border-radius: 10px;
-                transition: all 0.3s ease;
-                box-shadow: 0 0 10px {color}80;
-            "></div>
-        </div>
-        """
-    
-    def create_compact_progress_bar(percentage, color, width=120):
-        filled_width = (percentage / 100) * width
-        return f"""
-        <div style="
-            width: {width}px; 
-            height: 8px; 
-            background: #4a5568; 
-            border-radius: 4px; 
-            overflow: hidden;
-            display: inline-block;
-            margin: 0 6px;
-            vertical-align: middle;
-        ">
-            <div style="
-                width: {filled_width}px;
-                height: 100%;
-                background: {color};
-                border-radius: 4px;
-            "></div>
-        </div>
-        """
-    
-    # Symptom Priority Analysis
-    def analyze_symptom_priority(symptom_data):
-        """Analyze and prioritize symptoms by severity and urgency"""
-        priority_list = []
-        
-        for data in symptom_data:
-            symptom = data["clean"]
-            severity = data["severity"]
-            
-            # Assign priority level based on severity
-            if severity["level"] == "critical":
-                priority_level = 1
-                priority_color = "#e53e3e"
-                priority_emoji = "🔴"
-                action_guide = "Address immediately"
-                details = "This symptom requires urgent attention and may indicate serious health risks"
-            elif severity["level"] == "moderate":
-                priority_level = 2
-                priority_color = "#ed8936"
-                priority_emoji = "🟡"
-                action_guide = "Monitor closely"
-                details = "This symptom needs proper management to prevent complications"
-            else:  # mild
-                priority_level = 3
-                priority_color = "#48bb78"
-                priority_emoji = "🟢"
-                action_guide = "Self-care"
-                details = "This symptom can be managed with self-care and should improve naturally"
-            
-            priority_list.append({
-                "symptom": symptom,
-                "priority_level": priority_level,
-                "priority_color": priority_color,
-                "priority_emoji": priority_emoji,
-                "action_guide": action_guide,
-                "details": details,
-                "severity_percentage": severity["percentage"]
-            })
-        
-        # Sort by priority level (1 = highest priority)
-        priority_list.sort(key=lambda x: x["priority_level"])
-        return priority_list
-    
-    # AI Insights Generator
-    def generate_ai_insights(symptom_data, matched_condition):
-        """Generate intelligent insights based on symptom patterns"""
-        insights = []
-        
-        # Get clean symptom names for analysis
-        clean_symptoms = [data["clean"].lower() for data in symptom_data]
-        symptom_text = " ".join(clean_symptoms)
-        
-        # Pattern 1: Respiratory symptoms
-        respiratory_keywords = ["cough", "cold", "runny nose", "congestion", "sneezing", "sore throat"]
-        respiratory_count = sum(1 for keyword in respiratory_keywords if keyword in symptom_text)
-        
-        if respiratory_count >= 2:
-            insights.append({
-                "emoji": "🫁",
-                "title": "Upper Respiratory Pattern Detected",
-                "description": "Your symptoms suggest a common cold or viral URI. Focus on respiratory care.",
-                "tip": "Steam inhalation can reduce congestion by 60%"
-            })
-        
-        # Pattern 2: Fever + Body aches
-        if "fever" in symptom_text and any(symptom in symptom_text for symptom in ["body aches", "fatigue", "chills"]):
-            insights.append({
-                "emoji": "🌡️",
-                "title": "Systemic Infection Pattern",
-                "description": "Fever with body aches suggests your immune system is actively fighting infection.",
-                "tip": "Rest is crucial - your body needs energy to fight the infection"
-            })
-        
-        # Pattern 3: Headache patterns
-        headache_keywords = ["headache", "migraine", "sensitivity to light"]
-        if any(keyword in symptom_text for keyword in headache_keywords):
-            insights.append({
-                "emoji": "🧠",
-                "title": "Neurological Symptom Pattern",
-                "description": "Headache symptoms respond well to hydration and rest in a quiet environment.",
-                "tip": "Avoid screen time and bright lights to reduce headache intensity"
-            })
-        
-        # Pattern 4: Digestive issues
-        digestive_keywords = ["nausea", "vomiting", "diarrhea", "stomach pain"]
-        if any(keyword in symptom_text for keyword in digestive_keywords):
-            insights.append({
-                "emoji": "🍽️",
-                "title": "Gastrointestinal Pattern",
-                "description": "Digestive symptoms require careful hydration and bland diet management.",
-                "tip": "Sip clear fluids slowly rather than drinking large amounts at once"
-            })
-        
-        # Default insight if no specific patterns
-        if not insights:
-            insights.append({
-                "emoji": "🔍",
-                "title": "General Symptom Management",
-                "description": "Your symptoms are being monitored. Consistent self-care will support recovery.",
-                "tip": "Track symptom changes daily to identify improvement patterns"
-            })
-        
-        return insights
-    
-    # Recovery Timeline Generator
-    def generate_recovery_timeline(symptom_data, matched_condition):
-        """Generate visual recovery timeline based on symptoms"""
-        
-        # Calculate overall severity score
-        total_severity = sum(data["severity"]["percentage"] for data in symptom_data)
-        avg_severity = total_severity / len(symptom_data)
-        
-        # Determine recovery days based on severity
-        if avg_severity >= 70:  # High severity
-            recovery_days = 7
-            timeline = [
-                {"day": "Today", "status": "Peak Symptoms", "percentage": 100, "description": "Maximum symptom intensity"},
-                {"day": "Day 2-3", "status": "Gradual Improvement", "percentage": 70, "description": "Symptoms begin to decrease"},
-                {"day": "Day 4-5", "status": "Significant Relief", "percentage": 40, "description": "Major improvement visible"},
-                {"day": "Day 6-7", "status": "Near Recovery", "percentage": 10, "description": "Minimal symptoms remain"}
-            ]
-        elif avg_severity >= 40:  # Medium severity
-            recovery_days = 5
-            timeline = [
-                {"day": "Today", "status": "Active Symptoms", "percentage": 80, "description": "Symptoms are prominent"},
-                {"day": "Day 2-3", "status": "Steady Improvement", "percentage": 50, "description": "Noticeable reduction in symptoms"},
-                {"day": "Day 4-5", "status": "Mostly Recovered", "percentage": 15, "description": "Symptoms largely resolved"}
-            ]
-        else:  # Low severity
-            recovery_days = 3
-            timeline = [
-                {"day": "Today", "status": "Mild Symptoms", "percentage": 60, "description": "Manageable symptom level"},
-                {"day": "Day 2", "status": "Rapid Improvement", "percentage": 25, "description": "Quick recovery progression"},
-                {"day": "Day 3", "status": "Full Recovery", "percentage": 5, "description": "Back to normal health"}
-            ]
-        
-        return {
-            "recovery_days": recovery_days,
-            "timeline": timeline,
-            "avg_severity": avg_severity
-        }
-    
-    # Process symptoms with severity data
-    symptom_data = []
-    for symptom in selected_symptoms:
-        # Clean symptom name (remove emoji)
-        if ' ' in symptom and any(symptom.startswith(emoji) for emoji in ["🔴", "🟡", "🟢"]):
-            clean_name = symptom.split(' ', 1)[1]
-        else:
-            clean_name = symptom
-        
-        severity_info = get_symptom_severity(clean_name)
-        symptom_data.append({
-            "original": symptom,
-            "clean": clean_name,
-            "severity": severity_info
-        })
-    
-    # Generate AI Insights
-    ai_insights = generate_ai_insights(symptom_data, matched_condition)
-    
-    # Generate Recovery Timeline
-    recovery_data = generate_recovery_timeline(symptom_data, matched_condition)
-    
-    # Generate Symptom Priority
-    symptom_priority = analyze_symptom_priority(symptom_data)
-    
-    # 🆕 UPDATED: Horizontal Bar Chart for Symptom Severity
-    symptom_chart_html = ""
-    for data in symptom_data:
-        bar_width = data["severity"]["percentage"]
-        symptom_chart_html += f"""
-        <div style="display: flex; align-items: center; margin: 15px 0; gap: 15px;">
-            <div style="min-width: 140px; display: flex; align-items: center; gap: 10px;">
-                <span style="font-size: 18px;">{data["severity"]["emoji"]}</span>
-                <span style="color: #e2e8f0; font-weight: 600; font-size: 14px;">{data["clean"]}</span>
-            </div>
-            <div style="flex: 1; display: flex; align-items: center; gap: 15px;">
-                <div style="width: 100%; height: 24px; background: #2d3748; border-radius: 12px; overflow: hidden; position: relative; border: 1px solid #4a5568;">
-                    <div style="width: {bar_width}%; height: 100%; background: linear-gradient(90deg, {data["severity"]["color"]}, {data["severity"]["color"]}cc); border-radius: 12px; transition: all 0.3s ease; box-shadow: 0 2px 8px {data["severity"]["color"]}40;"></div>
-                    <div style="position: absolute; right: 10px; top: 50%; transform: translateY(-50%); color: white; font-weight: 700; font-size: 12px; text-shadow: 0 1px 2px rgba(0,0,0,0.5);">{data["severity"]["percentage"]}%</div>
-                </div>
-            </div>
-        </div>
-        """
-    
-    # 🆕 NEW: Color Disclaimer for Symptom Severity
-    severity_disclaimer = """
-    <div style="
-        background: rgba(45, 55, 72, 0.6);
-        padding: 15px;
-        border-radius: 10px;
-        margin-top: 20px;
-        border: 1px solid #4a5568;
-    ">
-        <div style="color: #e2e8f0; font-weight: 600; font-size: 14px; margin-bottom: 12px; text-align: center;">
-            🎨 SEVERITY COLOR GUIDE
-        </div>
-        <div style="display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 10px; font-size: 12px;">
-            <div style="display: flex; flex-direction: column; align-items: center; text-align: center; padding: 10px; background: rgba(72, 187, 120, 0.1); border-radius: 8px; border: 1px solid #48bb7840;">
-                <div style="display: flex; align-items: center; gap: 6px; margin-bottom: 5px;">
-                    <span style="color: #48bb78; font-size: 16px;">🟢</span>
-                    <span style="color: #e2e8f0; font-weight: 600;">Mild</span>
-                </div>
-                <div style="color: #a0aec0; font-size: 11px; line-height: 1.3;">0-30% • Minor impact</div>
-            </div>
-            
-            <div style="display: flex; flex-direction: column; align-items: center; text-align: center; padding: 10px; background: rgba(237, 137, 54, 0.1); border-radius: 8px; border: 1px solid #ed893640;">
-                <div style="display: flex; align-items: center; gap: 6px; margin-bottom: 5px;">
-                    <span style="color: #ed8936; font-size: 16px;">🟡</span>
-                    <span style="color: #e2e8f0; font-weight: 600;">Moderate</span>
-                </div>
-                <div style="color: #a0aec0; font-size: 11px; line-height: 1.3;">31-60% • Noticeable impact</div>
-            </div>
-            
-            <div style="display: flex; flex-direction: column; align-items: center; text-align: center; padding: 10px; background: rgba(229, 62, 62, 0.1); border-radius: 8px; border: 1px solid #e53e3e40;">
-                <div style="display: flex; align-items: center; gap: 6px; margin-bottom: 5px;">
-                    <span style="color: #e53e3e; font-size: 16px;">🔴</span>
-                    <span style="color: #e2e8f0; font-weight: 600;">Critical</span>
-                </div>
-                <div style="color: #a0aec0; font-size: 11px; line-height: 1.3;">61-100% • Major concern</div>
-            </div>
-        </div>
-        <div style="text-align: center; color: #718096; font-size: 11px; margin-top: 10px; font-style: italic;">
-            Based on general medical guidelines and symptom characteristics
-        </div>
+
+DEFAULT_IMMEDIATE_REMEDY = "💧 Stay hydrated • 🛌 Get plenty of rest • 🌡️ Monitor your symptoms • 📞 Contact doctor if symptoms worsen"
+
+# Per-symptom severity levels (first matching keyword table wins, otherwise the default)
+SEVERITY_LEVELS = (
+    ("severity_critical", {"level": "critical", "percentage": 90, "color": "#e53e3e", "emoji": "🔴"}),
+    ("severity_moderate", {"level": "moderate", "percentage": 60, "color": "#ed8936", "emoji": "🟡"}),
+    ("severity_mild", {"level": "mild", "percentage": 30, "color": "#48bb78", "emoji": "🟢"}),
+)
+DEFAULT_SEVERITY = {"level": "moderate", "percentage": 50, "color": "#ed8936", "emoji": "🟡"}
+
+# Priority per severity level; 1 = address first
+PRIORITY_LEVELS = {
+    "critical": {"priority_level": 1, "priority_color": "#e53e3e", "priority_emoji": "🔴",
+                 "action_guide": "Address immediately",
+                 "details": "This symptom requires urgent attention and may indicate serious health risks"},
+    "moderate": {"priority_level": 2, "priority_color": "#ed8936", "priority_emoji": "🟡",
+                 "action_guide": "Monitor closely",
+                 "details": "This symptom needs proper management to prevent complications"},
+    "mild": {"priority_level": 3, "priority_color": "#48bb78", "priority_emoji": "🟢",
+             "action_guide": "Self-care",
+             "details": "This symptom can be managed with self-care and should improve naturally"},
+}
+
+# Body systems in display order; symptoms go to the first matching system, otherwise General
+BODY_SYSTEMS = (
+    ("🧠 Neurological", "system_neurological"),
+    ("🫀 Cardiovascular", "system_cardiovascular"),
+    ("🍽️ Digestive", "system_digestive"),
+    ("🧴 Skin", "system_skin"),
+    ("🦴 Musculoskeletal", "system_musculoskeletal"),
+    ("🤒 General", None),
+)
+
+# AI insights, in display order: ((keyword table, minimum distinct matches), ...) -> insight
+AI_INSIGHTS = (
+    ((("insight_respiratory", 2),), {
+        "emoji": "🫁",
+        "title": "Upper Respiratory Pattern Detected",
+        "description": "Your symptoms suggest a common cold or viral URI. Focus on respiratory care.",
+        "tip": "Steam inhalation can reduce congestion by 60%"
+    }),
+    ((("insight_fever", 1), ("insight_systemic", 1)), {
+        "emoji": "🌡️",
+        "title": "Systemic Infection Pattern",
+        "description": "Fever with body aches suggests your immune system is actively fighting infection.",
+        "tip": "Rest is crucial - your body needs energy to fight the infection"
+    }),
+    ((("insight_headache", 1),), {
+        "emoji": "🧠",
+        "title": "Neurological Symptom Pattern",
+        "description": "Headache symptoms respond well to hydration and rest in a quiet environment.",
+        "tip": "Avoid screen time and bright lights to reduce headache intensity"
+    }),
+    ((("insight_digestive", 1),), {
+        "emoji": "🍽️",
+        "title": "Gastrointestinal Pattern",
+        "description": "Digestive symptoms require careful hydration and bland diet management.",
+        "tip": "Sip clear fluids slowly rather than drinking large amounts at once"
+    }),
+)
+DEFAULT_INSIGHT = {
+    "emoji": "🔍",
+    "title": "General Symptom Management",
+    "description": "Your symptoms are being monitored. Consistent self-care will support recovery.",
+    "tip": "Track symptom changes daily to identify improvement patterns"
+}
+
+# Recovery plans by average symptom severity (first plan whose minimum is reached)
+RECOVERY_PLANS = (
+    (70, {"recovery_days": 7, "timeline": [
+        {"day": "Today", "status": "Peak Symptoms", "percentage": 100, "description": "Maximum symptom intensity"},
+        {"day": "Day 2-3", "status": "Gradual Improvement", "percentage": 70, "description": "Symptoms begin to decrease"},
+        {"day": "Day 4-5", "status": "Significant Relief", "percentage": 40, "description": "Major improvement visible"},
+        {"day": "Day 6-7", "status": "Near Recovery", "percentage": 10, "description": "Minimal symptoms remain"}
+    ]}),
+    (40, {"recovery_days": 5, "timeline": [
+        {"day": "Today", "status": "Active Symptoms", "percentage": 80, "description": "Symptoms are prominent"},
+        {"day": "Day 2-3", "status": "Steady Improvement", "percentage": 50, "description": "Noticeable reduction in symptoms"},
+        {"day": "Day 4-5", "status": "Mostly Recovered", "percentage": 15, "description": "Symptoms largely resolved"}
+    ]}),
+    (0, {"recovery_days": 3, "timeline": [
+        {"day": "Today", "status": "Mild Symptoms", "percentage": 60, "description": "Manageable symptom level"},
+        {"day": "Day 2", "status": "Rapid Improvement", "percentage": 25, "description": "Quick recovery progression"},
+        {"day": "Day 3", "status": "Full Recovery", "percentage": 5, "description": "Back to normal health"}
+    ]}),
+)
+
+RISK_LEVELS = {
+    "HIGH": {"risk_level": "HIGH", "risk_class": "d-risk-high", "risk_description": "Potential emergency - seek immediate care",
+             "risk_color": "#e53e3e", "risk_emoji": "🚨", "risk_icon": "⚠️",
+             "risk_gradient": "linear-gradient(135deg, #742a2a 0%, #c53030 100%)"},
+    "MODERATE": {"risk_level": "MODERATE", "risk_class": "d-risk-moderate", "risk_description": "Consult healthcare provider soon",
+                 "risk_color": "#dd6b20", "risk_emoji": "🟡", "risk_icon": "📋",
+                 "risk_gradient": "linear-gradient(135deg, #744210 0%, #ed8936 100%)"},
+    "LOW": {"risk_level": "LOW", "risk_class": "d-risk-low", "risk_description": "Self-care may be appropriate",
+            "risk_color": "#38a169", "risk_emoji": "🟢", "risk_icon": "💚",
+            "risk_gradient": "linear-gradient(135deg, #22543d 0%, #48bb78 100%)"},
+}
+
+# Body system severity scale: (upper bound %, label, color, description)
+SEVERITY_SCALE = (
+    (30, "🟢 Mild", "#48bb78", "Minor impact"),
+    (60, "🟡 Moderate", "#ed8936", "Noticeable but manageable"),
+    (80, "🟠 Significant", "#dd6b20", "Substantial impact"),
+    (100, "🔴 Severe", "#e53e3e", "Major health concern"),
+)
+
+
+# 🆕 UPDATED: Horizontal Bar Chart for Symptom Severity (one row per symptom)
+_CHART_ROW = _compile("""
+<div class="d-chart {{ tone }}">
+  <div class="d-chart-name"><span>{{ emoji }}</span><span class="d-label">{{ display|e }}</span></div>
+  <div class="d-track d-track-lg"><div class="d-fill" style="width:{{ percentage }}%"></div><div class="d-pct">{{ percentage }}%</div></div>
+</div>
+""")
+
+# COMPACT Symptom Priority row
+_PRIORITY_ROW = _compile("""
+<div class="d-prio {{ tone }}">
+  <div class="d-prio-name"><div class="d-badge">{{ rank }}</div><div class="d-flex"><span>{{ emoji }}</span><span class="d-label">{{ display|e }}</span></div></div>
+  <div class="d-prio-bar"><div class="d-track d-track-sm"><div class="d-fill" style="width:{{ percentage }}%"></div></div><span class="d-muted">{{ percentage }}%</span></div>
+  <div class="d-tag">{{ action_guide }}</div>
+</div>
+""")
+
+# 🆕 OPTIMIZED: Body system impact row with consistent styling
+_BODY_SYSTEM_ROW = _compile("""
+<div class="d-sys {{ tone }}">
+  <div class="d-sys-name"><span class="d-label">{{ system }}</span></div>
+  <div class="d-sys-bar"><div class="d-track d-track-md"><div class="d-fill" style="width:{{ width }}%"></div><div class="d-pct">{{ percent }}%</div></div></div>
+  <div class="d-tag">{{ severity_label }}</div>
+</div>
+""")
+
+_AI_INSIGHT_CARD = _compile("""
+<div class="d-insight"><div class="d-insight-body">
+  <div class="d-insight-icon">{{ insight.emoji }}</div>
+  <div class="d-grow">
+    <div class="d-insight-title">{{ insight.title }}</div>
+    <div class="d-insight-text">{{ insight.description }}</div>
+    <div class="d-tip">💡 {{ insight.tip }}</div>
+  </div>
+</div></div>
+""")
+
+_RECOVERY_TIMELINE = _compile("""
+{% for phase in timeline %}
+<div class="d-phase">
+  <div class="d-phase-day">{{ phase.day }}</div>
+  <div class="d-grow"><div class="d-label">{{ phase.status }}</div><div class="d-muted">{{ phase.description }}</div></div>
+  <div class="d-phase-pct">{{ phase.percentage }}%</div>
+</div>
+{% endfor %}
+""")
+
+# 1. RISK LEVEL CARD (Urgency First)
+_RISK_CARD = _compile("""
+<div class="d-risk {{ risk.risk_class }}"><div class="d-risk-body">
+  <div class="d-risk-icon">{{ risk.risk_icon }}</div>
+  <div class="d-grow"><div class="d-risk-level">{{ risk.risk_emoji }} {{ risk.risk_level }} RISK LEVEL</div><div class="d-risk-desc">{{ risk.risk_description }}</div></div>
+</div></div>
+""")
+
+# 🆕 DIFFERENTIAL RANKING (alternatives from the single ranking pass), only shown when there is one
+_DIFFERENTIAL_ROW = _compile("""
+<div class="d-diff">
+  <div class="d-diff-name"><span class="d-rank">#{{ rank }}</span><span class="d-label">{{ condition|e }}</span></div>
+  <div class="d-track d-track-diff"><div class="d-fill{{ match_class }}" style="width:{{ width }}%"></div></div>
+  <div class="d-score">score {{ score }}</div>
+</div>
+""")
+
+_DIFFERENTIAL_SECTION = _compile("""
+<div class="d-sec">
+  <div class="d-sec-head"><div class="d-sec-icon">🧭</div><div class="d-sec-title">DIFFERENTIAL RANKING</div></div>
+  {{ rows }}
+</div>
+""")
+
+_EMPTY_PRIORITY = '<div class="d-empty">No symptoms to prioritize</div>'
+_EMPTY_BODY_SYSTEMS = '<div class="d-empty">No specific body system impact detected</div>'
+
+# COMPLETE ENHANCED DASHBOARD - static markup is compiled in, every slot arrives as a rendered string
+# (so the same template, split at its slots, is the shell the client-side renderer fills).
+# Styling comes from DASHBOARD_CSS (styles.py), which is part of the page stylesheet.
+_DASHBOARD = _compile("""
+<div class="d-dash">
+  <div class="d-head">
+    <div class="d-brand"><div class="d-logo">🤖</div><div><h2 class="d-title">AI-POWERED MEDICAL DASHBOARD</h2><p class="d-sub">Intelligent symptom analysis with predictive recovery insights</p></div></div>
+    <div class="d-pill">{{ symptom_count }} Symptoms Analyzed</div>
+  </div>
+  {{ risk_card }}
+  {{ differential_section }}
+  <div class="d-sec">
+    <div class="d-sec-head"><div class="d-sec-icon">📊</div><div class="d-sec-title">SYMPTOM SEVERITY GRAPH</div></div>
+{{ chart_rows }}
+    <div class="d-guide">
+      <div class="d-guide-title">🎨 SEVERITY COLOR GUIDE</div>
+      <div class="d-guide-grid">
+        <div class="d-guide-item t-green"><div class="d-flex"><span class="d-tone-text">🟢</span><span class="d-label">Mild</span></div><div class="d-guide-range">0-30% • Minor impact</div></div>
+        <div class="d-guide-item t-orange"><div class="d-flex"><span class="d-tone-text">🟡</span><span class="d-label">Moderate</span></div><div class="d-guide-range">31-60% • Noticeable impact</div></div>
+        <div class="d-guide-item t-red"><div class="d-flex"><span class="d-tone-text">🔴</span><span class="d-label">Critical</span></div><div class="d-guide-range">61-100% • Major concern</div></div>
+      </div>
+      <div class="d-guide-foot">Based on general medical guidelines and symptom characteristics</div>
     </div>
-    """
-    
-    # Body system impact analysis WITH SEVERITY LABELS
-    body_systems = {
-        "🧠 Neurological": 0,
-        "🫀 Cardiovascular": 0, 
-        "🍽️ Digestive": 0,
-        "🧴 Skin": 0,
-        "🦴 Musculoskeletal": 0,
-        "🤒 General": 0
-    }
-    
-    # Map symptoms to body systems
-    for data in symptom_data:
-        symptom_lower = data["clean"].lower()
-        
-        if any(keyword in symptom_lower for keyword in ["headache", "dizziness", "confusion", "memory", "anxiety", "depression", "vision", "hearing"]):
-            body_systems["🧠 Neurological"] += data["severity"]["percentage"]
-        elif any(keyword in symptom_lower for keyword in ["chest", "heart", "breathing", "palpitations", "blood pressure", "irregular heartbeat"]):
-            body_systems["🫀 Cardiovascular"] += data["severity"]["percentage"]
-        elif any(keyword in symptom_lower for keyword in ["nausea", "vomiting", "diarrhea", "constipation", "stomach", "appetite", "bloating"]):
-            body_systems["🍽️ Digestive"] += data["severity"]["percentage"]
-        elif any(keyword in symptom_lower for keyword in ["rash", "itching", "redness", "swelling", "acne", "dry skin", "hair loss"]):
-            body_systems["🧴 Skin"] += data["severity"]["percentage"]
-        elif any(keyword in symptom_lower for keyword in ["muscle", "joint", "back", "neck", "stiffness", "swelling", "movement"]):
-            body_systems["🦴 Musculoskeletal"] += data["severity"]["percentage"]
-        else:
-            body_systems["🤒 General"] += data["severity"]["percentage"]
-    
-    # 🆕 OPTIMIZED: Create body system impact visualization with consistent styling
-    body_system_html = ""
-    for system, score in body_systems.items():
-        if score > 0:
-            # Normalize score to percentage (max 300% possible across all systems)
-            normalized_score = min(100, (score / 300) * 100)
-            severity_label, severity_color, severity_description = get_severity_label(normalized_score)
-            
-            body_system_html += f"""
-            <div style="
-                display: flex;
-                align-items: center;
-                justify-content: space-between;
-                padding: 15px;
-                margin: 10px 0;
-                background: rgba(45, 55, 72, 0.6);
-                border-radius: 10px;
-                border-left: 4px solid {severity_color};
-            ">
-                <div style="display: flex; align-items: center; gap: 12px; min-width: 140px;">
-                    <span style="color: #e2e8f0; font-weight: 600; font-size: 14px;">{system}</span>
-                </div>
-                
-                <div style="display: flex; align-items: center; gap: 15px; flex: 1;">
-                    <div style="width: 100%; height: 20px; background: #2d3748; border-radius: 10px; overflow: hidden; position: relative; border: 1px solid #4a5568;">
-                        <div style="width: {normalized_score}%; height: 100%; background: linear-gradient(90deg, {severity_color}, {severity_color}cc); border-radius: 10px; transition: all 0.3s ease; box-shadow: 0 2px 6px {severity_color}40;"></div>
-                        <div style="position: absolute; right: 10px; top: 50%; transform: translateY(-50%); color: white; font-weight: 700; font-size: 11px; text-shadow: 0 1px 2px rgba(0,0,0,0.5);">{int(normalized_score)}%</div>
-                    </div>
-                </div>
-                
-                <div style="
-                    background: {severity_color}15;
-                    color: {severity_color};
-                    padding: 6px 12px;
-                    border-radius: 12px;
-                    font-size: 12px;
-                    font-weight: 600;
-                    border: 1px solid {severity_color}30;
-                    min-width: 100px;
-                    text-align: center;
-                ">
-                    {severity_label}
-                </div>
-            </div>
-            """
-    
-    # Handle empty body system HTML
-    body_system_display = body_system_html
-    if not body_system_display.strip():
-        body_system_display = """
-            <div style="text-align: center; color: #a0aec0; padding: 30px; font-size: 14px;">
-                No specific body system impact detected
-            </div>
-        """
-    
-    # 🆕 OPTIMIZED: Severity Scale Legend with consistent styling
-    severity_legend = """
-    <div style="
-        background: rgba(45, 55, 72, 0.6);
-        padding: 20px;
-        border-radius: 12px;
-        margin-top: 20px;
-        border: 1px solid #4a5568;
-    ">
-        <div style="color: #e2e8f0; font-weight: 600; font-size: 14px; margin-bottom: 15px; text-align: center;">
-            📊 SEVERITY SCALE GUIDE
-        </div>
-        <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 12px; font-size: 13px;">
-            <div style="display: flex; align-items: center; gap: 10px; padding: 8px; background: rgba(72, 187, 120, 0.1); border-radius: 8px;">
-                <span style="color: #48bb78; font-size: 18px;">🟢</span>
-                <div>
-                    <div style="color: #e2e8f0; font-weight: 600;">Mild (0-30%)</div>
-                    <div style="color: #a0aec0; font-size: 12px;">Minor impact</div>
-                </div>
-            </div>
-            
-            <div style="display: flex; align-items: center; gap: 10px; padding: 8px; background: rgba(237, 137, 54, 0.1); border-radius: 8px;">
-                <span style="color: #ed8936; font-size: 18px;">🟡</span>
-                <div>
-                    <div style="color: #e2e8f0; font-weight: 600;">Moderate (31-60%)</div>
-                    <div style="color: #a0aec0; font-size: 12px;">Noticeable but manageable</div>
-                </div>
-            </div>
-            
-            <div style="display: flex; align-items: center; gap: 10px; padding: 8px; background: rgba(221, 107, 32, 0.1); border-radius: 8px;">
-                <span style="color: #dd6b20; font-size: 18px;">🟠</span>
-                <div>
-                    <div style="color: #e2e8f0; font-weight: 600;">Significant (61-80%)</div>
-                    <div style="color: #a0aec0; font-size: 12px;">Substantial impact</div>
-                </div>
-            </div>
-            
-            <div style="display: flex; align-items: center; gap: 10px; padding: 8px; background: rgba(229, 62, 62, 0.1); border-radius: 8px;">
-                <span style="color: #e53e3e; font-size: 18px;">🔴</span>
-                <div>
-                    <div style="color: #e2e8f0; font-weight: 600;">Severe (81-100%)</div>
-                    <div style="color: #a0aec0; font-size: 12px;">Major health concern</div>
-                </div>
-            </div>
-        </div>
+  </div>
+  <div class="d-sec">
+    <div class="d-sec-head"><div class="d-sec-icon">🎯</div><div class="d-sec-title">SYMPTOM PRIORITY</div></div>
+    <div class="d-sec-note">Symptoms are prioritized by severity and urgency. Address higher priority items first for optimal recovery.</div>
+{{ priority_rows }}
+  </div>
+  <div class="d-sec">
+    <div class="d-sec-head"><div class="d-sec-icon">🔍</div><div class="d-sec-title">AI PATTERN INSIGHTS</div></div>
+{{ insight_cards }}
+  </div>
+  <div class="d-sec">
+    <div class="d-sec-head"><div class="d-sec-icon">👤</div><div class="d-sec-title">BODY SYSTEM IMPACT</div></div>
+{{ body_system_rows }}
+    <div class="d-guide d-legend">
+      <div class="d-guide-title">📊 SEVERITY SCALE GUIDE</div>
+      <div class="d-legend-grid">
+        <div class="d-legend-item t-green"><span class="d-tone-text">🟢</span><div><div class="d-label">Mild (0-30%)</div><div class="d-muted">Minor impact</div></div></div>
+        <div class="d-legend-item t-orange"><span class="d-tone-text">🟡</span><div><div class="d-label">Moderate (31-60%)</div><div class="d-muted">Noticeable but manageable</div></div></div>
+        <div class="d-legend-item t-deep-orange"><span class="d-tone-text">🟠</span><div><div class="d-label">Significant (61-80%)</div><div class="d-muted">Substantial impact</div></div></div>
+        <div class="d-legend-item t-red"><span class="d-tone-text">🔴</span><div><div class="d-label">Severe (81-100%)</div><div class="d-muted">Major health concern</div></div></div>
+      </div>
+    </div>
+  </div>
+  <div class="d-sec">
+    <div class="d-sec-head"><div class="d-sec-icon">📈</div><div class="d-sec-title">SYMPTOMS BREAKDOWN</div></div>
+    <div class="d-stats">
+      <div class="d-stat t-green"><div class="d-stat-value">{{ mild_count }}</div><div class="d-stat-label">MILD SYMPTOMS</div></div>
+      <div class="d-stat t-orange"><div class="d-stat-value">{{ moderate_count }}</div><div class="d-stat-label">MODERATE SYMPTOMS</div></div>
+      <div class="d-stat t-red"><div class="d-stat-value">{{ critical_count }}</div><div class="d-stat-label">CRITICAL SYMPTOMS</div></div>
     </div>
+  </div>
+  <div class="d-sec">
+    <div class="d-sec-split"><div class="d-sec-head"><div class="d-sec-icon">🔄</div><div class="d-sec-title">RECOVERY TIMELINE</div></div><div class="d-days">{{ recovery_days }} days expected</div></div>
+    {{ recovery_timeline }}
+  </div>
+  <div class="d-sec">
+    <div class="d-sec-head"><div class="d-care-icon">🚑</div><div class="d-sec-title">IMMEDIATE CARE RECOMMENDATIONS</div></div>
+    <div class="d-care">
+      <div class="d-care-head"><div>💊</div><div class="d-care-title">IMMEDIATE SELF-CARE</div></div>
+      <div class="d-care-text">{{ immediate_remedy|e }}</div>
+    </div>
+    <div class="d-foot"><span>🤖</span> AI-powered medical insights for better health decisions</div>
+  </div>
+</div>
+""")
+
+
+# Severity scale function
+def get_severity_label(percentage):
+    _, label, color, description = next((row for row in SEVERITY_SCALE if percentage <= row[0]), SEVERITY_SCALE[-1])
+    return label, color, description
+
+
+def get_symptom_severity(symptom_lower):
+    """Determine severity level based on symptom type (canonical, lowercase name)"""
+    matches = match_symptom_keywords(symptom_lower)
+    for category, severity in SEVERITY_LEVELS:
+        if matches[category]:
+            return severity
+    return DEFAULT_SEVERITY
+
+
+def get_body_system(symptom_lower):
+    """Body system label for a canonical symptom (first matching system wins, otherwise General)"""
+    matches = match_symptom_keywords(symptom_lower)
+    return next(label for label, category in BODY_SYSTEMS if category is None or matches[category])
+
+
+def tone_class(color):
+    """CSS tone class (see DASHBOARD_TONES in styles.py) for one of the severity colors"""
+    return _TONE_CLASSES[color]
+
+
+# Everything about one symptom that doesn't depend on the rest of the request
+SymptomProfile = namedtuple("SymptomProfile", ["display", "canonical", "severity", "priority", "system", "chart_row"])
+
+
+@lru_cache(maxsize=1024)
+def symptom_profile(display, canonical):
+    """Severity, priority, body system and the rendered chart row for one symptom, memoized"""
+    severity = get_symptom_severity(canonical)
+    priority = dict(PRIORITY_LEVELS[severity["level"]], symptom=display, severity_percentage=severity["percentage"])
+    return SymptomProfile(display, canonical, severity, priority, get_body_system(canonical),
+                          _CHART_ROW.render(display=display, emoji=severity["emoji"], percentage=severity["percentage"],
+                                            tone=tone_class(severity["color"])))
+
+
+@lru_cache(maxsize=4096)
+def _priority_row(display, canonical, rank):
+    item = symptom_profile(display, canonical).priority
+    return _PRIORITY_ROW.render(rank=rank, display=display, emoji=item["priority_emoji"], action_guide=item["action_guide"],
+                                percentage=item["severity_percentage"], tone=tone_class(item["priority_color"]))
+
+
+@lru_cache(maxsize=1024)
+def _body_system_row(system, normalized_score):
+    severity_label, severity_color, _ = get_severity_label(normalized_score)
+    return _BODY_SYSTEM_ROW.render(system=system, percent=int(normalized_score), width=f"{normalized_score:g}",
+                                   tone=tone_class(severity_color), severity_label=severity_label)
+
+
+# Fragments for the fixed states, rendered once at import
+_INSIGHTS = [insight for _, insight in AI_INSIGHTS] + [DEFAULT_INSIGHT]
+_INSIGHT_INDEX = {insight["title"]: index for index, insight in enumerate(_INSIGHTS)}
+_INSIGHT_CARDS = {insight["title"]: _AI_INSIGHT_CARD.render(insight=insight) for insight in _INSIGHTS}
+_RECOVERY_TIMELINES = {plan["recovery_days"]: _RECOVERY_TIMELINE.render(timeline=plan["timeline"])
+                       for _, plan in RECOVERY_PLANS}
+_RISK_CARDS = {name: _RISK_CARD.render(risk=risk) for name, risk in RISK_LEVELS.items()}
+
+
+def _script_json(value):
+    """Compact JSON that can sit inside a <script> element"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def _shell(template, *slots):
+    """The template rendered with a marker in each slot, split into [text, slot, text, slot, ..., text].
+
+    The client-side renderer fills the slots, so the page and the server render from the same markup.
     """
+    return template.render({slot: f"\x00{slot}\x00" for slot in slots}).split("\x00")
 
-    # Create AI Insights HTML
-    ai_insights_html = ""
-    for insight in ai_insights:
-        ai_insights_html += f"""
-        <div style="
-            background: rgba(66, 153, 225, 0.1);
-            padding: 18px;
-            border-radius: 12px;
-            margin-bottom: 15px;
-            border: 1px solid #4299e1;
-            border-left: 5px solid #4299e1;
-        ">
-            <div style="display: flex; align-items: flex-start; gap: 15px;">
-                <div style="font-size: 22px; margin-top: 2px;">{insight['emoji']}</div>
-                <div style="flex: 1;">
-                    <div style="font-weight: 700; color: #90cdf4; font-size: 16px; margin-bottom: 8px;">
-                        {insight['title']}
-                    </div>
-                    <div style="color: #cbd5e0; font-size: 14px; line-height: 1.5; margin-bottom: 10px;">
-                        {insight['description']}
-                    </div>
-                    <div style="
-                        background: rgba(66, 153, 225, 0.2);
-                        padding: 8px 12px;
-                        border-radius: 8px;
-                        font-size: 13px;
-                        color: #90cdf4;
-                        border-left: 3px solid #90cdf4;
-                    ">
-                        💡 {insight['tip']}
-                    </div>
-                </div>
-            </div>
-        </div>
-        """
-    
-    # Create Recovery Timeline HTML
-    recovery_timeline_html = ""
-    for phase in recovery_data["timeline"]:
-        recovery_timeline_html += f"""
-        <div style="display: flex; align-items: center; margin: 15px 0; gap: 15px;">
-            <div style="
-                background: rgba(72, 187, 120, 0.2);
-                padding: 8px 12px;
-                border-radius: 8px;
-                min-width: 70px;
-                text-align: center;
-                border: 1px solid #48bb78;
-                color: #68d391;
-                font-weight: 600;
-                font-size: 13px;
-            ">{phase['day']}</div>
-            <div style="flex: 1;">
-                <div style="color: #e2e8f0; font-weight: 600; font-size: 14px; margin-bottom: 5px;">
-                    {phase['status']}
-                </div>
-                <div style="color: #a0aec0; font-size: 13px;">
-                    {phase['description']}
-                </div>
-            </div>
-            <div style="
-                background: rgba(66, 153, 225, 0.2);
-                padding: 6px 12px;
-                border-radius: 20px;
-                font-size: 12px;
-                color: #90cdf4;
-                border: 1px solid #4299e1;
-                min-width: 50px;
-                text-align: center;
-            ">{phase['percentage']}%</div>
-        </div>
-        """
-    
-    # COMPACT Symptom Priority HTML
-    symptom_priority_html = ""
-    if symptom_priority:
-        for i, item in enumerate(symptom_priority, 1):
-            progress_bar = create_compact_progress_bar(item['severity_percentage'], item['priority_color'], 100)
-            
-            symptom_priority_html += f"""
-            <div style="
-                background: rgba(45, 55, 72, 0.6);
-                padding: 15px;
-                border-radius: 10px;
-                margin-bottom: 10px;
-                border-left: 4px solid {item['priority_color']};
-                display: flex;
-                align-items: center;
-                justify-content: space-between;
-                gap: 10px;
-            ">
-                <div style="display: flex; align-items: center; gap: 8px; min-width: 120px;">
-                    <div style="
-                        background: {item['priority_color']}20;
-                        color: {item['priority_color']};
-                        padding: 4px 8px;
-                        border-radius: 6px;
-                        font-weight: 700;
-                        font-size: 12px;
-                        border: 1px solid {item['priority_color']}40;
-                    ">{i}</div>
-                    <div style="display: flex; align-items: center; gap: 6px;">
-                        <span style="font-size: 16px;">{item['priority_emoji']}</span>
-                        <span style="color: #e2e8f0; font-weight: 600; font-size: 14px;">{item['symptom']}</span>
-                    </div>
-                </div>
-                
-                <div style="display: flex; align-items: center; gap: 10px; flex: 1;">
-                    {progress_bar}
-                    <span style="color: #a0aec0; font-size: 12px; min-width: 30px; text-align: center;">
-                        {item['severity_percentage']}%
-                    </span>
-                </div>
-                
-                <div style="
-                    background: {item['priority_color']}15;
-                    color: {item['priority_color']};
-                    padding: 4px 8px;
-                    border-radius: 12px;
-                    font-size: 11px;
-                    font-weight: 600;
-                    border: 1px solid {item['priority_color']}30;
-                    min-width: 100px;
-                    text-align: center;
-                ">
-                    {item['action_guide']}
-                </div>
-            </div>
-            """
-    else:
-        symptom_priority_html = """
-            <div style="text-align: center; color: #a0aec0; padding: 30px; font-size: 14px;">
-                No symptoms to prioritize
-            </div>
-        """
 
-    # Risk assessment logic
-    critical_symptoms = ["chest pain", "difficulty breathing", "severe bleeding", "sudden weakness", "suicidal thoughts", "seizure", "severe head injury", "paralysis/numbness"]
-    moderate_symptoms = ["fever", "high pain", "head injury", "vision problems", "heart palpitations", "shortness of breath", "fainting"]
-    
-    clean_selected_symptoms = []
-    for symptom in selected_symptoms:
-        if ' ' in symptom and any(symptom.startswith(emoji) for emoji in ["🔴", "🟡", "🟢"]):
-            clean_selected_symptoms.append(symptom.split(' ', 1)[1].lower())
-        else:
-            clean_selected_symptoms.append(symptom.lower())
-    
-    symptom_text = " ".join(clean_selected_symptoms)
-    
-    critical_count = sum(1 for symptom in critical_symptoms if symptom in symptom_text)
-    moderate_count = sum(1 for symptom in moderate_symptoms if symptom in symptom_text)
-    mild_count = len(selected_symptoms) - critical_count - moderate_count
-    
-    # Determine risk level
+# Element id of the dashboard gr.HTML; the client-side renderer only watches this element
+DASHBOARD_ELEMENT_ID = "dashboard-output"
+
+# Head script for the page: the fixed tables, fragments and template shells the client-side
+# renderer (DASHBOARD_RENDERER_JS in styles.py) combines with each consult's model
+DASHBOARD_JS = "<script>window.DASHBOARD_TABLES = " + _script_json({
+    "element_id": DASHBOARD_ELEMENT_ID,
+    "shells": {
+        "dashboard": _shell(_DASHBOARD, "symptom_count", "risk_card", "differential_section", "chart_rows",
+                            "priority_rows", "insight_cards", "body_system_rows", "mild_count", "moderate_count",
+                            "critical_count", "recovery_days", "recovery_timeline", "immediate_remedy"),
+        "differential_section": _shell(_DIFFERENTIAL_SECTION, "rows"),
+        "differential_row": _shell(_DIFFERENTIAL_ROW, "rank", "condition", "match_class", "width", "score"),
+        "chart_row": _shell(_CHART_ROW, "tone", "emoji", "display", "percentage"),
+        "priority_row": _shell(_PRIORITY_ROW, "tone", "rank", "emoji", "display", "percentage", "action_guide"),
+        "body_system_row": _shell(_BODY_SYSTEM_ROW, "tone", "system", "width", "percent", "severity_label"),
+    },
+    "empty_priority": _EMPTY_PRIORITY,
+    "empty_body_systems": _EMPTY_BODY_SYSTEMS,
+    "severity": {severity["level"]: {"tone": tone_class(severity["color"]), "emoji": severity["emoji"]}
+                 for _, severity in SEVERITY_LEVELS},
+    "priority": {level: {"tone": tone_class(item["priority_color"]), "emoji": item["priority_emoji"],
+                         "action_guide": item["action_guide"]}
+                 for level, item in PRIORITY_LEVELS.items()},
+    "scale": [[maximum, label, tone_class(color)] for maximum, label, color, _ in SEVERITY_SCALE],
+    "insight_cards": [_INSIGHT_CARDS[insight["title"]] for insight in _INSIGHTS],
+    "recovery_timelines": _RECOVERY_TIMELINES,
+    "risk_cards": _RISK_CARDS,
+    "default_remedy": DEFAULT_IMMEDIATE_REMEDY,
+}) + ";</script>" + DASHBOARD_RENDERER_JS
+
+
+def analyze_symptom_priority(profiles):
+    """Symptom profiles by priority, highest (1) first; ties keep the selection order"""
+    return sorted(profiles, key=lambda profile: profile.priority["priority_level"])
+
+
+def generate_ai_insights(selected_symptoms):
+    """Generate intelligent insights based on symptom patterns"""
+    # Every insight keyword table, matched once over the canonical symptom text
+    matches = selected_symptoms.keyword_matches
+    insights = [insight for requirements, insight in AI_INSIGHTS
+                if all(len(matches[category]) >= minimum for category, minimum in requirements)]
+    return insights or [DEFAULT_INSIGHT]
+
+
+def generate_recovery_timeline(profiles):
+    """Recovery plan for the average severity of the selected symptoms"""
+    avg_severity = sum(profile.severity["percentage"] for profile in profiles) / len(profiles)
+    plan = next(plan for minimum, plan in RECOVERY_PLANS if avg_severity >= minimum)
+    return dict(plan, avg_severity=avg_severity)
+
+
+def assess_risk_level(selected_symptoms):
+    """(risk level name, critical count, moderate count) from the emergency keyword tables"""
+    risk_matches = selected_symptoms.keyword_matches
+    critical_count = len(risk_matches["emergency_critical"])
+    moderate_count = len(risk_matches["emergency_moderate"])
     if critical_count > 0:
-        risk_level = "HIGH"
-        risk_description = "Potential emergency - seek immediate care"
-        risk_color = "#e53e3e"
-        risk_emoji = "🚨"
-        risk_icon = "⚠️"
-        risk_gradient = "linear-gradient(135deg, #742a2a 0%, #c53030 100%)"
-    elif moderate_count >= 2:
-        risk_level = "MODERATE" 
-        risk_description = "Consult healthcare provider soon"
-        risk_color = "#dd6b20"
-        risk_emoji = "🟡"
-        risk_icon = "📋"
-        risk_gradient = "linear-gradient(135deg, #744210 0%, #ed8936 100%)"
-    else:
-        risk_level = "LOW"
-        risk_description = "Self-care may be appropriate"
-        risk_color = "#38a169"
-        risk_emoji = "🟢"
-        risk_icon = "💚"
-        risk_gradient = "linear-gradient(135deg, #22543d 0%, #48bb78 100%)"
-    
-    # Get immediate remedy
-    immediate_remedy = ""
-    if matched_condition:
-        from symptom_database import SYMPTOM_SOLUTIONS
-        if matched_condition in SYMPTOM_SOLUTIONS:
-            immediate_remedy = SYMPTOM_SOLUTIONS[matched_condition].get("immediate_remedy", "")
-    
-    if not immediate_remedy and selected_symptoms:
-        immediate_remedy = "💧 Stay hydrated • 🛌 Get plenty of rest • 🌡️ Monitor your symptoms • 📞 Contact doctor if symptoms worsen"
-
-    # 🆕 STANDARDIZED SECTION STYLES
-    section_style = """
-        background: rgba(45, 55, 72, 0.8);
-        padding: 25px;
-        border-radius: 16px;
-        margin-bottom: 25px;
-        border: 1px solid #4a5568;
-        backdrop-filter: blur(10px);
+        return "HIGH", critical_count, moderate_count
+    if moderate_count >= 2:
+        return "MODERATE", critical_count, moderate_count
+    return "LOW", critical_count, moderate_count
+
+
+def in_canonical_order(selected_symptoms):
+    """One display label per distinct canonical symptom, sorted by canonical name.
+
+    Dashboards are rendered in this order and with these labels, so every selection of the same
+    set (in any click order, with or without severity emojis, in any letter case) produces the
+    same HTML - the cache is keyed by the canonical set alone.
     """
+    return SymptomSet([symptom_display_label(canonical) for canonical in sorted(selected_symptoms.unique)])
+
+
+def dashboard_cache_key(selected_symptoms, matched_condition=None, differential=None):
+    return selected_symptoms.unique, matched_condition, tuple(differential or ())
+
+
+def get_dashboard_cache_stats():
+    return dashboard_cache.stats()
+
 
-    heading_style = """
-        display: flex;
-        align-items: center;
-        gap: 12px;
-        margin-bottom: 20px;
+def standalone_dashboard_html(dashboard_html):
+    """Dashboard HTML with its stylesheet inlined, for consumers outside the Gradio page (API, batch files)"""
+    if dashboard_html == EMPTY_DASHBOARD_HTML:
+        return dashboard_html
+    return f"<style>{DASHBOARD_CSS}</style>{dashboard_html}"
+
+
+def dashboard_budget(symptom_count):
+    return DASHBOARD_BUDGET_BYTES + DASHBOARD_BUDGET_PER_SYMPTOM * symptom_count
+
+
+def check_dashboard_sizes():
+    """Render one dashboard per condition, plus the single- and all-symptom extremes, and compare
+    their UTF-8 size with the budget. Returns [(name, symptom count, bytes, budget)]; raises
+    ValueError listing every dashboard over budget.
     """
+    all_symptoms = sorted({symptom for data in SYMPTOM_SOLUTIONS.values() for symptom in data["symptoms"]})
+    cases = [("single symptom", all_symptoms[:1]), ("all symptoms", all_symptoms)]
+    cases += [(condition_id, data["symptoms"]) for condition_id, data in SYMPTOM_SOLUTIONS.items()]
+
+    sizes = []
+    for name, symptoms in cases:
+        differential = rank_conditions_from_symptoms(symptoms, k=3)
+        matched = differential[0][0] if differential and differential[0][1] >= MATCH_THRESHOLD else None
+        symptom_set = SymptomSet(symptoms)
+        size = len(render_dashboard(in_canonical_order(symptom_set), matched, differential).encode("utf-8"))
+        sizes.append((name, len(symptom_set), size, dashboard_budget(len(symptom_set))))
 
-    heading_text_style = """
-        font-weight: 700;
-        color: #e2e8f0;
-        font-size: 18px;
+    over = [f"{name} ({count} symptoms): {size} > {budget} bytes" for name, count, size, budget in sizes if size > budget]
+    if over:
+        raise ValueError("Dashboard over its size budget:\n  " + "\n  ".join(over))
+    return sizes
+
+
+def create_enhanced_symptom_dashboard(selected_symptoms, matched_condition=None, differential=None,
+                                      output=DASHBOARD_FORMAT_HTML):
+    """Create advanced visual analysis with AI insights and recovery tracking
+
+    differential: optional ranked [(condition_id, score), ...] from rank_conditions_from_symptoms,
+    shown as alternatives without re-scanning the catalogue.
+    selected_symptoms may be a SymptomSet (normalized once by the caller) or a list of labels.
+    output: DASHBOARD_FORMAT_HTML (rendered HTML), DASHBOARD_FORMAT_MODEL (dashboard_model() as a
+    JSON string, None without symptoms) or DASHBOARD_FORMAT_PAGE (what the Gradio page shows).
+    Results are cached per (canonical symptom set, matched condition, differential, format).
     """
+    if output == DASHBOARD_FORMAT_PAGE:
+        if DASHBOARD_RENDER == "server":
+            return create_enhanced_symptom_dashboard(selected_symptoms, matched_condition, differential)
+        model_json = create_enhanced_symptom_dashboard(selected_symptoms, matched_condition, differential,
+                                                       DASHBOARD_FORMAT_MODEL)
+        return EMPTY_DASHBOARD_HTML if model_json is None else client_dashboard_html(model_json)
 
-    # COMPLETE ENHANCED DASHBOARD HTML WITH OPTIMIZED BODY SYSTEM SECTION
-    dashboard_html = f"""
-    <div style="
-        background: linear-gradient(135deg, #1a1f36 0%, #2d3748 100%);
-        color: white;
-        padding: 30px;
-        border-radius: 20px;
-        margin: 20px 0;
-        border: 1px solid #4a5568;
-        box-shadow: 0 12px 40px rgba(0,0,0,0.4);
-        font-family: 'Inter', sans-serif;
-    ">
-        <!-- Header -->
-        <div style="display: flex; align-items: center; justify-content: space-between; margin-bottom: 25px; padding-bottom: 20px; border-bottom: 1px solid #4a5568;">
-            <div style="display: flex; align-items: center; gap: 15px;">
-                <div style="
-                    background: linear-gradient(135deg, #4299e1, #3182ce);
-                    padding: 12px;
-                    border-radius: 12px;
-                    font-size: 24px;
-                ">🤖</div>
-                <div>
-                    <h2 style="margin: 0; font-size: 22px; font-weight: 700; color: #e2e8f0;">AI-POWERED MEDICAL DASHBOARD</h2>
-                    <p style="margin: 5px 0 0 0; color: #a0aec0; font-size: 14px;">Intelligent symptom analysis with predictive recovery insights</p>
-                </div>
-            </div>
-            <div style="
-                background: rgba(66, 153, 225, 0.2);
-                padding: 8px 16px;
-                border-radius: 20px;
-                font-size: 14px;
-                border: 1px solid #4299e1;
-                color: #90cdf4;
-            ">
-                {len(selected_symptoms)} Symptoms Analyzed
-            </div>
-        </div>
-        
-        <!-- 1. RISK LEVEL CARD (Urgency First) -->
-        <div style="
-            background: {risk_gradient};
-            padding: 25px;
-            border-radius: 16px;
-            margin-bottom: 25px;
-            border: 1px solid {risk_color};
-            box-shadow: 0 6px 20px rgba(0,0,0,0.2);
-        ">
-            <div style="display: flex; align-items: center; gap: 20px;">
-                <div style="font-size: 42px; filter: drop-shadow(0 4px 8px rgba(0,0,0,0.3));">{risk_icon}</div>
-                <div style="flex: 1;">
-                    <div style="font-size: 24px; font-weight: 800; margin-bottom: 8px; text-shadow: 0 2px 4px rgba(0,0,0,0.3);">
-                        {risk_emoji} {risk_level} RISK LEVEL
-                    </div>
-                    <div style="font-size: 16px; opacity: 0.95; font-weight: 500;">{risk_description}</div>
-                </div>
-            </div>
-        </div>
+    selected_symptoms = SymptomSet.coerce(selected_symptoms)
+    if not selected_symptoms:
+        return EMPTY_DASHBOARD_HTML if output == DASHBOARD_FORMAT_HTML else None
+    render = render_dashboard if output == DASHBOARD_FORMAT_HTML else _dashboard_model_json
+    if not DASHBOARD_CACHE_ENABLED:
+        return render(in_canonical_order(selected_symptoms), matched_condition, differential)
 
-        <!-- 2. SYMPTOM SEVERITY GRAPH (See Data First) -->
-        <div style="{section_style}">
-            <div style="{heading_style}">
-                <div style="font-size: 20px;">📊</div>
-                <div style="{heading_text_style}">SYMPTOM SEVERITY GRAPH</div>
-            </div>
-            {symptom_chart_html}
-            {severity_disclaimer}
-        </div>
+    key = (output,) + dashboard_cache_key(selected_symptoms, matched_condition, differential)
+    dashboard = dashboard_cache.get(key)
+    if dashboard is None:
+        dashboard = render(in_canonical_order(selected_symptoms), matched_condition, differential)
+        dashboard_cache.set(key, dashboard)
+    return dashboard
 
-        <!-- 3. SYMPTOM PRIORITY (Know What to Address) -->
-        <div style="{section_style}">
-            <div style="{heading_style}">
-                <div style="font-size: 20px;">🎯</div>
-                <div style="{heading_text_style}">SYMPTOM PRIORITY</div>
-            </div>
-            <div style="color: #a0aec0; font-size: 14px; margin-bottom: 20px; line-height: 1.5;">
-                Symptoms are prioritized by severity and urgency. Address higher priority items first for optimal recovery.
-            </div>
-            {symptom_priority_html}
-        </div>
 
-        <!-- 4. AI PATTERN INSIGHTS (Intelligent Analysis) -->
-        <div style="{section_style}">
-            <div style="{heading_style}">
-                <div style="font-size: 20px;">🔍</div>
-                <div style="{heading_text_style}">AI PATTERN INSIGHTS</div>
-            </div>
-            {ai_insights_html}
-        </div>
+def _dashboard_model_json(selected_symptoms, matched_condition=None, differential=None):
+    return json.dumps(dashboard_model(selected_symptoms, matched_condition, differential),
+                      ensure_ascii=False, separators=(",", ":"))
 
-        <!-- 5. 🆕 OPTIMIZED BODY SYSTEM IMPACT (System-wide View) -->
-        <div style="{section_style}">
-            <div style="{heading_style}">
-                <div style="font-size: 20px;">👤</div>
-                <div style="{heading_text_style}">BODY SYSTEM IMPACT</div>
-            </div>
-            {body_system_display}
-            {severity_legend}
-        </div>
 
-        <!-- 6. SYMPTOMS BREAKDOWN (Quantitative Summary) -->
-        <div style="{section_style}">
-            <div style="{heading_style}">
-                <div style="font-size: 20px;">📈</div>
-                <div style="{heading_text_style}">SYMPTOMS BREAKDOWN</div>
-            </div>
-            <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px; margin-top: 15px;">
-                <div style="
-                    background: rgba(72, 187, 120, 0.15);
-                    padding: 25px;
-                    border-radius: 14px;
-                    text-align: center;
-                    border: 1px solid #48bb78;
-                    backdrop-filter: blur(10px);
-                ">
-                    <div style="font-size: 32px; font-weight: 800; color: #68d391; margin-bottom: 8px;">{mild_count}</div>
-                    <div style="font-size: 14px; color: #a0aec0; font-weight: 600;">MILD SYMPTOMS</div>
-                </div>
-                <div style="
-                    background: rgba(237, 137, 54, 0.15);
-                    padding: 25px;
-                    border-radius: 14px;
-                    text-align: center;
-                    border: 1px solid #ed8936;
-                    backdrop-filter: blur(10px);
-                ">
-                    <div style="font-size: 32px; font-weight: 800; color: #fbd38d; margin-bottom: 8px;">{moderate_count}</div>
-                    <div style="font-size: 14px; color: #a0aec0; font-weight: 600;">MODERATE SYMPTOMS</div>
-                </div>
-                <div style="
-                    background: rgba(229, 62, 62, 0.15);
-                    padding: 25px;
-                    border-radius: 14px;
-                    text-align: center;
-                    border: 1px solid #e53e3e;
-                    backdrop-filter: blur(10px);
-                ">
-                    <div style="font-size: 32px; font-weight: 800; color: #fc8181; margin-bottom: 8px;">{critical_count}</div>
-                    <div style="font-size: 14px; color: #a0aec0; font-weight: 600;">CRITICAL SYMPTOMS</div>
-                </div>
-            </div>
-        </div>
+def client_dashboard_html(model_json):
+    """Placeholder that DASHBOARD_JS fills with the dashboard rendered from model_json"""
+    attribute = model_json.replace("&", "&amp;").replace("'", "&#39;").replace("<", "&lt;")
+    return f"<div class='d-dash-model' data-model='{attribute}'></div>"
 
-        <!-- 7. RECOVERY TIMELINE (Future Outlook) -->
-        <div style="{section_style}">
-            <div style="display: flex; align-items: center; justify-content: space-between; margin-bottom: 20px;">
-                <div style="{heading_style}">
-                    <div style="font-size: 20px;">🔄</div>
-                    <div style="{heading_text_style}">RECOVERY TIMELINE</div>
-                </div>
-                <div style="
-                    background: rgba(72, 187, 120, 0.2);
-                    padding: 6px 12px;
-                    border-radius: 20px;
-                    font-size: 13px;
-                    color: #68d391;
-                    border: 1px solid #48bb78;
-                ">
-                    {recovery_data["recovery_days"]} days expected
-                </div>
-            </div>
-            {recovery_timeline_html}
-        </div>
 
-        <!-- 8. IMMEDIATE ACTIONS (Action Plan) -->
-        <div style="{section_style}">
-            <div style="{heading_style}">
-                <div style="
-                    background: linear-gradient(135deg, #4299e1, #3182ce);
-                    padding: 10px;
-                    border-radius: 10px;
-                    font-size: 20px;
-                ">🚑</div>
-                <div style="{heading_text_style}">IMMEDIATE CARE RECOMMENDATIONS</div>
-            </div>
-            
-            <div style="
-                background: rgba(66, 153, 225, 0.1);
-                padding: 20px;
-                border-radius: 12px;
-                margin-bottom: 15px;
-                border: 1px solid #4299e1;
-            ">
-                <div style="display: flex; align-items: center; gap: 12px; margin-bottom: 12px;">
-                    <div style="font-size: 18px; color: #90cdf4;">💊</div>
-                    <div style="font-weight: 700; color: #90cdf4; font-size: 16px;">IMMEDIATE SELF-CARE</div>
-                </div>
-                <div style="color: #cbd5e0; font-size: 14px; line-height: 1.6; padding-left: 30px;">
-                    {immediate_remedy}
-                </div>
-            </div>
-            
-            <div style="
-                font-size: 13px;
-                color: #718096;
-                margin-top: 15px;
-                display: flex;
-                align-items: center;
-                gap: 8px;
-                justify-content: center;
-            ">
-                <span>🤖</span> AI-powered medical insights for better health decisions
-            </div>
-        </div>
-    </div>
+def _symptom_profiles(selected_symptoms):
+    return [symptom_profile(display, canonical)
+            for display, canonical in zip(selected_symptoms.display, selected_symptoms.canonical)]
+
+
+def _body_system_scores(profiles):
+    """[(system, score)]: severity summed per body system, normalized to a percentage (max 300%)"""
+    system_scores = dict.fromkeys((label for label, _ in BODY_SYSTEMS), 0)
+    for profile in profiles:
+        system_scores[profile.system] += profile.severity["percentage"]
+    return [(system, round(min(100, (score / 300) * 100), 1)) for system, score in system_scores.items() if score > 0]
+
+
+def _differential_rows(matched_condition, differential):
+    """🆕 DIFFERENTIAL RANKING (alternatives from the single ranking pass)"""
+    rows = []
+    if differential:
+        top_score = differential[0][1] or 1
+        for rank, (condition_id, score) in enumerate(differential, 1):
+            condition_info = SYMPTOM_SOLUTIONS.get(condition_id)
+            if not condition_info:
+                continue
+            rows.append({
+                "rank": rank,
+                "condition": condition_info["condition"],
+                "width": round(min(100, (score / top_score) * 100)),
+                "match": condition_id == matched_condition,
+                "score": f"{score:g}",
+            })
+    return rows
+
+
+def _immediate_remedy(matched_condition):
+    """The matched condition's immediate remedy, or None for the default advice"""
+    if matched_condition in SYMPTOM_SOLUTIONS:
+        return SYMPTOM_SOLUTIONS[matched_condition].get("immediate_remedy") or None
+    return None
+
+
+def render_dashboard(selected_symptoms, matched_condition=None, differential=None):
+    """Render the dashboard HTML for a non-empty SymptomSet, in the given symptom order (uncached)"""
+    profiles = _symptom_profiles(selected_symptoms)
+    body_system_rows = [_body_system_row(system, score) for system, score in _body_system_scores(profiles)]
+    priority_rows = [_priority_row(profile.display, profile.canonical, rank)
+                     for rank, profile in enumerate(analyze_symptom_priority(profiles), 1)]
+
+    risk_level, critical_count, moderate_count = assess_risk_level(selected_symptoms)
+    recovery = generate_recovery_timeline(profiles)
+
+    differential_rows = [_DIFFERENTIAL_ROW.render(row, match_class=" d-match" if row["match"] else "")
+                         for row in _differential_rows(matched_condition, differential)]
+
+    return _DASHBOARD.render(
+        symptom_count=len(selected_symptoms),
+        risk_card=_RISK_CARDS[risk_level],
+        differential_section=_DIFFERENTIAL_SECTION.render(rows="".join(differential_rows)) if differential_rows else "",
+        chart_rows="".join(profile.chart_row for profile in profiles),
+        priority_rows="".join(priority_rows) or _EMPTY_PRIORITY,
+        insight_cards="".join(_INSIGHT_CARDS[insight["title"]] for insight in generate_ai_insights(selected_symptoms)),
+        body_system_rows="".join(body_system_rows) or _EMPTY_BODY_SYSTEMS,
+        mild_count=len(selected_symptoms) - critical_count - moderate_count,
+        moderate_count=moderate_count,
+        critical_count=critical_count,
+        recovery_days=recovery["recovery_days"],
+        recovery_timeline=_RECOVERY_TIMELINES[recovery["recovery_days"]],
+        immediate_remedy=_immediate_remedy(matched_condition) or DEFAULT_IMMEDIATE_REMEDY,
+    )
+
+
+def dashboard_model(selected_symptoms, matched_condition=None, differential=None):
+    """The same dashboard as a compact JSON-ready dict, for a non-empty SymptomSet (uncached).
+
+    Only the per-consult values are included; the fixed texts (insights, recovery plans, risk
+    cards, legends) ship once with the page in DASHBOARD_JS. "priority" holds indices into
+    "symptoms", "insights" indices into DASHBOARD_TABLES.insight_cards.
     """
-    return dashboard_html
+    profiles = _symptom_profiles(selected_symptoms)
+    risk_level, critical_count, moderate_count = assess_risk_level(selected_symptoms)
+    return {
+        "count": len(selected_symptoms),
+        "risk": risk_level,
+        "differential": [[row["rank"], row["condition"], row["width"], row["match"], row["score"]]
+                         for row in _differential_rows(matched_condition, differential)],
+        "symptoms": [[profile.display, profile.severity["level"], profile.severity["percentage"]]
+                     for profile in profiles],
+        "priority": sorted(range(len(profiles)), key=lambda index: profiles[index].priority["priority_level"]),
+        "systems": [[system, score] for system, score in _body_system_scores(profiles)],
+        "insights": [_INSIGHT_INDEX[insight["title"]] for insight in generate_ai_insights(selected_symptoms)],
+        "counts": [len(selected_symptoms) - critical_count - moderate_count, moderate_count, critical_count],
+        "recovery": generate_recovery_timeline(profiles)["recovery_days"],
+        "remedy": _immediate_remedy(matched_condition),
+    }
+
+
+_RECOVERY_PLANS = {plan["recovery_days"]: plan["timeline"] for _, plan in RECOVERY_PLANS}
+
+
+def resolve_dashboard_model(model):
+    """dashboard_model() with the DASHBOARD_TABLES references replaced by their content.
+
+    For API clients, which don't load the page's DASHBOARD_JS: "insights" becomes the insight
+    dicts, "risk" and "recovery" become dicts with their texts, and "remedy" is never None.
+    "priority" still indexes the model's own "symptoms".
+    """
+    risk = RISK_LEVELS[model["risk"]]
+    return dict(
+        model,
+        risk={"level": risk["risk_level"], "description": risk["risk_description"],
+              "emoji": risk["risk_emoji"], "icon": risk["risk_icon"]},
+        insights=[_INSIGHTS[index] for index in model["insights"]],
+        recovery={"days": model["recovery"], "timeline": _RECOVERY_PLANS[model["recovery"]]},
+        remedy=model["remedy"] or DEFAULT_IMMEDIATE_REMEDY,
+    )
+
+
+if __name__ == "__main__":
+    # Size regression check: python dashboard.py
+    for name, count, size, budget in check_dashboard_sizes():
+        print(f"{name:<28} {count:>3} symptoms {size:>7} bytes (budget {budget})")
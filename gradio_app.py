@@ -1,17 +1,28 @@
 import os
+import json
 import gradio as gr
-from brain_of_the_doctor import encode_image, analyze_image_with_query
+from brain_of_the_doctor import encode_image_with_mime, analyze_image_with_query, stream_image_analysis, analyze_text_with_query, stream_text_analysis
 from voice_of_the_patient import record_audio, transcribe_with_groq
-from voice_of_the_doctor import text_to_speech_with_gtts
+from voice_of_the_doctor import text_to_speech, TTS_CACHE_DIR
 import datetime
 import tempfile
+import time
 from fpdf import FPDF
 import re
 
 # Import from our modules
-from symptom_database import SYMPTOM_SOLUTIONS, detect_condition_from_symptoms, check_emergency_flags
-from dashboard import create_enhanced_symptom_dashboard
+from symptom_database import SYMPTOM_SOLUTIONS, MATCH_THRESHOLD, rank_conditions_from_symptoms, check_emergency_flags
+from dashboard import (create_enhanced_symptom_dashboard, standalone_dashboard_html, resolve_dashboard_model,
+                       DASHBOARD_JS, DASHBOARD_ELEMENT_ID,
+                       DASHBOARD_FORMAT_HTML, DASHBOARD_FORMAT_MODEL, DASHBOARD_FORMAT_PAGE)
+from symptom_set import SymptomSet
+from transcript_symptoms import extract_symptoms
 from medical_analysis import calculate_confidence_score, add_confidence_disclaimer
+from router import route_consult, ROUTE_TEMPLATE
+from serving import (event_options, configure_queue, launch_options, get_queue_metrics, format_queue_metrics,
+                     consult_slot, CONSULT_CONCURRENCY_ID, REPORT_CONCURRENCY_ID)
+from pipeline import (Stage, run_stages, stage_timer, record_timing, format_stage_timings, get_pipeline_pool_stats,
+                      format_pipeline_pool_stats)
 from styles import ENHANCED_PROFESSIONAL_CSS, NEURAL_JS, ENHANCED_NEURAL_HEADER, HTML_ANIMATIONS_CSS, HTML_ANIMATIONS_HEADER, HTML_ANIMATIONS_JS
 
 # CACHED: System prompt to avoid recreation
@@ -446,7 +457,7 @@ def combine_all_symptoms(urgent_symptoms, neuro_symptoms, cardio_symptoms, diges
     
     return list(all_selected)
 
-def format_professional_medical_response(condition_data, user_symptoms, confidence_score):
+def format_professional_medical_response(condition_data, user_symptoms, confidence_score, differential=None):
     """Optimized response formatting with cached operations"""
     # Clean symptoms - no longer need to remove brackets since symptoms don't have them anymore
     symptoms_text = ", ".join(user_symptoms)
@@ -464,13 +475,21 @@ def format_professional_medical_response(condition_data, user_symptoms, confiden
             confidence_msg = msg
             break
     
+    # Alternatives from the ranked differential that also clear the match threshold
+    alternatives = ""
+    if differential:
+        other_conditions = [SYMPTOM_SOLUTIONS[condition_id]['condition'] for condition_id, score in differential
+                            if score >= MATCH_THRESHOLD and SYMPTOM_SOLUTIONS[condition_id]['condition'] != condition_data['condition']]
+        if other_conditions:
+            alternatives = "\nALSO CONSIDER: " + ", ".join(other_conditions)
+    
     # Template-based response for faster string building - REMOVED ALL [BRACKETS]
     response_template = """MEDICAL ASSESSMENT
 
 Based on your symptoms: {symptoms}
 
 URGENCY: {urgency}
-CONDITION: {condition}
+CONDITION: {condition}{alternatives}
 TREATMENT: {advice}
 IMMEDIATE: {remedy}
 
@@ -481,6 +500,7 @@ CONFIDENCE: {conf_msg} ({conf_score}%)
         symptoms=symptoms_text,
         urgency=condition_data['urgency'],
         condition=condition_data['condition'],
+        alternatives=alternatives,
         advice=condition_data['advice'],
         remedy=condition_data['immediate_remedy'],
         conf_msg=confidence_msg,
@@ -854,92 +874,388 @@ Generated by AI Doctor 2.0 - Advanced Medical Analysis System
         print(f"Text report error: {e}")
         return None
 
-def process_inputs(audio_filepath, image_filepath, urgent_symptoms, neuro_symptoms, 
-                  cardio_symptoms, digestive_symptoms, skin_symptoms, muscle_symptoms, 
-                  common_symptoms):
-    
-    # OPTIMIZED: Use cached symptom combination
-    selected_symptoms = combine_all_symptoms(
-        urgent_symptoms, neuro_symptoms, cardio_symptoms, digestive_symptoms,
-        skin_symptoms, muscle_symptoms, common_symptoms
-    )
-    
-    print(f"Analyzing {len(selected_symptoms)} symptoms")
+# Number of ranked alternatives kept from local symptom matching
+DIFFERENTIAL_SIZE = int(os.environ.get("DIFFERENTIAL_SIZE", "3"))
+
+# Stream the AI assessment token-by-token into the UI (set STREAM_RESPONSES=0 to disable)
+STREAM_RESPONSES = os.environ.get("STREAM_RESPONSES", "1") != "0"
+
+# Feed symptoms spoken in the recording into matching, emergency and confidence checks (SPOKEN_SYMPTOMS=0 to disable)
+SPOKEN_SYMPTOMS = os.environ.get("SPOKEN_SYMPTOMS", "1") != "0"
+
+# Refresh the summary and dashboard as symptoms are ticked, before submit (LIVE_DASHBOARD=0 to disable);
+# the browser waits for a pause this long (ms) before asking the server
+LIVE_DASHBOARD = os.environ.get("LIVE_DASHBOARD", "1") != "0"
+LIVE_DASHBOARD_DEBOUNCE_MS = int(os.environ.get("LIVE_DASHBOARD_DEBOUNCE_MS", "250"))
+
+def format_emergency_response(emergencies):
+    return "\n\n".join(emergencies) + "\n\nURGENT: CALL EMERGENCY: 911"
+
+def local_match(symptoms):
+    """(matched condition id or None, ranked differential) from local symptom matching, in one pass"""
+    differential = rank_conditions_from_symptoms(symptoms, k=DIFFERENTIAL_SIZE)
+    if differential and differential[0][1] >= MATCH_THRESHOLD:
+        return differential[0][0], differential
+    return None, differential
+
+def prepare_consult(selected_symptoms, audio_filepath, image_filepath, include_dashboard=True,
+                    dashboard_format=DASHBOARD_FORMAT_PAGE):
+    """Run every stage up to the assessment and return the consult state as a dict.
+
+    Shared by the UI (process_inputs_stream) and the headless API (run_consult). When
+    ``emergencies`` is non-empty the consult stops there and nothing else is filled in.
+    Failures the consult recovers from (transcription, image, model) are listed in ``errors``.
+    ``dashboard`` is in dashboard_format (see create_enhanced_symptom_dashboard).
+    """
+    selected_symptoms = SymptomSet.coerce(selected_symptoms)
     
     # Early emergency detection for faster response
     emergencies = check_emergency_flags(selected_symptoms)
     if emergencies:
-        emergency_response = "\n\n".join(emergencies) + "\n\nURGENT: CALL EMERGENCY: 911"
-        return "EMERGENCY DETECTED - Seek immediate care", "", emergency_response, None
+        return {"symptoms": selected_symptoms, "spoken_symptoms": [], "emergencies": emergencies, "errors": [], "timings": {}}
     
     # OPTIMIZED: Pre-calculate flags
     has_audio = audio_filepath is not None
     has_image = image_filepath is not None
     
-    # OPTIMIZED: Early return for predefined solutions
-    predefined_solution_data = None
-    if selected_symptoms:
-        predefined_solution_id = detect_condition_from_symptoms(selected_symptoms)
-        if predefined_solution_id:
-            predefined_solution_data = SYMPTOM_SOLUTIONS[predefined_solution_id]
-    
-    # OPTIMIZED: Lazy loading of dashboard
-    dashboard_html = ""
-    if selected_symptoms:
-        dashboard_html = create_enhanced_symptom_dashboard(selected_symptoms, predefined_solution_id)
-    
     # OPTIMIZED: Efficient symptom text processing - no bracket removal needed
     symptom_text = ""
     if selected_symptoms:
         symptom_text = "Patient reports: " + ", ".join(selected_symptoms)
     
-    speech_to_text_output = symptom_text
-    
-    # OPTIMIZED: Audio processing with error handling
-    if audio_filepath:
+    # STAGE: Audio transcription - returns (transcript, error message)
+    def transcribe_stage():
+        if not audio_filepath:
+            return None, None
         try:
             transcribed_text = transcribe_with_groq(
                 GROQ_API_KEY=os.environ.get("GROQ_API_KEY"), 
                 audio_filepath=audio_filepath,
                 stt_model="whisper-large-v3"
             )
-            speech_to_text_output = symptom_text + ". " + transcribed_text if symptom_text else transcribed_text
+            return transcribed_text, None
         except Exception as e:
-            speech_to_text_output = f"{symptom_text}. Audio transcription failed: {str(e)}" if symptom_text else f"Audio transcription failed: {str(e)}"
-    
-    # OPTIMIZED: Pre-calculate confidence
-    confidence_score = calculate_confidence_score(selected_symptoms, has_image, has_audio)
-    
-    # OPTIMIZED: Response generation with early returns
-    if predefined_solution_data and not image_filepath:
-        doctor_response = format_professional_medical_response(predefined_solution_data, selected_symptoms, confidence_score)
-    
-    elif image_filepath:
+            return None, f"Audio transcription failed: {str(e)}"
+    
+    # STAGE: Merge symptoms spoken in the recording into the checkbox selection
+    def symptoms_stage(transcription):
+        transcript, _ = transcription
+        if not (SPOKEN_SYMPTOMS and transcript):
+            return selected_symptoms, []
+        spoken = [label for label in extract_symptoms(transcript) if label not in selected_symptoms]
+        if not spoken:
+            return selected_symptoms, []
+        print(f"Symptoms detected in speech: {', '.join(spoken)}")
+        return SymptomSet(list(selected_symptoms) + spoken), spoken
+    
+    # STAGE: Local symptom matching - ranked differential in one pass, best match on top
+    def match_stage(symptoms_result):
+        symptoms, _ = symptoms_result
+        if not symptoms:
+            return None, []
+        return local_match(symptoms)
+    
+    # STAGE: Dashboard (only needs the local match, overlaps the network calls)
+    def dashboard_stage(symptoms_result, match_result):
+        symptoms, _ = symptoms_result
+        if symptoms and include_dashboard:
+            predefined_solution_id, differential = match_result
+            return create_enhanced_symptom_dashboard(symptoms, predefined_solution_id, differential, dashboard_format)
+        return None if dashboard_format == DASHBOARD_FORMAT_MODEL else ""
+    
+    # STAGE: Image downscaling + base64 encoding (overlaps the Whisper call)
+    def encode_image_stage():
+        if not image_filepath:
+            return None, None, None
         try:
-            ai_response = analyze_image_with_query(
-                query=MEDICAL_SYSTEM_PROMPT + f"\n\nCASE: {speech_to_text_output}", 
-                encoded_image=encode_image(image_filepath), 
-                model="meta-llama/llama-4-scout-17b-16e-instruct"
-            )
-            doctor_response = f"{ai_response}\n\nCONFIDENCE: {confidence_score*100:.0f}% (Image Analysis)"
+            encoded_image, mime_type = encode_image_with_mime(image_filepath)
+            return encoded_image, mime_type, None
         except Exception as e:
-            doctor_response = f"Error analyzing image: {str(e)}"
-    
-    else:
+            return None, None, e
+    
+    # STAGE: Confidence scoring
+    def confidence_stage(symptoms_result):
+        symptoms, _ = symptoms_result
+        return calculate_confidence_score(symptoms, has_image, has_audio)
+    
+    # OPTIMIZED: Independent stages run concurrently on the shared stage pool
+    # (without audio the transcription stage returns at once, so matching isn't delayed)
+    results, timings = run_stages([
+        Stage("transcribe", transcribe_stage),
+        Stage("symptoms", symptoms_stage, deps=["transcribe"]),
+        Stage("match", match_stage, deps=["symptoms"]),
+        Stage("dashboard", dashboard_stage, deps=["symptoms", "match"]),
+        Stage("encode_image", encode_image_stage),
+        Stage("confidence", confidence_stage, deps=["symptoms"]),
+    ])
+    timings["prepare"] = timings.pop("total")
+    
+    selected_symptoms, spoken_symptoms = results["symptoms"]
+    predefined_solution_id, differential = results["match"]
+    
+    # Spoken emergencies short-circuit just like checked ones
+    emergencies = check_emergency_flags(spoken_symptoms)
+    if emergencies:
+        return {"symptoms": selected_symptoms, "spoken_symptoms": spoken_symptoms, "emergencies": emergencies,
+                "errors": [], "timings": timings}
+    
+    transcript, transcription_error = results["transcribe"]
+    errors = [transcription_error] if transcription_error else []
+    return {
+        "symptoms": selected_symptoms,
+        "spoken_symptoms": spoken_symptoms,
+        "emergencies": [],
+        "predefined_solution_id": predefined_solution_id,
+        "differential": differential,
+        # Cheapest tier that can answer: template, small/large text model, or the vision model
+        "route": route_consult(selected_symptoms, differential, has_image),
+        "speech_to_text_output": ". ".join(part for part in (symptom_text, transcript or transcription_error) if part),
+        "dashboard": results["dashboard"],
+        "confidence_score": results["confidence"],
+        "encoded_image": results["encode_image"],
+        "errors": errors,
+        "timings": timings,
+    }
+
+def iter_consult_assessment(consult, image_filepath, stream=False):
+    """Run the assessment stage for a prepared consult (timed into consult["timings"]).
+
+    Sets consult["assessment_fallback"] when the model call failed and the fallback text was used.
+    """
+    errors_before = len(consult["errors"])
+    with stage_timer("assessment", consult["timings"]):
+        yield from generate_assessment(
+            consult["predefined_solution_id"], consult["speech_to_text_output"], consult["encoded_image"],
+            consult["confidence_score"], consult["symptoms"], image_filepath, stream=stream,
+            timings=consult["timings"], differential=consult["differential"], route=consult["route"],
+            errors=consult["errors"]
+        )
+    # generate_assessment only reports errors when it fell back
+    consult["assessment_fallback"] = len(consult["errors"]) > errors_before
+
+def synthesize_consult_voice(doctor_response, timings):
+    """STAGE: Voice generation (optional) - returns the audio path or None"""
+    with stage_timer("voice", timings):
         try:
-            symptom_prompt = MEDICAL_SYSTEM_PROMPT + f"\n\nCASE: {speech_to_text_output}"
-            
-            ai_response = analyze_image_with_query(
-                query=symptom_prompt, 
-                encoded_image=None,
-                model="meta-llama/llama-4-scout-17b-16e-instruct"
-            )
-            
-            doctor_response = f"{ai_response}\n\nCONFIDENCE: {confidence_score*100:.0f}% (Symptom Analysis)"
-            
+            # Content-addressed output file - unique per text, shared only by identical assessments
+            return text_to_speech(input_text=doctor_response)
         except Exception as e:
-            # OPTIMIZED: Fallback template - NO BRACKETS
-            doctor_response = f"""MEDICAL ASSESSMENT
+            print(f"Voice generation optional: {e}")
+            return None
+
+def finish_consult_timings(consult_start, timings):
+    record_timing("total", time.perf_counter() - consult_start, timings)
+    print(f"⏱️ Consult stage timings: {format_stage_timings(timings)}")
+    print(f"📥 Queue: {format_queue_metrics(get_queue_metrics(demo))} | "
+          f"{format_pipeline_pool_stats(get_pipeline_pool_stats())}")
+
+def process_inputs_stream(audio_filepath, image_filepath, urgent_symptoms, neuro_symptoms, 
+                          cardio_symptoms, digestive_symptoms, skin_symptoms, muscle_symptoms, 
+                          common_symptoms, stream=True):
+    """Generator version of process_inputs - yields partial outputs as each stage completes"""
+    consult_start = time.perf_counter()
+    
+    # OPTIMIZED: Combine and normalize once - every downstream check reuses this SymptomSet
+    selected_symptoms = SymptomSet(combine_all_symptoms(
+        urgent_symptoms, neuro_symptoms, cardio_symptoms, digestive_symptoms,
+        skin_symptoms, muscle_symptoms, common_symptoms
+    ))
+    
+    print(f"Analyzing {len(selected_symptoms)} symptoms")
+    
+    # The UI and the API share CONSULT_CONCURRENCY consult slots
+    with consult_slot():
+        consult = prepare_consult(selected_symptoms, audio_filepath, image_filepath)
+        if consult["emergencies"]:
+            yield "EMERGENCY DETECTED - Seek immediate care", "", format_emergency_response(consult["emergencies"]), None
+            return
+
+        speech_to_text_output = consult["speech_to_text_output"]
+        dashboard_html = consult["dashboard"]
+
+        # Paint the summary and dashboard while the assessment is still being produced
+        if stream:
+            yield speech_to_text_output, dashboard_html, "", None
+
+        # STAGE: Response generation (streamed when enabled)
+        doctor_response = ""
+        for doctor_response in iter_consult_assessment(consult, image_filepath, stream=stream):
+            if stream:
+                yield speech_to_text_output, dashboard_html, doctor_response, None
+
+        voice_of_doctor = synthesize_consult_voice(doctor_response, consult["timings"])
+        finish_consult_timings(consult_start, consult["timings"])
+
+        yield speech_to_text_output, dashboard_html, doctor_response, voice_of_doctor
+
+# Labels of the assessment sections (MEDICAL_SYSTEM_PROMPT format plus the local templates)
+_ASSESSMENT_SECTION = re.compile(
+    r"^(URGENCY|CONDITION|ALSO CONSIDER|ASSESSMENT|RECOMMENDATIONS|TREATMENT|IMMEDIATE|URGENT CARE|CONFIDENCE):\s*(.*)$"
+)
+
+def parse_assessment_sections(assessment_text):
+    """Split a model assessment into its labelled sections: {"urgency": ..., "condition": ..., ...}"""
+    sections = {}
+    current = None
+    for line in (assessment_text or "").splitlines():
+        line = line.strip().replace("**", "")
+        match = _ASSESSMENT_SECTION.match(line)
+        if match:
+            current = match.group(1).lower().replace(" ", "_")
+            sections[current] = match.group(2).strip()
+        elif current and line:
+            sections[current] = (sections[current] + " " + line).strip()
+    return sections
+
+# Fields of run_consult's "assessment", whichever route answered (None when the answer lacks one)
+ASSESSMENT_FIELDS = ("urgency", "condition", "assessment", "recommendations", "urgent_care")
+
+def _recommendations(*parts):
+    return ". ".join(part.rstrip(". ") for part in parts if part) or None
+
+def structured_assessment(consult, doctor_response):
+    """Assessment fields for machine clients - straight from the catalogue for template answers.
+
+    Always the ASSESSMENT_FIELDS plus "source" ("template", "model", or "fallback" when the model
+    call failed); TREATMENT / IMMEDIATE sections become "recommendations", other headings are dropped.
+    """
+    condition_data = SYMPTOM_SOLUTIONS.get(consult["predefined_solution_id"]) if consult["predefined_solution_id"] else None
+    if consult["route"].route == ROUTE_TEMPLATE and condition_data:
+        # The catalogue has no findings or when-to-seek-care text
+        fields = {"urgency": condition_data["urgency"], "condition": condition_data["condition"],
+                  "recommendations": _recommendations(condition_data["advice"], condition_data["immediate_remedy"])}
+        source = "template"
+    else:
+        fields = parse_assessment_sections(doctor_response)
+        fields["recommendations"] = (fields.get("recommendations")
+                                     or _recommendations(fields.get("treatment"), fields.get("immediate")))
+        source = "fallback" if consult.get("assessment_fallback") else "model"
+    assessment = {field: fields.get(field) or None for field in ASSESSMENT_FIELDS}
+    assessment["source"] = source
+    return assessment
+
+def run_consult(symptoms, audio_filepath=None, image_filepath=None, include_dashboard=False, include_voice=False,
+                dashboard_format=DASHBOARD_FORMAT_HTML):
+    """Headless consult for the JSON API and batch jobs - same pipeline as the UI, structured result.
+
+    The dashboard and the voice file are only produced when asked for; the dashboard comes as
+    "dashboard_html" or, with dashboard_format=DASHBOARD_FORMAT_MODEL, as the compact "dashboard_model"
+    (resolve_dashboard_model: self-contained, without the page's DASHBOARD_TABLES).
+    """
+    consult_start = time.perf_counter()
+    consult = prepare_consult(SymptomSet(symptoms or ()), audio_filepath, image_filepath, include_dashboard,
+                              dashboard_format)
+    result = {
+        "symptoms": list(consult["symptoms"]),
+        "spoken_symptoms": consult["spoken_symptoms"],
+        "emergency": bool(consult["emergencies"]),
+        "emergency_flags": consult["emergencies"],
+        "errors": consult["errors"],
+    }
+    if consult["emergencies"]:
+        # Same keys as a full consult; the emergency response stops before matching and routing
+        result.update({
+            "summary": None,
+            "matched_condition": None,
+            "differential": [],
+            "route": None,
+            "model": None,
+            "confidence": None,
+            "assessment": dict(dict.fromkeys(ASSESSMENT_FIELDS), source="emergency"),
+            "assessment_text": format_emergency_response(consult["emergencies"]),
+        })
+        if include_dashboard:
+            result["dashboard_model" if dashboard_format == DASHBOARD_FORMAT_MODEL else "dashboard_html"] = None
+        if include_voice:
+            result["audio_path"] = None
+        finish_consult_timings(consult_start, consult["timings"])
+        result["timings_ms"] = {name: round(seconds * 1000, 1) for name, seconds in consult["timings"].items()}
+        return result
+    
+    doctor_response = ""
+    for doctor_response in iter_consult_assessment(consult, image_filepath):
+        pass
+    
+    result.update({
+        "summary": consult["speech_to_text_output"],
+        "matched_condition": consult["predefined_solution_id"],
+        "differential": [
+            {"condition_id": condition_id, "condition": SYMPTOM_SOLUTIONS[condition_id]["condition"], "score": score}
+            for condition_id, score in consult["differential"]
+        ],
+        "route": consult["route"].route,
+        "model": consult["route"].model,
+        "confidence": round(consult["confidence_score"], 3),
+        "assessment": structured_assessment(consult, doctor_response),
+        "assessment_text": doctor_response,
+    })
+    if include_dashboard and dashboard_format == DASHBOARD_FORMAT_MODEL:
+        result["dashboard_model"] = (resolve_dashboard_model(json.loads(consult["dashboard"]))
+                                     if consult["dashboard"] else None)
+    elif include_dashboard:
+        result["dashboard_html"] = standalone_dashboard_html(consult["dashboard"])
+    if include_voice:
+        result["audio_path"] = synthesize_consult_voice(doctor_response, consult["timings"])
+    
+    finish_consult_timings(consult_start, consult["timings"])
+    result["timings_ms"] = {name: round(seconds * 1000, 1) for name, seconds in consult["timings"].items()}
+    return result
+
+def generate_assessment(predefined_solution_id, speech_to_text_output, encoded_result, confidence_score,
+                        selected_symptoms, image_filepath, stream=False, timings=None, differential=None, route=None,
+                        errors=None):
+    """Yield the doctor's assessment - cumulative text when streaming, a single final text otherwise.
+
+    A failed model call still yields a fallback text; the failure is appended to ``errors`` when given.
+    """
+    predefined_solution_data = SYMPTOM_SOLUTIONS[predefined_solution_id] if predefined_solution_id else None
+    if route is None:
+        route = route_consult(selected_symptoms, differential or [], image_filepath is not None)
+    
+    # OPTIMIZED: Confident local matches are answered from the template, no model call
+    if route.route == ROUTE_TEMPLATE and predefined_solution_data:
+        yield format_professional_medical_response(predefined_solution_data, selected_symptoms, confidence_score, differential)
+        return
+    
+    case = f"CASE: {speech_to_text_output}"
+    model = route.model
+    label = "Image Analysis" if image_filepath else "Symptom Analysis"
+    
+    try:
+        if image_filepath:
+            encoded_image, mime_type, encode_error = encoded_result
+            if encode_error is not None:
+                raise encode_error
+            query = MEDICAL_SYSTEM_PROMPT + "\n\n" + case
+            request = dict(query=query, encoded_image=encoded_image, mime_type=mime_type, model=model)
+            complete, stream_completion = analyze_image_with_query, stream_image_analysis
+        else:
+            # Text-only: system prompt + case as separate messages, no image payload
+            request = dict(query=case, system_prompt=MEDICAL_SYSTEM_PROMPT, model=model)
+            complete, stream_completion = analyze_text_with_query, stream_text_analysis
+        
+        if stream:
+            ai_response = ""
+            request_start = time.perf_counter()
+            for delta in stream_completion(**request):
+                if not ai_response and timings is not None:
+                    record_timing("first_token", time.perf_counter() - request_start, timings)
+                ai_response += delta
+                yield ai_response
+        else:
+            ai_response = complete(**request)
+        
+        yield f"{ai_response}\n\nCONFIDENCE: {confidence_score*100:.0f}% ({label})"
+    
+    except Exception as e:
+        if errors is not None:
+            errors.append(f"Assessment failed: {str(e)}")
+        if image_filepath:
+            yield f"Error analyzing image: {str(e)}"
+            return
+        
+        # OPTIMIZED: Fallback template - NO BRACKETS
+        yield f"""MEDICAL ASSESSMENT
 
 Based on: {speech_to_text_output}
 
@@ -950,17 +1266,50 @@ IMMEDIATE: OTC pain relief if needed, avoid triggers
 
 CONFIDENCE: {confidence_score*100:.0f}% - General assessment"""
 
-    # OPTIMIZED: Async voice generation (non-blocking)
-    voice_of_doctor = None
-    try:
-        voice_of_doctor = text_to_speech_with_gtts(
-            input_text=doctor_response, 
-            output_filepath="final.mp3"
-        )
-    except Exception as e:
-        print(f"Voice generation optional: {e}")
+def process_inputs(audio_filepath, image_filepath, urgent_symptoms, neuro_symptoms, 
+                  cardio_symptoms, digestive_symptoms, skin_symptoms, muscle_symptoms, 
+                  common_symptoms):
+    """Blocking version - runs the full consult and returns only the final outputs"""
+    outputs = None
+    for outputs in process_inputs_stream(audio_filepath, image_filepath, urgent_symptoms, neuro_symptoms,
+                                         cardio_symptoms, digestive_symptoms, skin_symptoms, muscle_symptoms,
+                                         common_symptoms, stream=False):
+        pass
+    return outputs
 
-    return speech_to_text_output, dashboard_html, doctor_response, voice_of_doctor
+def preview_consult(urgent_symptoms, neuro_symptoms, cardio_symptoms, digestive_symptoms,
+                    skin_symptoms, muscle_symptoms, common_symptoms):
+    """Live update on checkbox changes - only the local stages (emergency flags, local match, dashboard).
+
+    Returns (summary, dashboard, assessment). The assessment box is cleared, since it belonged to
+    the previous selection, unless the selection is an emergency. Models run only on submit.
+    """
+    start = time.perf_counter()
+    selected_symptoms = SymptomSet(combine_all_symptoms(
+        urgent_symptoms, neuro_symptoms, cardio_symptoms, digestive_symptoms,
+        skin_symptoms, muscle_symptoms, common_symptoms
+    ))
+    emergencies = check_emergency_flags(selected_symptoms)
+    if emergencies:
+        outputs = "EMERGENCY DETECTED - Seek immediate care", "", format_emergency_response(emergencies)
+    elif not selected_symptoms:
+        outputs = "", "", ""
+    else:
+        predefined_solution_id, differential = local_match(selected_symptoms)
+        outputs = ("Patient reports: " + ", ".join(selected_symptoms),
+                   create_enhanced_symptom_dashboard(selected_symptoms, predefined_solution_id, differential,
+                                                     DASHBOARD_FORMAT_PAGE),
+                   "")
+    record_timing("live_preview", time.perf_counter() - start)
+    return outputs
+
+def live_dashboard_js(input_count):
+    """Client-side debounce for preview_consult: each change restarts the timer and only the last
+    call in a burst goes to the server (earlier calls never resolve, so Gradio drops them)"""
+    return f"""(...values) => new Promise((resolve) => {{
+        clearTimeout(window.liveDashboardTimer);
+        window.liveDashboardTimer = setTimeout(() => resolve(values.slice(0, {input_count})), {LIVE_DASHBOARD_DEBOUNCE_MS});
+    }})"""
 
 # USE VISIBLE ANIMATIONS
 COMBINED_CSS = ENHANCED_PROFESSIONAL_CSS + VISIBLE_ANIMATION_CSS
@@ -969,7 +1318,8 @@ COMBINED_CSS = ENHANCED_PROFESSIONAL_CSS + VISIBLE_ANIMATION_CSS
 with gr.Blocks(
     theme=gr.themes.Soft(primary_hue="blue", secondary_hue="slate"),
     title="AI DOCTOR 2.0 - Advanced Medical Analysis", 
-    css=COMBINED_CSS
+    css=COMBINED_CSS,
+    head=DASHBOARD_JS
 ) as demo:
     
     # Store current analysis data for export
@@ -1173,7 +1523,8 @@ with gr.Blocks(
                         )
                         
                         dashboard_output = gr.HTML(
-                            label="📈 MEDICAL ANALYSIS DASHBOARD"
+                            label="📈 MEDICAL ANALYSIS DASHBOARD",
+                            elem_id=DASHBOARD_ELEMENT_ID
                         )
                         
                         doctor_response = gr.Textbox(
@@ -1202,24 +1553,43 @@ with gr.Blocks(
     
     # Analysis submission
     submit_btn.click(
-        fn=process_inputs,
+        fn=process_inputs_stream if STREAM_RESPONSES else process_inputs,
         inputs=[audio_input, image_input, urgent_symptoms, neuro_symptoms, 
                 cardio_symptoms, digestive_symptoms, skin_symptoms, muscle_symptoms,
                 common_symptoms],
-        outputs=[speech_text, dashboard_output, doctor_response, audio_output]
+        outputs=[speech_text, dashboard_output, doctor_response, audio_output],
+        **event_options(CONSULT_CONCURRENCY_ID)
     ).then(
         fn=lambda st, dh, dr: (st, dh, dr),
         inputs=[speech_text, dashboard_output, doctor_response],
-        outputs=[current_symptoms_text, current_dashboard_html, current_medical_assessment]
+        outputs=[current_symptoms_text, current_dashboard_html, current_medical_assessment],
+        queue=False
     )
     
+    # Live preview while symptoms are ticked: local work only, debounced in the browser, and
+    # "always_last" so a burst of changes ends with one update for the final selection
+    if LIVE_DASHBOARD:
+        symptom_groups = [urgent_symptoms, neuro_symptoms, cardio_symptoms, digestive_symptoms,
+                          skin_symptoms, muscle_symptoms, common_symptoms]
+        gr.on(
+            triggers=[group.change for group in symptom_groups],
+            fn=preview_consult,
+            inputs=symptom_groups,
+            outputs=[speech_text, dashboard_output, doctor_response],
+            js=live_dashboard_js(len(symptom_groups)),
+            trigger_mode="always_last",
+            show_progress="hidden",
+            queue=False
+        )
+    
     # Clear all
     clear_btn.click(
         fn=lambda: [None, None, [], [], [], [], [], [], [], "", "", "", gr.update(visible=False), gr.update(visible=False)],
         inputs=[],
         outputs=[audio_input, image_input, urgent_symptoms, neuro_symptoms, 
                 cardio_symptoms, digestive_symptoms, skin_symptoms, muscle_symptoms,
-                common_symptoms, current_symptoms_text, current_dashboard_html, current_medical_assessment, report_output, export_success_message]
+                common_symptoms, current_symptoms_text, current_dashboard_html, current_medical_assessment, report_output, export_success_message],
+        queue=False
     )
     
     # Show export section
@@ -1229,7 +1599,8 @@ with gr.Blocks(
     export_btn.click(
         fn=show_export_section,
         inputs=[],
-        outputs=[export_section]
+        outputs=[export_section],
+        queue=False
     )
     
     # Hide export section
@@ -1239,7 +1610,8 @@ with gr.Blocks(
     cancel_export_btn.click(
         fn=hide_export_section,
         inputs=[],
-        outputs=[export_section]
+        outputs=[export_section],
+        queue=False
     )
     
     # Generate report
@@ -1302,13 +1674,27 @@ with gr.Blocks(
     generate_report_btn.click(
         fn=generate_report,
         inputs=[patient_name_input, report_format, current_medical_assessment, current_symptoms_text],
-        outputs=[report_output, report_output, export_success_message, export_success_message]
+        outputs=[report_output, report_output, export_success_message, export_success_message],
+        **event_options(REPORT_CONCURRENCY_ID)
     )
 
-if __name__ == "__main__":
+# Bounded request queue; consults and report exports have separate concurrency limits,
+# and instant UI toggles above skip the queue entirely
+configure_queue(demo)
+
+# Headless JSON API (POST /api/v1/consult) served next to the UI - set SERVE_API=0 for the UI alone
+SERVE_API = os.environ.get("SERVE_API", "1") != "0"
+
+if __name__ == "__main__" and SERVE_API:
+    import uvicorn
+    from api import create_app
+    uvicorn.run(create_app(demo, run_consult, allowed_paths=[TTS_CACHE_DIR]), host="127.0.0.1", port=7861)
+elif __name__ == "__main__":
     demo.launch(
         server_name="127.0.0.1",
         server_port=7861, 
         share=False,
-        debug=False
+        debug=False,
+        allowed_paths=[TTS_CACHE_DIR],
+        **launch_options()
     )
@@ -0,0 +1,65 @@
+# groq_client.py - SHARED, POOLED GROQ CLIENT FOR VISION AND SPEECH-TO-TEXT CALLS
+
+import os
+import atexit
+import threading
+
+import httpx
+from groq import Groq
+
+# Connection pool settings (all optional environment overrides)
+GROQ_POOL_SIZE = int(os.environ.get("GROQ_POOL_SIZE", "20"))
+GROQ_KEEPALIVE_CONNECTIONS = int(os.environ.get("GROQ_KEEPALIVE_CONNECTIONS", str(GROQ_POOL_SIZE)))
+GROQ_KEEPALIVE_EXPIRY = float(os.environ.get("GROQ_KEEPALIVE_EXPIRY", "60"))
+GROQ_CONNECT_TIMEOUT = float(os.environ.get("GROQ_CONNECT_TIMEOUT", "5"))
+GROQ_MAX_RETRIES = int(os.environ.get("GROQ_MAX_RETRIES", "2"))
+
+# Per-call read timeouts (seconds)
+GROQ_VISION_TIMEOUT = float(os.environ.get("GROQ_VISION_TIMEOUT", "60"))
+GROQ_STT_TIMEOUT = float(os.environ.get("GROQ_STT_TIMEOUT", "30"))
+GROQ_TEXT_TIMEOUT = float(os.environ.get("GROQ_TEXT_TIMEOUT", "30"))
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _build_client(api_key):
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=GROQ_POOL_SIZE,
+            max_keepalive_connections=GROQ_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(GROQ_VISION_TIMEOUT, connect=GROQ_CONNECT_TIMEOUT),
+    )
+    return Groq(api_key=api_key, http_client=http_client, max_retries=GROQ_MAX_RETRIES)
+
+
+def get_groq_client(api_key=None):
+    """Return the process-wide Groq client for this API key, creating it on first use.
+
+    Clients are thread-safe and keep their HTTP connections alive, so every
+    consult after the first one skips the TCP/TLS handshake.
+    """
+    api_key = api_key or os.environ.get("GROQ_API_KEY")
+    client = _clients.get(api_key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _build_client(api_key)
+            _clients[api_key] = client
+    return client
+
+
+def close_groq_clients():
+    """Close every pooled client and drop its connections"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+atexit.register(close_groq_clients)
@@ -0,0 +1,163 @@
+# keyword_matcher.py - AHO-CORASICK MATCHING FOR THE SUBSTRING-BASED SYMPTOM RULES
+
+from collections import deque
+from functools import lru_cache
+
+# Every keyword list used by the confidence, emergency, severity, insight and body-system rules.
+# A rule "keyword in text" holds exactly when the keyword is in match_keywords(text)[category].
+KEYWORD_TABLES = {
+    # medical_analysis.calculate_emergency_score + dashboard risk card
+    "emergency_critical": ["chest pain", "difficulty breathing", "severe bleeding",
+                           "sudden weakness", "suicidal thoughts", "seizure",
+                           "severe head injury", "paralysis/numbness"],
+    "emergency_moderate": ["fever", "high pain", "head injury", "vision problems",
+                           "heart palpitations", "shortness of breath", "fainting"],
+
+    # medical_analysis.calculate_confidence_score
+    "confidence_specific": ["chest pain", "difficulty breathing", "loss of smell", "visual disturbances"],
+    "confidence_pattern_flu": ["fever", "cough", "fatigue", "body aches"],
+    "confidence_pattern_migraine": ["headache", "nausea", "vision problems", "sensitivity to light"],
+    "confidence_pattern_joint": ["joint pain", "muscle pain", "fatigue"],
+    "confidence_pattern_gastric": ["nausea", "appetite loss", "fatigue", "stomach pain"],
+    "confidence_pattern_anxiety": ["anxiety", "headache", "dizziness", "rapid heartbeat"],
+    "confidence_pattern_vertigo": ["dizziness", "headache", "nausea", "balance problems"],
+    "confidence_pattern_cardiac": ["chest pain", "shortness of breath", "palpitations"],
+    "confidence_pattern_skin": ["skin rash", "itching", "redness", "swelling"],
+
+    # dashboard per-symptom severity
+    "severity_critical": ["chest pain", "difficulty breathing", "severe bleeding",
+                          "sudden weakness", "suicidal thoughts", "seizure",
+                          "severe head injury", "paralysis", "numbness"],
+    "severity_moderate": ["fever", "high pain", "head injury", "vision problems",
+                          "heart palpitations", "shortness of breath", "fainting",
+                          "vomiting", "severe headache", "burning sensation"],
+    "severity_mild": ["cough", "runny nose", "sneezing", "mild headache", "fatigue",
+                      "allergies", "itching", "dry skin", "congestion"],
+
+    # dashboard AI insights
+    "insight_respiratory": ["cough", "cold", "runny nose", "congestion", "sneezing", "sore throat"],
+    "insight_fever": ["fever"],
+    "insight_systemic": ["body aches", "fatigue", "chills"],
+    "insight_headache": ["headache", "migraine", "sensitivity to light"],
+    "insight_digestive": ["nausea", "vomiting", "diarrhea", "stomach pain"],
+
+    # dashboard body-system impact (checked in this order, first match wins)
+    "system_neurological": ["headache", "dizziness", "confusion", "memory", "anxiety", "depression", "vision", "hearing"],
+    "system_cardiovascular": ["chest", "heart", "breathing", "palpitations", "blood pressure", "irregular heartbeat"],
+    "system_digestive": ["nausea", "vomiting", "diarrhea", "constipation", "stomach", "appetite", "bloating"],
+    "system_skin": ["rash", "itching", "redness", "swelling", "acne", "dry skin", "hair loss"],
+    "system_musculoskeletal": ["muscle", "joint", "back", "neck", "stiffness", "swelling", "movement"],
+}
+
+CONFIDENCE_PATTERNS = tuple(category for category in KEYWORD_TABLES if category.startswith("confidence_pattern_"))
+
+_NO_MATCHES = frozenset()
+
+
+class KeywordMatches(dict):
+    """category -> frozenset of matched keywords; categories without a match read as empty"""
+
+    def __missing__(self, category):
+        return _NO_MATCHES
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over every keyword of every category.
+
+    One pass over the text finds all keyword occurrences (overlapping ones included),
+    so the cost is linear in the text length instead of keywords x text.
+    """
+
+    def __init__(self, tables):
+        self.tables = {category: tuple(keywords) for category, keywords in tables.items()}
+        keyword_categories = {}
+        for category, keywords in self.tables.items():
+            for keyword in keywords:
+                if not keyword:
+                    raise ValueError(f"Empty keyword in category {category!r}")
+                keyword_categories.setdefault(keyword, []).append(category)
+        self._keyword_categories = {keyword: tuple(categories) for keyword, categories in keyword_categories.items()}
+
+        # Trie: per-node transitions, failure link and the keywords that end at the node
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for keyword in self._keyword_categories:
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                node = next_node
+            self._output[node] += (keyword,)
+
+        # Breadth-first failure links; each node also inherits the outputs of its failure node
+        breadth_first = []
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            breadth_first.append(node)
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+        # Resolve failure links into full transition tables (a DFA), so the scan loop is one
+        # dict lookup per character; a missing entry means "back to the root"
+        self._delta = [dict(transitions) for transitions in self._goto]
+        for node in breadth_first:
+            for char, target in self._delta[self._fail[node]].items():
+                self._delta[node].setdefault(char, target)
+
+    def find_keywords(self, text):
+        """Set of distinct keywords that occur in text"""
+        delta, output = self._delta, self._output
+        found = set()
+        node = 0
+        for char in text:
+            node = delta[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+    def iter_matches(self, text):
+        """Yield (start, end, keyword) for every keyword occurrence, in order of the end position"""
+        delta, output = self._delta, self._output
+        node = 0
+        for index, char in enumerate(text):
+            node = delta[node].get(char, 0)
+            for keyword in output[node]:
+                yield index + 1 - len(keyword), index + 1, keyword
+
+    def categories_of(self, keyword):
+        return self._keyword_categories.get(keyword, ())
+
+    def match(self, text):
+        """KeywordMatches for text - every matched keyword grouped by category"""
+        grouped = {}
+        for keyword in self.find_keywords(text):
+            for category in self._keyword_categories[keyword]:
+                grouped.setdefault(category, set()).add(keyword)
+        return KeywordMatches((category, frozenset(keywords)) for category, keywords in grouped.items())
+
+
+# Compiled once at import
+KEYWORD_AUTOMATON = KeywordAutomaton(KEYWORD_TABLES)
+
+
+def match_keywords(text):
+    """Match every keyword table against text (canonical, lowercase) in a single pass"""
+    return KEYWORD_AUTOMATON.match(text)
+
+
+@lru_cache(maxsize=1024)
+def match_symptom_keywords(canonical_symptom):
+    """match_keywords for a single canonical symptom name, memoized (the label vocabulary is small)"""
+    return KEYWORD_AUTOMATON.match(canonical_symptom)
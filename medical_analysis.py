@@ -1,39 +1,23 @@
 # medical_analysis.py - FIXED VERSION
 
+from symptom_set import SymptomSet
+from keyword_matcher import CONFIDENCE_PATTERNS
+
 def calculate_confidence_score(selected_symptoms, has_image, has_audio, image_quality="unknown"):
-    """Calculate confidence level for the diagnosis"""
+    """Calculate confidence level for the diagnosis (selected_symptoms: SymptomSet or list of labels)"""
     score = 0.5
     
-    # FIX: Initialize clean_symptoms at the start
-    clean_symptoms = []
+    # Normalized once - a SymptomSet from the caller is reused as is
+    symptoms = SymptomSet.coerce(selected_symptoms)
     
-    if selected_symptoms:
-        score += min(len(selected_symptoms) * 0.1, 0.3)
-        
-        # Enhanced symptom pattern recognition
-        specific_combinations = [
-            ["fever", "cough", "fatigue", "body aches"],
-            ["headache", "nausea", "vision problems", "sensitivity to light"],
-            ["joint pain", "muscle pain", "fatigue"],
-            ["nausea", "appetite loss", "fatigue", "stomach pain"],
-            ["anxiety", "headache", "dizziness", "rapid heartbeat"],
-            ["dizziness", "headache", "nausea", "balance problems"],
-            ["chest pain", "shortness of breath", "palpitations"],
-            ["skin rash", "itching", "redness", "swelling"]
-        ]
+    if symptoms:
+        score += min(len(symptoms) * 0.1, 0.3)
         
-        # FIX: Properly define clean_symptoms
-        for s in selected_symptoms:
-            if ' ' in s and any(s.startswith(emoji) for emoji in ["🔴", "🟡", "🟢"]):
-                clean_symptoms.append(s.split(' ', 1)[1].lower())
-            else:
-                clean_symptoms.append(s.lower())
-        
-        # Better pattern matching
+        # Enhanced symptom pattern recognition - all pattern tables matched in one pass
+        matches = symptoms.keyword_matches
         matched_patterns = 0
-        for combo in specific_combinations:
-            matched_symptoms = sum(1 for symptom in combo if symptom in " ".join(clean_symptoms))
-            if matched_symptoms >= 2:
+        for pattern in CONFIDENCE_PATTERNS:
+            if len(matches[pattern]) >= 2:
                 matched_patterns += 1
                 score += 0.15
         
@@ -51,10 +35,9 @@ def calculate_confidence_score(selected_symptoms, has_image, has_audio, image_qu
     if has_audio:
         score += 0.15
     
-    # FIX: Only check specific symptoms if clean_symptoms has content
-    if clean_symptoms:  # Added this check
-        specific_symptoms = ["chest pain", "difficulty breathing", "loss of smell", "visual disturbances"]
-        if any(symptom in " ".join(clean_symptoms) for symptom in specific_symptoms):
+    # FIX: Only check specific symptoms if there are symptoms
+    if symptoms:
+        if symptoms.keyword_matches["confidence_specific"]:
             score += 0.1
     
     # Ensure we return a float, not None
@@ -83,24 +66,10 @@ def add_confidence_disclaimer(analysis, confidence_score, selected_symptoms):
 # Emergency scoring function
 def calculate_emergency_score(selected_symptoms):
     """Calculate emergency level for immediate triage"""
-    critical_symptoms = ["chest pain", "difficulty breathing", "severe bleeding", 
-                        "sudden weakness", "suicidal thoughts", "seizure", 
-                        "severe head injury", "paralysis/numbness"]
-    
-    moderate_symptoms = ["fever", "high pain", "head injury", "vision problems", 
-                        "heart palpitations", "shortness of breath", "fainting"]
-    
-    clean_symptoms = []
-    for s in selected_symptoms:
-        if ' ' in s and any(s.startswith(emoji) for emoji in ["🔴", "🟡", "🟢"]):
-            clean_symptoms.append(s.split(' ', 1)[1].lower())
-        else:
-            clean_symptoms.append(s.lower())
-    
-    symptom_text = " ".join(clean_symptoms)
+    matches = SymptomSet.coerce(selected_symptoms).keyword_matches
     
-    critical_count = sum(1 for symptom in critical_symptoms if symptom in symptom_text)
-    moderate_count = sum(1 for symptom in moderate_symptoms if symptom in symptom_text)
+    critical_count = len(matches["emergency_critical"])
+    moderate_count = len(matches["emergency_moderate"])
     
     if critical_count > 0:
         return "HIGH"
@@ -0,0 +1,200 @@
+# pipeline.py - CONCURRENT STAGE EXECUTION FOR THE CONSULT PIPELINE
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from serving import CONSULT_CONCURRENCY
+
+# Stages of one consult that can run at the same time (transcribe + encode_image, then
+# match + confidence). A stage holds its thread for the whole call, Whisper included.
+STAGES_PER_CONSULT = 2
+
+# Shared worker pool - stages are mostly network/IO bound (Groq, gTTS, file reads). Sized so
+# every consult allowed by CONSULT_CONCURRENCY (UI and API together) gets its threads; when set
+# lower, stages wait for a thread and get_pipeline_pool_stats() shows it.
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", "0")) or STAGES_PER_CONSULT * CONSULT_CONCURRENCY
+_EXECUTOR = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="consult-stage")
+
+# Pool occupancy: stages running / waiting for a thread, and how long the waits took
+_POOL_STATS = {"workers": PIPELINE_WORKERS, "busy": 0, "queued": 0, "max_busy": 0, "max_queued": 0,
+               "stages": 0, "waited": 0, "wait_total": 0.0, "wait_max": 0.0}
+_POOL_STATS_LOCK = threading.Lock()
+
+# Rolling per-stage timing statistics across all consults
+_STAGE_STATS = {}
+_STAGE_STATS_LOCK = threading.Lock()
+
+
+def size_pipeline_pool(consults):
+    """Grow the default pool to STAGES_PER_CONSULT threads for each of `consults` concurrent
+    consults (e.g. a batch run with more workers than CONSULT_CONCURRENCY). An explicit
+    PIPELINE_WORKERS is left alone. Call before the consults start."""
+    global _EXECUTOR
+    workers = STAGES_PER_CONSULT * consults
+    if os.environ.get("PIPELINE_WORKERS") or workers <= _POOL_STATS["workers"]:
+        return
+    _EXECUTOR.shutdown(wait=False)
+    _EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="consult-stage")
+    with _POOL_STATS_LOCK:
+        _POOL_STATS["workers"] = workers
+
+
+class Stage:
+    """A named unit of work that runs once all of its dependencies have finished.
+
+    The stage function is called with the results of its dependencies, in the
+    order they are listed in ``deps``.
+    """
+
+    def __init__(self, name, fn, deps=()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+def _record_timing(name, elapsed):
+    with _STAGE_STATS_LOCK:
+        stats = _STAGE_STATS.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+        stats["count"] += 1
+        stats["total"] += elapsed
+        stats["last"] = elapsed
+        stats["max"] = max(stats["max"], elapsed)
+
+
+def run_stages(stages, executor=None):
+    """Run a stage graph, starting every stage as soon as its dependencies are done.
+
+    Returns ``(results, timings)`` where both are dicts keyed by stage name and
+    ``timings`` holds wall-clock seconds per stage plus a ``"total"`` entry.
+    The first exception raised by a stage is re-raised once running stages finish.
+    """
+    executor = executor or _EXECUTOR
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {', '.join(missing)}")
+
+    results = {}
+    timings = {}
+    pending = dict(by_name)
+    running = {}
+    start = time.perf_counter()
+
+    def submit_ready():
+        for name, stage in list(pending.items()):
+            if all(dep in results for dep in stage.deps):
+                args = [results[dep] for dep in stage.deps]
+                running[executor.submit(_run_and_time, stage, args, _stage_queued())] = name
+                del pending[name]
+
+    submit_ready()
+    if pending and not running:
+        raise ValueError("Stage graph has a dependency cycle")
+
+    error = None
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            try:
+                results[name], timings[name] = future.result()
+            except Exception as e:
+                if error is None:
+                    error = e
+        if error is None:
+            submit_ready()
+            if pending and not running:
+                raise ValueError("Stage graph has a dependency cycle")
+
+    if error is not None:
+        raise error
+
+    timings["total"] = time.perf_counter() - start
+    return results, timings
+
+
+def _stage_queued():
+    with _POOL_STATS_LOCK:
+        _POOL_STATS["queued"] += 1
+        _POOL_STATS["max_queued"] = max(_POOL_STATS["max_queued"], _POOL_STATS["queued"])
+    return time.perf_counter()
+
+
+def _run_and_time(stage, args, queued_at):
+    start = time.perf_counter()
+    waited = start - queued_at
+    with _POOL_STATS_LOCK:
+        _POOL_STATS["queued"] -= 1
+        _POOL_STATS["busy"] += 1
+        _POOL_STATS["max_busy"] = max(_POOL_STATS["max_busy"], _POOL_STATS["busy"])
+        _POOL_STATS["stages"] += 1
+        # A stage that sat in the queue for more than a scheduling blip waited for a free thread
+        if waited > 0.005:
+            _POOL_STATS["waited"] += 1
+        _POOL_STATS["wait_total"] += waited
+        _POOL_STATS["wait_max"] = max(_POOL_STATS["wait_max"], waited)
+    try:
+        return stage.fn(*args), time.perf_counter() - start
+    finally:
+        _record_timing(stage.name, time.perf_counter() - start)
+        with _POOL_STATS_LOCK:
+            _POOL_STATS["busy"] -= 1
+
+
+@contextmanager
+def stage_timer(name, timings):
+    """Time a stage that runs outside run_stages (e.g. a streamed LLM call)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings[name] = elapsed
+        _record_timing(name, elapsed)
+
+
+def record_timing(name, elapsed, timings=None):
+    """Record a one-off measurement such as time-to-first-token"""
+    if timings is not None:
+        timings[name] = elapsed
+    _record_timing(name, elapsed)
+
+
+def get_stage_timings():
+    """Snapshot of per-stage timing statistics (count, total, mean, max, last in seconds)"""
+    with _STAGE_STATS_LOCK:
+        return {
+            name: dict(stats, mean=stats["total"] / stats["count"] if stats["count"] else 0.0)
+            for name, stats in _STAGE_STATS.items()
+        }
+
+
+def get_pipeline_pool_stats():
+    """Stage pool occupancy: threads, busy/queued now and at peak, and stages that waited for a thread.
+
+    "saturated" is true while stages are queued - the pool, not the consult limit, is then the bottleneck.
+    """
+    with _POOL_STATS_LOCK:
+        stats = dict(_POOL_STATS)
+    stats["saturated"] = stats["queued"] > 0
+    stats["wait_mean"] = stats["wait_total"] / stats["stages"] if stats["stages"] else 0.0
+    return stats
+
+
+def format_pipeline_pool_stats(stats):
+    return (f"stage pool {stats['busy']}/{stats['workers']} busy, {stats['queued']} waiting "
+            f"(peak {stats['max_busy']} busy; {stats['waited']}/{stats['stages']} stages waited, "
+            f"max {stats['wait_max'] * 1000:.0f}ms)")
+
+
+def format_stage_timings(timings):
+    """One-line, human readable summary of a single run's timings"""
+    ordered = sorted((name for name in timings if name != "total"), key=lambda n: -timings[n])
+    parts = [f"{name}={timings[name] * 1000:.0f}ms" for name in ordered]
+    if "total" in timings:
+        parts.append(f"total={timings['total'] * 1000:.0f}ms")
+    return " | ".join(parts)
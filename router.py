@@ -0,0 +1,113 @@
+# router.py - TIERED RESPONSE ROUTING: TEMPLATE -> SMALL TEXT MODEL -> LARGE TEXT MODEL / VISION MODEL
+
+import os
+import threading
+from collections import Counter, namedtuple
+
+from symptom_database import SYMPTOM_SOLUTIONS, MATCH_THRESHOLD, rank_conditions_from_symptoms
+from symptom_set import SymptomSet
+from brain_of_the_doctor import GROQ_TEXT_MODEL
+
+# Cost/quality knob: "economy" answers more cases from small models, "quality" escalates sooner.
+# "economy" and "balanced" template every local match, like routing did before confidence was
+# scored; only "quality" sends weak matches to a model. Exact ties between the top two
+# conditions are never templated. Individual thresholds can still be overridden below.
+ROUTER_PRESETS = {
+    #             (template threshold, small text model threshold)
+    "economy":  (0.0, 0.0),
+    "balanced": (0.0, 0.20),
+    "quality":  (0.65, 0.35),
+}
+ROUTER_MODE = os.environ.get("ROUTER_MODE", "balanced").lower()
+if ROUTER_MODE not in ROUTER_PRESETS:
+    raise ValueError(f"Unknown ROUTER_MODE: {ROUTER_MODE} (expected one of {', '.join(ROUTER_PRESETS)})")
+
+ROUTER_TEMPLATE_THRESHOLD = float(os.environ.get("ROUTER_TEMPLATE_THRESHOLD", ROUTER_PRESETS[ROUTER_MODE][0]))
+ROUTER_TEXT_THRESHOLD = float(os.environ.get("ROUTER_TEXT_THRESHOLD", ROUTER_PRESETS[ROUTER_MODE][1]))
+
+VISION_MODEL = os.environ.get("GROQ_VISION_MODEL", "meta-llama/llama-4-scout-17b-16e-instruct")
+SMALL_TEXT_MODEL = os.environ.get("ROUTER_SMALL_TEXT_MODEL", GROQ_TEXT_MODEL)
+LARGE_TEXT_MODEL = os.environ.get("ROUTER_LARGE_TEXT_MODEL", "llama-3.3-70b-versatile")
+
+# Routes, cheapest first
+ROUTE_TEMPLATE = "template"
+ROUTE_SMALL_TEXT = "small_text"
+ROUTE_LARGE_TEXT = "large_text"
+ROUTE_VISION = "vision"
+
+RouteDecision = namedtuple("RouteDecision", ["route", "model", "confidence", "reason"])
+
+# Score at which the match strength term saturates
+_STRONG_SCORE = 2 * MATCH_THRESHOLD
+
+_CONDITION_SYMPTOMS = {condition_id: frozenset(symptom.lower() for symptom in data["symptoms"])
+                       for condition_id, data in SYMPTOM_SOLUTIONS.items()}
+
+_route_counts = Counter()
+_route_lock = threading.Lock()
+
+
+def _top_two(symptoms, differential):
+    """The two best-ranked conditions, ranked again when the differential is shorter than that"""
+    return differential if len(differential) >= 2 else rank_conditions_from_symptoms(symptoms, k=2)
+
+
+def _is_tie(differential):
+    return len(differential) > 1 and differential[1][1] >= differential[0][1]
+
+
+def local_match_confidence(symptoms, differential):
+    """How much to trust the local top match, 0..1.
+
+    Combines the match strength (top score vs. the threshold), the margin over the
+    runner-up and how much of the condition's symptom list the patient actually has.
+    The runner-up comes from a top-2 ranking of its own when the differential is shorter
+    (DIFFERENTIAL_SIZE=1), so the confidence doesn't depend on how many rows the UI shows.
+    """
+    differential = _top_two(symptoms, differential)
+    if not differential:
+        return 0.0
+    top_id, top_score = differential[0]
+    if top_score <= 0:
+        return 0.0
+    runner_up = differential[1][1] if len(differential) > 1 else 0.0
+    strength = min(1.0, top_score / _STRONG_SCORE)
+    margin = 1.0 - runner_up / top_score
+    condition_symptoms = _CONDITION_SYMPTOMS.get(top_id) or frozenset()
+    coverage = len(SymptomSet.coerce(symptoms).unique & condition_symptoms) / (len(condition_symptoms) or 1)
+    return round(0.5 * strength + 0.25 * margin + 0.25 * coverage, 3)
+
+
+def route_consult(symptoms, differential, has_image):
+    """Pick the cheapest tier that can answer this consult"""
+    confidence = local_match_confidence(symptoms, differential)
+    matched = bool(differential) and differential[0][1] >= MATCH_THRESHOLD
+    # An exact tie has no margin: the template would just pick the first of the two conditions
+    tied = matched and _is_tie(_top_two(symptoms, differential))
+
+    if has_image:
+        decision = RouteDecision(ROUTE_VISION, VISION_MODEL, confidence, "image attached")
+    elif tied and confidence >= ROUTER_TEXT_THRESHOLD:
+        decision = RouteDecision(ROUTE_SMALL_TEXT, SMALL_TEXT_MODEL, confidence, "tied local match")
+    elif tied:
+        decision = RouteDecision(ROUTE_LARGE_TEXT, LARGE_TEXT_MODEL, confidence, "tied local match, low confidence")
+    elif matched and confidence >= ROUTER_TEMPLATE_THRESHOLD:
+        decision = RouteDecision(ROUTE_TEMPLATE, None, confidence,
+                                 f"local match {differential[0][0]} >= {ROUTER_TEMPLATE_THRESHOLD}")
+    elif confidence >= ROUTER_TEXT_THRESHOLD:
+        decision = RouteDecision(ROUTE_SMALL_TEXT, SMALL_TEXT_MODEL, confidence,
+                                 f"mid confidence >= {ROUTER_TEXT_THRESHOLD}")
+    else:
+        decision = RouteDecision(ROUTE_LARGE_TEXT, LARGE_TEXT_MODEL, confidence,
+                                 f"low confidence < {ROUTER_TEXT_THRESHOLD}")
+
+    with _route_lock:
+        _route_counts[decision.route] += 1
+    print(f"🧭 Route: {decision.route} (confidence {decision.confidence:.2f}, mode {ROUTER_MODE}) - {decision.reason}")
+    return decision
+
+
+def get_routing_stats():
+    """Consults routed to each tier since startup"""
+    with _route_lock:
+        return dict(_route_counts)
@@ -0,0 +1,131 @@
+# serving.py - GRADIO QUEUE, CONCURRENCY LIMITS AND QUEUE-DEPTH METRICS
+
+import os
+import threading
+from contextlib import contextmanager
+
+# Queue and worker settings (all optional environment overrides)
+QUEUE_MAX_SIZE = int(os.environ.get("GRADIO_QUEUE_MAX_SIZE", "64"))             # waiting events before "queue full"
+CONSULT_CONCURRENCY = int(os.environ.get("CONSULT_CONCURRENCY", "8"))            # parallel consults (Groq + gTTS calls)
+REPORT_CONCURRENCY = int(os.environ.get("REPORT_CONCURRENCY", "4"))              # parallel PDF/text report exports
+DEFAULT_CONCURRENCY = int(os.environ.get("GRADIO_DEFAULT_CONCURRENCY", "4"))     # any other queued event
+# Gradio shares one pool of worker slots between all events; keep enough of them that a full
+# set of running consults can never hold every slot and starve report downloads.
+MAX_THREADS = max(int(os.environ.get("GRADIO_MAX_THREADS", "40")),
+                  CONSULT_CONCURRENCY + REPORT_CONCURRENCY + DEFAULT_CONCURRENCY)
+
+# Events with the same concurrency id share one limit and one waiting line
+CONSULT_CONCURRENCY_ID = "consult"
+REPORT_CONCURRENCY_ID = "report"
+
+_CONCURRENCY_LIMITS = {
+    CONSULT_CONCURRENCY_ID: CONSULT_CONCURRENCY,
+    REPORT_CONCURRENCY_ID: REPORT_CONCURRENCY,
+}
+
+
+class _ConsultSlots:
+    """CONSULT_CONCURRENCY consult slots shared by the UI and the JSON API.
+
+    Gradio's concurrency_limit only counts UI events, so both entry points also hold one of
+    these while a consult runs; together they never run more than CONSULT_CONCURRENCY.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.waiting = 0
+
+    @contextmanager
+    def hold(self):
+        with self._lock:
+            self.waiting += 1
+        self._semaphore.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {"in_use": self.in_use, "waiting": self.waiting, "limit": self.limit}
+
+
+_CONSULT_SLOTS = _ConsultSlots(CONSULT_CONCURRENCY)
+
+
+def consult_slot():
+    """Context manager holding one shared consult slot for the duration of a consult"""
+    return _CONSULT_SLOTS.hold()
+
+
+def event_options(concurrency_id):
+    """Keyword arguments for an event listener (.click etc.) in the given concurrency group"""
+    return {"concurrency_limit": _CONCURRENCY_LIMITS[concurrency_id], "concurrency_id": concurrency_id}
+
+
+def configure_queue(demo):
+    """Enable the request queue with an explicit size and default per-event limit"""
+    return demo.queue(max_size=QUEUE_MAX_SIZE, default_concurrency_limit=DEFAULT_CONCURRENCY)
+
+
+def launch_options():
+    """Keyword arguments for demo.launch() matching the queue settings"""
+    return {"max_threads": MAX_THREADS}
+
+
+def apply_worker_limits(demo):
+    """Apply MAX_THREADS when the app is mounted into another server instead of demo.launch()"""
+    demo.max_threads = MAX_THREADS
+    queue = getattr(demo, "_queue", None)
+    if queue is not None and hasattr(queue, "max_thread_count"):
+        queue.max_thread_count = MAX_THREADS
+    return demo
+
+
+def get_queue_metrics(demo):
+    """Queue depth per concurrency group: {"queued", "running", "limit"} plus totals.
+
+    Reads Gradio's queue state, which is not a public API - returns {"available": False}
+    when the installed version lays it out differently.
+    """
+    queue = getattr(demo, "_queue", None)
+    event_queues = getattr(queue, "event_queue_per_concurrency_id", None)
+    if event_queues is None:
+        return {"available": False}
+
+    groups = {}
+    for concurrency_id, event_queue in list(event_queues.items()):
+        groups[concurrency_id] = {
+            "queued": len(getattr(event_queue, "queue", ())),
+            "running": getattr(event_queue, "current_concurrency", 0),
+            "limit": getattr(event_queue, "concurrency_limit", None),
+        }
+    active_jobs = getattr(queue, "active_jobs", ())
+    return {
+        "available": True,
+        "max_size": getattr(queue, "max_size", None),
+        "queued": sum(group["queued"] for group in groups.values()),
+        "running": sum(group["running"] for group in groups.values()),
+        "busy_workers": sum(1 for job in active_jobs if job is not None),
+        "max_workers": len(active_jobs),
+        "groups": groups,
+        "consult_slots": _CONSULT_SLOTS.stats(),
+    }
+
+
+def format_queue_metrics(metrics):
+    if not metrics.get("available"):
+        return "queue metrics unavailable"
+    groups = " | ".join(f"{name}: {group['running']}/{group['limit']} running, {group['queued']} waiting"
+                        for name, group in metrics["groups"].items())
+    slots = metrics["consult_slots"]
+    return (f"{metrics['queued']} waiting, {metrics['busy_workers']}/{metrics['max_workers']} workers busy - {groups}"
+            f" | consult slots (UI + API): {slots['in_use']}/{slots['limit']} in use, {slots['waiting']} waiting")
@@ -321,6 +321,287 @@ ENHANCED_PROFESSIONAL_CSS = ENHANCED_NEURAL_CSS + """
 }
 """
 
+# ========== SYMPTOM DASHBOARD (class-based markup emitted by dashboard.py) ==========
+# Tone classes carry one accent color plus the translucent variants the bars, badges and cards use
+DASHBOARD_TONES = {
+    "green": "#48bb78",
+    "orange": "#ed8936",
+    "deep-orange": "#dd6b20",
+    "red": "#e53e3e",
+}
+
+DASHBOARD_TONE_CSS = "".join(
+    f".d-dash .t-{name} {{ --c: {color}; --c-cc: {color}cc; --c-40: {color}40; --c-30: {color}30; "
+    f"--c-26: {color}26; --c-20: {color}20; --c-1a: {color}1a; --c-15: {color}15; }}\n"
+    for name, color in DASHBOARD_TONES.items()
+)
+
+DASHBOARD_CSS = DASHBOARD_TONE_CSS + """
+.d-dash {
+    background: linear-gradient(135deg, #1a1f36 0%, #2d3748 100%);
+    color: white;
+    padding: 30px;
+    border-radius: 20px;
+    margin: 20px 0;
+    border: 1px solid #4a5568;
+    box-shadow: 0 12px 40px rgba(0,0,0,0.4);
+    font-family: 'Inter', sans-serif;
+}
+.d-dash .d-flex { display: flex; align-items: center; }
+.d-dash .d-grow { flex: 1; }
+.d-dash .d-label { color: #e2e8f0; font-weight: 600; font-size: 14px; }
+.d-dash .d-muted { color: #a0aec0; }
+
+/* Header */
+.d-dash .d-head {
+    display: flex; align-items: center; justify-content: space-between;
+    margin-bottom: 25px; padding-bottom: 20px; border-bottom: 1px solid #4a5568;
+}
+.d-dash .d-brand { display: flex; align-items: center; gap: 15px; }
+.d-dash .d-logo { background: linear-gradient(135deg, #4299e1, #3182ce); padding: 12px; border-radius: 12px; font-size: 24px; }
+.d-dash .d-title { margin: 0; font-size: 22px; font-weight: 700; color: #e2e8f0; }
+.d-dash .d-sub { margin: 5px 0 0 0; color: #a0aec0; font-size: 14px; }
+.d-dash .d-pill {
+    background: rgba(66, 153, 225, 0.2); padding: 8px 16px; border-radius: 20px;
+    font-size: 14px; border: 1px solid #4299e1; color: #90cdf4;
+}
+
+/* Risk card */
+.d-dash .d-risk { padding: 25px; border-radius: 16px; margin-bottom: 25px; box-shadow: 0 6px 20px rgba(0,0,0,0.2); }
+.d-dash .d-risk-high { background: linear-gradient(135deg, #742a2a 0%, #c53030 100%); border: 1px solid #e53e3e; }
+.d-dash .d-risk-moderate { background: linear-gradient(135deg, #744210 0%, #ed8936 100%); border: 1px solid #dd6b20; }
+.d-dash .d-risk-low { background: linear-gradient(135deg, #22543d 0%, #48bb78 100%); border: 1px solid #38a169; }
+.d-dash .d-risk-body { display: flex; align-items: center; gap: 20px; }
+.d-dash .d-risk-icon { font-size: 42px; filter: drop-shadow(0 4px 8px rgba(0,0,0,0.3)); }
+.d-dash .d-risk-level { font-size: 24px; font-weight: 800; margin-bottom: 8px; text-shadow: 0 2px 4px rgba(0,0,0,0.3); }
+.d-dash .d-risk-desc { font-size: 16px; opacity: 0.95; font-weight: 500; }
+
+/* Sections */
+.d-dash .d-sec {
+    background: rgba(45, 55, 72, 0.8); padding: 25px; border-radius: 16px;
+    margin-bottom: 25px; border: 1px solid #4a5568; backdrop-filter: blur(10px);
+}
+.d-dash .d-sec-head { display: flex; align-items: center; gap: 12px; margin-bottom: 20px; }
+.d-dash .d-sec-split { display: flex; align-items: center; justify-content: space-between; margin-bottom: 20px; }
+.d-dash .d-sec-split .d-sec-head { margin-bottom: 0; }
+.d-dash .d-sec-icon { font-size: 20px; }
+.d-dash .d-sec-title { font-weight: 700; color: #e2e8f0; font-size: 18px; }
+.d-dash .d-sec-note { color: #a0aec0; font-size: 14px; margin-bottom: 20px; line-height: 1.5; }
+.d-dash .d-empty { text-align: center; color: #a0aec0; padding: 30px; font-size: 14px; }
+
+/* Bars: a track with a tone-colored fill and an optional percentage inside */
+.d-dash .d-track { flex: 1; background: #2d3748; overflow: hidden; position: relative; border: 1px solid #4a5568; }
+.d-dash .d-track-lg { height: 24px; border-radius: 12px; }
+.d-dash .d-track-md { height: 20px; border-radius: 10px; }
+.d-dash .d-track-sm { flex: none; width: 100px; height: 8px; border-radius: 4px; border: 0; background: #4a5568; margin: 0 6px; }
+.d-dash .d-track-diff { height: 16px; border-radius: 8px; }
+.d-dash .d-fill {
+    height: 100%; border-radius: inherit; transition: all 0.3s ease;
+    background: linear-gradient(90deg, var(--c), var(--c-cc)); box-shadow: 0 2px 8px var(--c-40);
+}
+.d-dash .d-track-sm .d-fill { background: var(--c); box-shadow: none; transition: none; }
+.d-dash .d-track-diff .d-fill { background: #718096; box-shadow: none; transition: none; }
+.d-dash .d-track-diff .d-match { background: #4299e1; }
+.d-dash .d-pct {
+    position: absolute; right: 10px; top: 50%; transform: translateY(-50%); color: white;
+    font-weight: 700; font-size: 12px; text-shadow: 0 1px 2px rgba(0,0,0,0.5);
+}
+.d-dash .d-track-md .d-pct { font-size: 11px; }
+
+/* Severity graph and differential rows */
+.d-dash .d-chart { display: flex; align-items: center; margin: 15px 0; gap: 15px; }
+.d-dash .d-chart-name { min-width: 140px; display: flex; align-items: center; gap: 10px; }
+.d-dash .d-chart-name span:first-child { font-size: 18px; }
+.d-dash .d-diff { display: flex; align-items: center; margin: 12px 0; gap: 15px; }
+.d-dash .d-diff-name { min-width: 220px; display: flex; align-items: center; gap: 10px; }
+.d-dash .d-rank { color: #90cdf4; font-weight: 700; font-size: 13px; }
+.d-dash .d-score { color: #a0aec0; font-size: 12px; min-width: 60px; text-align: right; }
+
+/* Priority and body system rows: tone-colored left border, bar and tag */
+.d-dash .d-prio, .d-dash .d-sys {
+    background: rgba(45, 55, 72, 0.6); padding: 15px; border-radius: 10px; border-left: 4px solid var(--c);
+    display: flex; align-items: center; justify-content: space-between;
+}
+.d-dash .d-prio { margin-bottom: 10px; gap: 10px; }
+.d-dash .d-sys { margin: 10px 0; }
+.d-dash .d-prio-name { display: flex; align-items: center; gap: 8px; min-width: 120px; }
+.d-dash .d-prio-name .d-flex { gap: 6px; font-size: 16px; }
+.d-dash .d-badge {
+    background: var(--c-20); color: var(--c); padding: 4px 8px; border-radius: 6px;
+    font-weight: 700; font-size: 12px; border: 1px solid var(--c-40);
+}
+.d-dash .d-prio-bar { display: flex; align-items: center; gap: 10px; flex: 1; }
+.d-dash .d-prio-bar .d-muted { font-size: 12px; min-width: 30px; text-align: center; }
+.d-dash .d-sys-name { display: flex; align-items: center; gap: 12px; min-width: 140px; }
+.d-dash .d-sys-bar { display: flex; align-items: center; gap: 15px; flex: 1; }
+.d-dash .d-tag {
+    background: var(--c-15); color: var(--c); padding: 4px 8px; border-radius: 12px; font-size: 11px;
+    font-weight: 600; border: 1px solid var(--c-30); min-width: 100px; text-align: center;
+}
+.d-dash .d-sys .d-tag { padding: 6px 12px; font-size: 12px; }
+
+/* Color guide and severity scale legends */
+.d-dash .d-guide { background: rgba(45, 55, 72, 0.6); padding: 15px; border-radius: 10px; margin-top: 20px; border: 1px solid #4a5568; }
+.d-dash .d-guide-title { color: #e2e8f0; font-weight: 600; font-size: 14px; margin-bottom: 12px; text-align: center; }
+.d-dash .d-guide-grid { display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 10px; font-size: 12px; }
+.d-dash .d-guide-item {
+    display: flex; flex-direction: column; align-items: center; text-align: center; padding: 10px;
+    background: var(--c-1a); border-radius: 8px; border: 1px solid var(--c-40);
+}
+.d-dash .d-guide-item .d-flex { gap: 6px; margin-bottom: 5px; }
+.d-dash .d-guide-range { color: #a0aec0; font-size: 11px; line-height: 1.3; }
+.d-dash .d-guide-foot { text-align: center; color: #718096; font-size: 11px; margin-top: 10px; font-style: italic; }
+.d-dash .d-legend { padding: 20px; border-radius: 12px; }
+.d-dash .d-legend .d-guide-title { margin-bottom: 15px; }
+.d-dash .d-legend-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 12px; font-size: 13px; }
+.d-dash .d-legend-item { display: flex; align-items: center; gap: 10px; padding: 8px; background: var(--c-1a); border-radius: 8px; }
+.d-dash .d-tone-text { color: var(--c); }
+.d-dash .d-legend-item .d-tone-text { font-size: 18px; }
+.d-dash .d-guide-item .d-tone-text { font-size: 16px; }
+.d-dash .d-legend-item .d-muted { font-size: 12px; }
+
+/* AI insight cards */
+.d-dash .d-insight {
+    background: rgba(66, 153, 225, 0.1); padding: 18px; border-radius: 12px; margin-bottom: 15px;
+    border: 1px solid #4299e1; border-left: 5px solid #4299e1;
+}
+.d-dash .d-insight-body { display: flex; align-items: flex-start; gap: 15px; }
+.d-dash .d-insight-icon { font-size: 22px; margin-top: 2px; }
+.d-dash .d-insight-title { font-weight: 700; color: #90cdf4; font-size: 16px; margin-bottom: 8px; }
+.d-dash .d-insight-text { color: #cbd5e0; font-size: 14px; line-height: 1.5; margin-bottom: 10px; }
+.d-dash .d-tip {
+    background: rgba(66, 153, 225, 0.2); padding: 8px 12px; border-radius: 8px;
+    font-size: 13px; color: #90cdf4; border-left: 3px solid #90cdf4;
+}
+
+/* Symptoms breakdown */
+.d-dash .d-stats { display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px; margin-top: 15px; }
+.d-dash .d-stat {
+    background: var(--c-26); padding: 25px; border-radius: 14px; text-align: center;
+    border: 1px solid var(--c); backdrop-filter: blur(10px);
+}
+.d-dash .d-stat-value { font-size: 32px; font-weight: 800; margin-bottom: 8px; }
+.d-dash .t-green .d-stat-value { color: #68d391; }
+.d-dash .t-orange .d-stat-value { color: #fbd38d; }
+.d-dash .t-red .d-stat-value { color: #fc8181; }
+.d-dash .d-stat-label { font-size: 14px; color: #a0aec0; font-weight: 600; }
+
+/* Recovery timeline */
+.d-dash .d-days {
+    background: rgba(72, 187, 120, 0.2); padding: 6px 12px; border-radius: 20px;
+    font-size: 13px; color: #68d391; border: 1px solid #48bb78;
+}
+.d-dash .d-phase { display: flex; align-items: center; margin: 15px 0; gap: 15px; }
+.d-dash .d-phase-day {
+    background: rgba(72, 187, 120, 0.2); padding: 8px 12px; border-radius: 8px; min-width: 70px; text-align: center;
+    border: 1px solid #48bb78; color: #68d391; font-weight: 600; font-size: 13px;
+}
+.d-dash .d-phase .d-label { margin-bottom: 5px; }
+.d-dash .d-phase .d-muted { font-size: 13px; }
+.d-dash .d-phase-pct {
+    background: rgba(66, 153, 225, 0.2); padding: 6px 12px; border-radius: 20px; font-size: 12px;
+    color: #90cdf4; border: 1px solid #4299e1; min-width: 50px; text-align: center;
+}
+
+/* Immediate care */
+.d-dash .d-care-icon { background: linear-gradient(135deg, #4299e1, #3182ce); padding: 10px; border-radius: 10px; font-size: 20px; }
+.d-dash .d-care { background: rgba(66, 153, 225, 0.1); padding: 20px; border-radius: 12px; margin-bottom: 15px; border: 1px solid #4299e1; }
+.d-dash .d-care-head { display: flex; align-items: center; gap: 12px; margin-bottom: 12px; }
+.d-dash .d-care-head div:first-child { font-size: 18px; color: #90cdf4; }
+.d-dash .d-care-title { font-weight: 700; color: #90cdf4; font-size: 16px; }
+.d-dash .d-care-text { color: #cbd5e0; font-size: 14px; line-height: 1.6; padding-left: 30px; }
+.d-dash .d-foot {
+    font-size: 13px; color: #718096; margin-top: 15px;
+    display: flex; align-items: center; gap: 8px; justify-content: center;
+}
+"""
+
+# Added once to the page stylesheet, so dashboards only ship class names
+ENHANCED_PROFESSIONAL_CSS += DASHBOARD_CSS
+
+# Client-side dashboard renderer (DASHBOARD_RENDER=client). dashboard.py puts the fixed tables and
+# the template shells (each template split at its slots) in window.DASHBOARD_TABLES; each consult
+# only sends a placeholder carrying its JSON model, and this script fills the shells' slots from it.
+DASHBOARD_RENDERER_JS = """
+<script>
+(function () {
+    const ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&#34;", "'": "&#39;"};
+    const esc = (text) => String(text).replace(/[&<>"']/g, (c) => ESCAPES[c]);
+    // shell = [text, slot, text, slot, ..., text]
+    const fill = (shell, slots) => shell.map((part, i) => (i % 2 ? slots[part] : part)).join("");
+
+    function renderDashboard(model) {
+        const t = window.DASHBOARD_TABLES;
+        const shells = t.shells;
+        const [mild, moderate, critical] = model.counts;
+
+        const differentialRows = model.differential.map(([rank, condition, width, match, score]) => fill(
+            shells.differential_row,
+            {rank, condition: esc(condition), match_class: match ? " d-match" : "", width, score}));
+        const chartRows = model.symptoms.map(([display, level, percentage]) => fill(
+            shells.chart_row,
+            {tone: t.severity[level].tone, emoji: t.severity[level].emoji, display: esc(display), percentage}));
+        const priorityRows = model.priority.map((index, rank) => {
+            const [display, level, percentage] = model.symptoms[index];
+            const item = t.priority[level];
+            return fill(shells.priority_row, {tone: item.tone, rank: rank + 1, emoji: item.emoji, display: esc(display),
+                                              percentage, action_guide: item.action_guide});
+        });
+        const systemRows = model.systems.map(([system, score]) => {
+            const [, label, tone] = t.scale.find(([maximum]) => score <= maximum) || t.scale[t.scale.length - 1];
+            return fill(shells.body_system_row, {tone, system, width: score, percent: Math.trunc(score), severity_label: label});
+        });
+
+        return fill(shells.dashboard, {
+            symptom_count: model.count,
+            risk_card: t.risk_cards[model.risk],
+            differential_section: differentialRows.length
+                ? fill(shells.differential_section, {rows: differentialRows.join("")}) : "",
+            chart_rows: chartRows.join(""),
+            priority_rows: priorityRows.join("") || t.empty_priority,
+            insight_cards: model.insights.map((index) => t.insight_cards[index]).join(""),
+            body_system_rows: systemRows.join("") || t.empty_body_systems,
+            mild_count: mild,
+            moderate_count: moderate,
+            critical_count: critical,
+            recovery_days: model.recovery,
+            recovery_timeline: t.recovery_timelines[model.recovery],
+            immediate_remedy: esc(model.remedy || t.default_remedy),
+        });
+    }
+
+    function renderPlaceholders(root) {
+        for (const placeholder of root.querySelectorAll(".d-dash-model[data-model]")) {
+            const model = JSON.parse(placeholder.getAttribute("data-model"));
+            placeholder.removeAttribute("data-model");
+            placeholder.innerHTML = renderDashboard(model);
+        }
+    }
+
+    // Only the dashboard component is observed (not the whole page, where every streamed token is a
+    // mutation). Gradio mounts it after this head script runs and may remount it, so it is looked up
+    // again whenever it is missing or detached.
+    let watched = null;
+    const observer = new MutationObserver(() => renderPlaceholders(watched));
+    function watchDashboard() {
+        if (!watched || !watched.isConnected) {
+            const root = document.getElementById(window.DASHBOARD_TABLES.element_id);
+            if (root) {
+                observer.disconnect();
+                watched = root;
+                observer.observe(root, {childList: true, subtree: true});
+                renderPlaceholders(root);
+            }
+        }
+        setTimeout(watchDashboard, watched ? 2000 : 200);
+    }
+
+    window.renderDashboardModel = renderDashboard;
+    watchDashboard();
+})();
+</script>
+"""
+
 # ========== DNA HELIX COMPLETELY REMOVED ==========
 HTML_ANIMATIONS_CSS = ""
 
@@ -0,0 +1,100 @@
+# symptom_batch.py - VECTORIZED BATCH SCORING OF INTAKES AGAINST THE CONDITION CATALOGUE
+
+import numpy as np
+
+from symptom_database import MATCH_THRESHOLD, build_symptom_index
+from symptom_set import canonical_symptom
+
+
+class ConditionMatrix:
+    """The condition catalogue encoded as a dense symptom x condition weight matrix.
+
+    Scoring N intakes is one (N x symptoms) @ (symptoms x conditions) product and gives
+    exactly the scores detect_condition_from_symptoms computes one intake at a time.
+    """
+
+    def __init__(self, solutions=None, weights=None):
+        self.condition_ids, index = build_symptom_index(solutions, weights)
+        self.vocabulary = {symptom: column for column, symptom in enumerate(index)}
+        self.weights = np.zeros((len(self.vocabulary), len(self.condition_ids)), dtype=np.float64)
+        for symptom, entries in index.items():
+            column = self.vocabulary[symptom]
+            for order, weight in entries:
+                self.weights[column, order] = weight
+        # Raw checkbox labels -> vocabulary column (or -1), memoized across batches
+        self._column_cache = {}
+
+    def _column(self, symptom):
+        column = self._column_cache.get(symptom)
+        if column is None:
+            column = self.vocabulary.get(canonical_symptom(symptom), -1)
+            self._column_cache[symptom] = column
+        return column
+
+    def encode(self, intakes):
+        """Count matrix (N x vocabulary); repeated symptoms count repeatedly, unknown ones are dropped"""
+        rows = []
+        columns = []
+        for row, symptoms in enumerate(intakes):
+            for symptom in symptoms or ():
+                column = self._column(symptom)
+                if column >= 0:
+                    rows.append(row)
+                    columns.append(column)
+        counts = np.zeros((len(intakes), len(self.vocabulary)), dtype=np.float64)
+        np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), 1.0)
+        return counts
+
+    def score(self, intakes):
+        """Score matrix (N x conditions), columns in catalogue order"""
+        return self.encode(intakes) @ self.weights
+
+    def top_k(self, intakes, k=3, scores=None):
+        """Per intake, up to k (condition_id, score) pairs with a positive score, best first.
+
+        Ties keep catalogue order, matching detect_condition_from_symptoms.
+        """
+        scores = self.score(intakes) if scores is None else scores
+        k = min(k, scores.shape[1])
+        # Stable sort on the negated scores keeps the earlier condition first on ties
+        ranked = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        ranked_scores = np.take_along_axis(scores, ranked, axis=1)
+        results = []
+        for orders, values in zip(ranked.tolist(), ranked_scores.tolist()):
+            results.append([(self.condition_ids[order], value) for order, value in zip(orders, values) if value > 0])
+        return results
+
+    def best_matches(self, intakes, threshold=MATCH_THRESHOLD, scores=None):
+        """Batch equivalent of detect_condition_from_symptoms: best condition_id or None per intake"""
+        scores = self.score(intakes) if scores is None else scores
+        if scores.shape[1] == 0:
+            return [None] * scores.shape[0]
+        best = np.argmax(scores, axis=1)  # argmax returns the first maximum - catalogue order on ties
+        best_scores = scores[np.arange(scores.shape[0]), best]
+        return [self.condition_ids[order] if value >= threshold else None
+                for order, value in zip(best.tolist(), best_scores.tolist())]
+
+
+_default_matrix = None
+
+
+def get_condition_matrix():
+    """Process-wide matrix for the current catalogue (built on first use)"""
+    global _default_matrix
+    if _default_matrix is None:
+        _default_matrix = ConditionMatrix()
+    return _default_matrix
+
+
+def score_symptom_batch(intakes, top_k=3, threshold=MATCH_THRESHOLD):
+    """Score many intakes at once.
+
+    Returns one dict per intake: {"match": condition_id or None, "top": [(condition_id, score), ...]}
+    where "match" follows the same >= threshold rule as detect_condition_from_symptoms.
+    """
+    matrix = get_condition_matrix()
+    intakes = list(intakes)
+    scores = matrix.score(intakes)
+    matches = matrix.best_matches(intakes, threshold, scores=scores)
+    ranked = matrix.top_k(intakes, top_k, scores=scores)
+    return [{"match": match, "top": top} for match, top in zip(matches, ranked)]
@@ -1,5 +1,9 @@
 # symptom_database.py - COMPLETE UPDATED VERSION WITH ALL CONDITIONS
 
+import heapq
+
+from symptom_set import SymptomSet
+
 SYMPTOM_SOLUTIONS = {
     # EXISTING CONDITIONS
     "common_cold": {
@@ -217,79 +221,116 @@ PROFESSIONAL_TEMPLATES = {
     "closing": "Take care of yourself and don't hesitate to seek additional medical attention."
 }
 
+# Symptom weights used for condition matching (lowercase canonical names)
+SYMPTOM_WEIGHTS = {
+    # CRITICAL SYMPTOMS
+    "chest pain": 3.0, "difficulty breathing": 3.0, "severe bleeding": 3.0,
+    "sudden weakness": 3.0, "suicidal thoughts": 3.0, "seizure": 3.0,
+    "severe head injury": 3.0, "paralysis/numbness": 3.0,
+
+    # NEUROLOGICAL
+    "headache": 1.5, "dizziness": 1.5, "confusion": 2.0, "memory problems": 1.5,
+    "anxiety": 1.5, "nervousness": 1.5, "depression": 1.0, "sleep issues": 0.5, 
+    "vision problems": 2.0, "visual disturbances": 2.0, "hearing loss": 1.5, 
+    "tremors": 2.0, "fainting": 2.5, "balance problems": 1.5,
+
+    # CARDIOVASCULAR
+    "heart palpitations": 2.0, "rapid heartbeat": 2.0, "shortness of breath": 2.5, 
+    "chest tightness": 2.5, "swollen ankles": 1.0, "high blood pressure": 1.5, 
+    "irregular heartbeat": 2.0, "cold extremities": 1.0,
+
+    # DIGESTIVE
+    "nausea": 1.0, "vomiting": 1.5, "diarrhea": 1.0, "constipation": 0.5,
+    "stomach pain": 1.5, "heartburn": 0.5, "appetite loss": 0.5, "weight changes": 1.0,
+    "bloating": 0.5, "blood in stool": 2.5, "stomach cramps": 1.0,
+
+    # DERMATOLOGICAL
+    "skin rash": 1.0, "itching": 0.5, "redness": 0.5, "swelling": 1.0,
+    "acne/pimples": 0.5, "dry skin": 0.5, "hair loss": 0.5, "nail changes": 0.5,
+    "blisters": 1.0, "skin discoloration": 1.0, "skin inflammation": 1.0,
+    "skin pain": 1.0, "flaking": 0.5,
+
+    # MUSCULOSKELETAL
+    "muscle pain": 1.0, "joint pain": 1.0, "back pain": 1.0, "neck pain": 1.0,
+    "stiffness": 0.5, "swelling joints": 1.0, "limited movement": 1.0, 
+    "muscle weakness": 1.5, "muscle tension": 1.0,
+
+    # GENERAL
+    "fever": 2.0, "chills": 1.0, "cough": 1.0, "cold": 0.5, "sore throat": 1.0,
+    "runny nose": 0.5, "fatigue/tiredness": 0.5, "allergies": 0.5, "urinary issues": 1.0,
+    "ear pain": 1.0, "eye problems": 1.5, "sneezing": 0.5, "body aches": 1.0,
+    "sweating": 1.0, "trembling": 1.0, "frequent urination": 1.0, "burning sensation": 1.5,
+    "pelvic pain": 1.5, "itchy eyes": 0.5, "congestion": 0.5, "stress": 1.0,
+
+    # EXISTING SYMPTOMS
+    "loss of smell/taste": 2.0, "sensitivity to light": 1.0
+}
+
+DEFAULT_SYMPTOM_WEIGHT = 1.0
+MATCH_THRESHOLD = 2.0
+
+def build_symptom_index(solutions=None, weights=None):
+    """Compile the catalogue into an inverted index: symptom -> [(condition_order, weight), ...]
+
+    Weights are resolved once here, and each condition appears at most once per symptom,
+    so scoring only touches the conditions that contain a selected symptom.
+    """
+    solutions = SYMPTOM_SOLUTIONS if solutions is None else solutions
+    weights = SYMPTOM_WEIGHTS if weights is None else weights
+    
+    condition_ids = list(solutions)
+    index = {}
+    for order, condition_id in enumerate(condition_ids):
+        for symptom in {s.lower() for s in solutions[condition_id]["symptoms"]}:
+            index.setdefault(symptom, []).append((order, weights.get(symptom, DEFAULT_SYMPTOM_WEIGHT)))
+    return condition_ids, index
+
+def _condition_sizes(condition_ids, solutions=None):
+    solutions = SYMPTOM_SOLUTIONS if solutions is None else solutions
+    return [len({s.lower() for s in solutions[condition_id]["symptoms"]}) or 1 for condition_id in condition_ids]
+
+# Compiled once at import - call rebuild_symptom_index() after editing SYMPTOM_SOLUTIONS
+CONDITION_IDS, SYMPTOM_INDEX = build_symptom_index()
+CONDITION_SIZES = _condition_sizes(CONDITION_IDS)
+
+def rebuild_symptom_index():
+    global CONDITION_IDS, SYMPTOM_INDEX, CONDITION_SIZES
+    CONDITION_IDS, SYMPTOM_INDEX = build_symptom_index()
+    CONDITION_SIZES = _condition_sizes(CONDITION_IDS)
+
+def score_conditions(clean_symptoms):
+    """Sparse score accumulation: {condition_order: score} for conditions sharing a symptom"""
+    scores = {}
+    for symptom in clean_symptoms:
+        for order, weight in SYMPTOM_INDEX.get(symptom, ()):
+            scores[order] = scores.get(order, 0) + weight
+    return scores
+
+def rank_conditions_from_symptoms(selected_symptoms, k=3, normalize=False, min_score=0.0):
+    """Ranked differential: up to k (condition_id, score) pairs, best first, in one pass.
+
+    With normalize=True scores are divided by the condition's symptom count, so small
+    conditions that are fully matched rank above large, partially matched ones.
+    Ties go to the condition listed first in the catalogue.
+    Accepts a SymptomSet or a plain list of labels.
+    """
+    if not selected_symptoms or k <= 0:
+        return []
+    
+    scores = score_conditions(SymptomSet.coerce(selected_symptoms).canonical)
+    if normalize:
+        scores = {order: score / CONDITION_SIZES[order] for order, score in scores.items()}
+    
+    # Bounded heap: O(n log k) over only the conditions that scored
+    top = heapq.nlargest(k, ((score, -order) for order, score in scores.items() if score >= min_score))
+    return [(CONDITION_IDS[-neg_order], score) for score, neg_order in top]
+
 def detect_condition_from_symptoms(selected_symptoms):
     """Symptom matching with weights and logic"""
-    if not selected_symptoms:
-        return None
-    
-    SYMPTOM_WEIGHTS = {
-        # CRITICAL SYMPTOMS
-        "chest pain": 3.0, "difficulty breathing": 3.0, "severe bleeding": 3.0,
-        "sudden weakness": 3.0, "suicidal thoughts": 3.0, "seizure": 3.0,
-        "severe head injury": 3.0, "paralysis/numbness": 3.0,
-        
-        # NEUROLOGICAL
-        "headache": 1.5, "dizziness": 1.5, "confusion": 2.0, "memory problems": 1.5,
-        "anxiety": 1.5, "nervousness": 1.5, "depression": 1.0, "sleep issues": 0.5, 
-        "vision problems": 2.0, "visual disturbances": 2.0, "hearing loss": 1.5, 
-        "tremors": 2.0, "fainting": 2.5, "balance problems": 1.5,
-        
-        # CARDIOVASCULAR
-        "heart palpitations": 2.0, "rapid heartbeat": 2.0, "shortness of breath": 2.5, 
-        "chest tightness": 2.5, "swollen ankles": 1.0, "high blood pressure": 1.5, 
-        "irregular heartbeat": 2.0, "cold extremities": 1.0,
-        
-        # DIGESTIVE
-        "nausea": 1.0, "vomiting": 1.5, "diarrhea": 1.0, "constipation": 0.5,
-        "stomach pain": 1.5, "heartburn": 0.5, "appetite loss": 0.5, "weight changes": 1.0,
-        "bloating": 0.5, "blood in stool": 2.5, "stomach cramps": 1.0,
-        
-        # DERMATOLOGICAL
-        "skin rash": 1.0, "itching": 0.5, "redness": 0.5, "swelling": 1.0,
-        "acne/pimples": 0.5, "dry skin": 0.5, "hair loss": 0.5, "nail changes": 0.5,
-        "blisters": 1.0, "skin discoloration": 1.0, "skin inflammation": 1.0,
-        "skin pain": 1.0, "flaking": 0.5,
-        
-        # MUSCULOSKELETAL
-        "muscle pain": 1.0, "joint pain": 1.0, "back pain": 1.0, "neck pain": 1.0,
-        "stiffness": 0.5, "swelling joints": 1.0, "limited movement": 1.0, 
-        "muscle weakness": 1.5, "muscle tension": 1.0,
-        
-        # GENERAL
-        "fever": 2.0, "chills": 1.0, "cough": 1.0, "cold": 0.5, "sore throat": 1.0,
-        "runny nose": 0.5, "fatigue/tiredness": 0.5, "allergies": 0.5, "urinary issues": 1.0,
-        "ear pain": 1.0, "eye problems": 1.5, "sneezing": 0.5, "body aches": 1.0,
-        "sweating": 1.0, "trembling": 1.0, "frequent urination": 1.0, "burning sensation": 1.5,
-        "pelvic pain": 1.5, "itchy eyes": 0.5, "congestion": 0.5, "stress": 1.0,
-        
-        # EXISTING SYMPTOMS
-        "loss of smell/taste": 2.0, "sensitivity to light": 1.0
-    }
-    
-    # Clean symptoms
-    clean_symptoms = []
-    for symptom in selected_symptoms:
-        if ' ' in symptom and any(symptom.startswith(emoji) for emoji in ["🔴", "🟡", "🟢"]):
-            clean_symptoms.append(symptom.split(' ', 1)[1].lower())
-        else:
-            clean_symptoms.append(symptom.lower())
-    
-    best_match = None
-    highest_score = 0
-    
-    for condition_id, condition_data in SYMPTOM_SOLUTIONS.items():
-        score = 0
-        condition_symptoms = [s.lower() for s in condition_data["symptoms"]]
-        
-        for symptom in clean_symptoms:
-            if symptom in condition_symptoms:
-                score += SYMPTOM_WEIGHTS.get(symptom, 1.0)
-        
-        if score > highest_score and score >= 2.0:
-            highest_score = score
-            best_match = condition_id
-    
-    return best_match
+    ranked = rank_conditions_from_symptoms(selected_symptoms, k=1)
+    if ranked and ranked[0][1] >= MATCH_THRESHOLD:
+        return ranked[0][0]
+    return None
 
 def check_emergency_flags(selected_symptoms):
     """Detect emergency symptoms immediately"""
@@ -307,12 +348,7 @@ def check_emergency_flags(selected_symptoms):
     
     emergencies = []
     if selected_symptoms:
-        for symptom in selected_symptoms:
-            if ' ' in symptom and any(symptom.startswith(emoji) for emoji in ["🔴", "🟡", "🟢"]):
-                clean_symptom = symptom.split(' ', 1)[1].lower()
-            else:
-                clean_symptom = symptom.lower()
-                
+        for clean_symptom in SymptomSet.coerce(selected_symptoms).canonical:
             if clean_symptom in EMERGENCY_RED_FLAGS:
                 emergencies.append(EMERGENCY_RED_FLAGS[clean_symptom])
     
@@ -0,0 +1,91 @@
+# symptom_set.py - ONE NORMALIZATION PASS PER REQUEST, SHARED BY EVERY DOWNSTREAM CHECK
+
+import sys
+
+from keyword_matcher import match_keywords
+
+SEVERITY_EMOJIS = ("🔴", "🟡", "🟢")
+
+# Raw checkbox label -> (interned display name, interned canonical name).
+# The label vocabulary is the fixed set of UI choices, so the memo stays small;
+# it stops growing past _MAX_MEMO in case free text is ever passed in.
+_MAX_MEMO = 4096
+_normalized = {}
+
+
+def normalize_symptom(symptom):
+    """Return (display_name, canonical_name): severity emoji stripped, canonical form lowercased.
+
+    Both strings are interned, so equal symptoms share one object across requests.
+    """
+    cached = _normalized.get(symptom)
+    if cached is not None:
+        return cached
+    if ' ' in symptom and symptom.startswith(SEVERITY_EMOJIS):
+        display = symptom.split(' ', 1)[1]
+    else:
+        display = symptom
+    cached = (sys.intern(display), sys.intern(display.lower()))
+    if len(_normalized) < _MAX_MEMO:
+        _normalized[symptom] = cached
+    return cached
+
+
+def symptom_display_label(canonical):
+    """The one display label for a canonical symptom, in the catalogue / checkbox style
+    ("blood in stool" -> "Blood in Stool", "acne/pimples" -> "Acne/Pimples")"""
+    label = " ".join(word if word in ("of", "in", "to", "and") else "/".join(part.capitalize() for part in word.split("/"))
+                     for word in canonical.split(" "))
+    return label if label.lower() == canonical else canonical
+
+
+def canonical_symptom(symptom):
+    """Canonical (emoji-free, lowercase) form of a single symptom label"""
+    return normalize_symptom(symptom)[1]
+
+
+class SymptomSet:
+    """The selected symptoms of one request, normalized once.
+
+    Iterating yields the original labels (so it can stand in for the plain list);
+    ``display``, ``canonical``, ``text`` and ``unique`` hold the precomputed forms
+    that the matching, scoring and dashboard code work on.
+    """
+
+    __slots__ = ("labels", "display", "canonical", "text", "unique", "_keyword_matches")
+
+    def __init__(self, selected_symptoms=()):
+        self.labels = tuple(selected_symptoms or ())
+        pairs = [normalize_symptom(symptom) for symptom in self.labels]
+        self.display = tuple(display for display, _ in pairs)
+        self.canonical = tuple(canonical for _, canonical in pairs)
+        self.text = " ".join(self.canonical)
+        self.unique = frozenset(self.canonical)
+        self._keyword_matches = None
+
+    @property
+    def keyword_matches(self):
+        """Every keyword table matched against ``text``, computed on first use and shared by all rules"""
+        if self._keyword_matches is None:
+            self._keyword_matches = match_keywords(self.text)
+        return self._keyword_matches
+
+    @classmethod
+    def coerce(cls, symptoms):
+        """Return symptoms unchanged if already a SymptomSet, otherwise normalize them"""
+        return symptoms if isinstance(symptoms, cls) else cls(symptoms)
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __bool__(self):
+        return bool(self.labels)
+
+    def __contains__(self, symptom):
+        return canonical_symptom(symptom) in self.unique
+
+    def __repr__(self):
+        return f"SymptomSet({list(self.labels)!r})"
@@ -0,0 +1,27 @@
+import batch_analyze
+
+CASE = {"case_id": "c1", "symptoms": ["Fever"], "audio": None, "image": None}
+
+
+def test_degraded_result_survives_a_failing_retry():
+    attempts = []
+
+    def run_consult(symptoms, **kwargs):
+        attempts.append(symptoms)
+        if len(attempts) == 1:
+            return {"errors": ["Assessment failed: timeout"]}
+        raise RuntimeError("connection reset")
+
+    record = batch_analyze.analyze_case(CASE, run_consult, retries=1, retry_delay=0)
+    assert record["status"] == batch_analyze.STATUS_DEGRADED
+    assert record["result"] == {"errors": ["Assessment failed: timeout"]}
+    assert record["error"] == "RuntimeError: connection reset"
+
+
+def test_case_fails_only_when_no_attempt_returned_a_result():
+    def run_consult(symptoms, **kwargs):
+        raise RuntimeError("down")
+
+    record = batch_analyze.analyze_case(CASE, run_consult, retries=1, retry_delay=0)
+    assert record["status"] == batch_analyze.STATUS_FAILED
+    assert "result" not in record
@@ -0,0 +1,48 @@
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+import dashboard
+from symptom_database import SYMPTOM_SOLUTIONS, rank_conditions_from_symptoms
+
+NODE = shutil.which("node")
+
+# The page's head script with the browser parts (element lookup, timers) stubbed out
+_NODE_HARNESS = """
+globalThis.window = globalThis;
+globalThis.document = {getElementById: () => null};
+globalThis.setTimeout = () => 0;
+globalThis.MutationObserver = class { observe() {} disconnect() {} };
+%s
+const cases = JSON.parse(require("fs").readFileSync(0, "utf8"));
+process.stdout.write(JSON.stringify(cases.map((model) => renderDashboardModel(model))));
+"""
+
+
+def _cases():
+    all_symptoms = sorted({symptom for data in SYMPTOM_SOLUTIONS.values() for symptom in data["symptoms"]})
+    selections = [data["symptoms"] for data in SYMPTOM_SOLUTIONS.values()]
+    selections += [all_symptoms[:1], all_symptoms, ["<b>Fever</b> & 'chills\""]]
+    cases = []
+    for symptoms in selections:
+        differential = rank_conditions_from_symptoms(symptoms, k=3)
+        matched = differential[0][0] if differential else None
+        for diff in (differential, None):
+            selected = dashboard.in_canonical_order(dashboard.SymptomSet(symptoms))
+            cases.append((dashboard.dashboard_model(selected, matched, diff),
+                          dashboard.render_dashboard(selected, matched, diff)))
+    return cases
+
+
+@pytest.mark.skipif(NODE is None, reason="node is not installed")
+def test_client_renderer_matches_server_templates():
+    cases = _cases()
+    script = _NODE_HARNESS % "\n".join(re.findall(r"<script>(.*?)</script>", dashboard.DASHBOARD_JS, re.S))
+    result = subprocess.run([NODE, "-e", script], input=json.dumps([model for model, _ in cases]),
+                            capture_output=True, text=True, check=True)
+    rendered = json.loads(result.stdout)
+    for (_, expected), actual in zip(cases, rendered):
+        assert actual == expected
@@ -0,0 +1,15 @@
+import dashboard
+from symptom_database import SYMPTOM_SOLUTIONS
+from symptom_set import symptom_display_label
+
+
+def test_same_symptom_set_renders_the_same_labels_whatever_the_caller_sent():
+    api_labels = dashboard.in_canonical_order(dashboard.SymptomSet(["fever", "COUGH", "bad cramps"]))
+    ui_labels = dashboard.in_canonical_order(dashboard.SymptomSet(["🟢 Cough", "🟡 Fever", "Bad Cramps"]))
+    assert api_labels.labels == ui_labels.labels == ("Bad Cramps", "Cough", "Fever")
+    assert dashboard.render_dashboard(api_labels) == dashboard.render_dashboard(ui_labels)
+
+
+def test_display_labels_match_the_catalogue():
+    labels = {symptom for data in SYMPTOM_SOLUTIONS.values() for symptom in data["symptoms"]}
+    assert {label for label in labels if symptom_display_label(label.lower()) != label} == set()
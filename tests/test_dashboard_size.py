@@ -0,0 +1,8 @@
+import dashboard
+
+
+def test_every_dashboard_is_within_its_size_budget():
+    # check_dashboard_sizes() raises ValueError listing any dashboard over budget
+    sizes = dashboard.check_dashboard_sizes()
+    assert sizes
+    assert all(size <= budget for _, _, size, budget in sizes)
@@ -0,0 +1,75 @@
+import pytest
+
+from transcript_symptoms import HISTORICAL, OTHER_EXPERIENCER, extract_symptom_mentions, extract_symptoms
+
+
+@pytest.mark.parametrize("transcript, expected", [
+    ("I have a fever and a cough", ["Fever", "Cough"]),
+    ("no fever or chills", []),
+    ("I don't have a headache", []),
+    ("I'm not dizzy", []),
+])
+def test_negation_scope(transcript, expected):
+    assert extract_symptoms(transcript) == expected
+
+
+@pytest.mark.parametrize("transcript, expected", [
+    # A clause break ends the negation
+    ("no fever, but a bad cough", ["Cough"]),
+    ("no fever. I have a headache", ["Headache"]),
+    # So does the window: the cue is more than NEGATION_WINDOW words back
+    ("no idea why but for two whole days now a fever", ["Fever"]),
+    ("not sure what it is, I have chest pain", ["Chest Pain"]),
+])
+def test_scope_termination(transcript, expected):
+    assert extract_symptoms(transcript) == expected
+
+
+def test_overlapping_phrases_keep_the_longest():
+    mentions = extract_symptom_mentions("I had a severe head injury")
+    assert [mention.canonical for mention in mentions] == ["severe head injury"]
+
+
+def test_mentions_keep_their_position_and_phrase():
+    (mention,) = extract_symptom_mentions("My chest hurts")
+    assert (mention.canonical, mention.phrase, mention.negated, mention.context) == \
+        ("chest pain", "chest hurts", False, None)
+
+
+@pytest.mark.parametrize("transcript", [
+    "My mother had a seizure last year",
+    "I have a history of chest pain",
+    "I used to have seizures as a kid",
+    "My brother's chest pain",
+    "Chest pain runs in my family",
+    "I had a seizure years ago",
+])
+def test_other_people_and_past_symptoms_are_dropped(transcript):
+    assert extract_symptoms(transcript) == []
+
+
+@pytest.mark.parametrize("transcript, expected", [
+    ("My mother had a seizure and I have a headache", ["Headache"]),
+    ("My father had chest pain, my cough is worse", ["Cough"]),
+    ("I used to get migraines but now I have a fever", ["Fever"]),
+    ("I have chest pain since last year", ["Chest Pain"]),
+])
+def test_context_scope_ends_at_the_patient_or_the_present(transcript, expected):
+    assert extract_symptoms(transcript) == expected
+
+
+def test_mentions_report_their_context():
+    contexts = {mention.canonical: mention.context
+                for mention in extract_symptom_mentions("My sister had a seizure. I had chest pain years ago")}
+    assert contexts == {"seizure": OTHER_EXPERIENCER, "chest pain": HISTORICAL}
+
+
+@pytest.mark.parametrize("transcript, expected", [
+    ("a faint rash and a faint cough", ["Skin Rash", "Cough"]),
+    ("I fainted at work", ["Fainting"]),
+    ("I feel faint", ["Fainting"]),
+    ("my face went numb", ["Paralysis/Numbness"]),
+    ("my fingers are numb after typing", []),
+])
+def test_red_flag_synonyms_need_specific_phrasings(transcript, expected):
+    assert extract_symptoms(transcript) == expected
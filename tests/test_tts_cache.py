@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import voice_of_the_doctor
+
+
+@pytest.fixture
+def fake_backend(tmp_path, monkeypatch):
+    calls = []
+
+    def synthesize(text, lang, slow, timeout=None):
+        calls.append(text)
+        return b"audio:" + text.encode("utf-8")
+
+    monkeypatch.setattr(voice_of_the_doctor, "TTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(voice_of_the_doctor, "TTS_CACHE_ENABLED", True)
+    monkeypatch.setitem(voice_of_the_doctor.TTS_BACKENDS, "fake", {"synthesize": synthesize, "extension": ".mp3"})
+    monkeypatch.setattr(voice_of_the_doctor, "_tts_cache_stats", {"hits": 0, "misses": 0, "evictions": 0})
+    return calls
+
+
+@pytest.mark.parametrize("text", ["", "   ", "\n\t"])
+def test_empty_text_is_not_synthesized_or_cached(fake_backend, tmp_path, text):
+    with pytest.raises(ValueError):
+        voice_of_the_doctor.text_to_speech(text, backend="fake")
+    assert voice_of_the_doctor.text_to_speech_with_gtts(text, backend="fake") is None
+    assert fake_backend == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_concurrent_lookups_are_all_counted(fake_backend):
+    voice_of_the_doctor.text_to_speech("Rest and drink fluids.", backend="fake")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: voice_of_the_doctor.text_to_speech("Rest and drink fluids.", backend="fake"),
+                      range(200)))
+    stats = voice_of_the_doctor.get_tts_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (200, 1)
+    assert fake_backend == ["Rest and drink fluids."]
@@ -0,0 +1,293 @@
+# transcript_symptoms.py - FAST LOCAL SYMPTOM EXTRACTION FROM THE WHISPER TRANSCRIPT
+
+import re
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from keyword_matcher import KeywordAutomaton
+from symptom_set import symptom_display_label
+from symptom_database import SYMPTOM_SOLUTIONS, SYMPTOM_WEIGHTS
+
+# Everyday phrasings -> canonical symptom (a SYMPTOM_WEIGHTS / catalogue name).
+# The canonical names themselves are always matched; list only the extra phrasings here.
+SYMPTOM_SYNONYMS = {
+    "chest pain": ["chest hurts", "chest is hurting", "pain in my chest", "pain in the chest", "chest ache"],
+    "chest tightness": ["tight chest", "chest feels tight", "tightness in my chest", "pressure in my chest"],
+    "difficulty breathing": ["can't breathe", "cannot breathe", "can not breathe", "trouble breathing",
+                             "hard to breathe", "struggling to breathe", "breathing difficulty"],
+    "shortness of breath": ["short of breath", "out of breath", "breathless", "winded"],
+    "severe bleeding": ["bleeding heavily", "heavy bleeding", "won't stop bleeding", "bleeding a lot"],
+    "sudden weakness": ["suddenly weak", "sudden numbness"],
+    "suicidal thoughts": ["want to die", "kill myself", "end my life", "suicidal"],
+    "seizure": ["seizures", "convulsion", "convulsions"],
+    "severe head injury": ["hit my head hard", "head trauma"],
+    # Only sudden / one-sided phrasings: plain "numb" (fingers numb after typing) is not a red flag
+    "paralysis/numbness": ["paralyzed", "face went numb", "face is numb", "one side is numb", "numb on one side",
+                           "can't move my arm", "can't move my leg", "can't move my face"],
+    "headache": ["headaches", "head hurts", "head is pounding", "pounding head", "head ache", "migraine"],
+    "dizziness": ["dizzy", "lightheaded", "light headed", "room is spinning"],
+    "confusion": ["confused", "disoriented"],
+    "memory problems": ["memory loss", "forgetful", "can't remember"],
+    "anxiety": ["anxious", "panicky", "panic attack", "panic attacks"],
+    "nervousness": ["nervous", "on edge"],
+    "depression": ["depressed", "feeling down", "hopeless"],
+    "sleep issues": ["insomnia", "can't sleep", "trouble sleeping", "not sleeping"],
+    "vision problems": ["blurry vision", "blurred vision", "can't see properly", "double vision"],
+    "hearing loss": ["can't hear", "hard of hearing", "losing my hearing"],
+    "tremors": ["tremor", "shaky hands", "hands shaking"],
+    # Not a bare "faint": "a faint rash" is no fainting
+    "fainting": ["fainted", "passed out", "blacked out", "feel faint", "feeling faint", "felt faint"],
+    "balance problems": ["losing my balance", "off balance", "unsteady"],
+    "heart palpitations": ["palpitations", "heart is pounding", "heart pounding", "heart fluttering"],
+    "rapid heartbeat": ["racing heart", "heart is racing", "heart racing", "fast heartbeat"],
+    "irregular heartbeat": ["heart skipping", "skipped beats", "irregular heart"],
+    "swollen ankles": ["ankles are swollen", "swollen feet"],
+    "high blood pressure": ["blood pressure is high", "hypertension"],
+    "cold extremities": ["cold hands", "cold feet"],
+    "nausea": ["nauseous", "nauseated", "queasy", "feel sick", "feeling sick"],
+    "vomiting": ["vomit", "vomited", "throwing up", "threw up", "puking", "been sick"],
+    "diarrhea": ["diarrhoea", "loose stools"],
+    "constipation": ["constipated", "can't go to the toilet"],
+    "stomach pain": ["stomach ache", "stomachache", "tummy ache", "belly pain", "abdominal pain",
+                     "stomach hurts", "pain in my stomach"],
+    "stomach cramps": ["cramps in my stomach", "abdominal cramps"],
+    "heartburn": ["acid reflux", "indigestion"],
+    "appetite loss": ["no appetite", "lost my appetite", "not hungry", "loss of appetite"],
+    "weight changes": ["lost weight", "gained weight", "weight loss", "weight gain"],
+    "bloating": ["bloated"],
+    "blood in stool": ["blood in my stool", "bloody stool", "blood when i poop"],
+    "skin rash": ["rash", "rashes", "hives"],
+    "itching": ["itchy", "itch", "itches"],
+    "redness": ["red skin", "skin is red"],
+    "swelling": ["swollen"],
+    "acne/pimples": ["breakout", "breakouts", "zits"],
+    "pimples": ["pimple"],
+    "dry skin": ["skin is dry", "flaky skin"],
+    "hair loss": ["losing hair", "hair falling out", "balding"],
+    "blisters": ["blister"],
+    "muscle pain": ["muscles hurt", "muscle ache", "muscle aches", "sore muscles"],
+    "joint pain": ["joints hurt", "joints ache", "aching joints", "sore joints"],
+    "back pain": ["backache", "back ache", "back hurts", "lower back pain"],
+    "neck pain": ["neck hurts", "stiff neck", "sore neck"],
+    "stiffness": ["stiff"],
+    "swelling joints": ["swollen joints", "joints are swollen"],
+    "limited movement": ["can't move", "hard to move"],
+    "muscle weakness": ["weak muscles", "muscles feel weak"],
+    "fever": ["feverish", "high temperature", "running a temperature", "running hot"],
+    "chills": ["shivering", "shivers", "chilly"],
+    "cough": ["coughing", "coughs"],
+    "sore throat": ["throat hurts", "scratchy throat", "throat is sore"],
+    "runny nose": ["nose is running", "running nose", "snotty nose"],
+    "fatigue": ["tired", "tiredness", "exhausted", "exhaustion", "worn out", "no energy", "fatigued"],
+    "allergies": ["allergic", "allergy"],
+    "urinary issues": ["pain when i pee", "painful urination", "burning when i pee"],
+    "frequent urination": ["peeing a lot", "peeing all the time", "urinating often"],
+    "ear pain": ["earache", "ear ache", "ear hurts"],
+    "eye problems": ["eyes hurt", "eye pain", "sore eyes"],
+    "itchy eyes": ["eyes are itchy", "eyes itch"],
+    "sneezing": ["sneeze", "sneezes"],
+    "body aches": ["body ache", "aching all over", "achy", "body hurts"],
+    "sweating": ["sweaty", "sweats", "night sweats"],
+    "trembling": ["shaking", "shaky"],
+    "congestion": ["congested", "blocked nose", "stuffy nose", "stuffed up"],
+    "loss of smell/taste": ["loss of smell", "loss of taste", "can't smell", "can't taste", "lost my sense of smell",
+                            "lost my sense of taste"],
+    "sensitivity to light": ["light hurts my eyes", "sensitive to light"],
+    "wheezing": ["wheeze", "wheezy"],
+    "stress": ["stressed"],
+}
+
+# Words that negate a mention when they occur shortly before it in the same clause ("no fever or chills")
+NEGATION_CUES = frozenset([
+    "no", "not", "without", "never", "none", "nor", "deny", "denies", "denied",
+    "dont", "doesnt", "didnt", "havent", "hasnt", "hadnt", "isnt", "arent", "wasnt", "werent",
+])
+NEGATION_WINDOW = 4  # words
+
+# ConText-style triggers for mentions that are not the patient's current symptoms. A "pre" trigger
+# covers the words after it, a "post" trigger the words before it; either scope ends at a clause
+# break or at one of its kind's terminators ("my mother had a seizure and I have a headache").
+OTHER_EXPERIENCER = "other"      # someone else has it: "my mother had a seizure"
+HISTORICAL = "historical"        # the patient had it before: "I used to have seizures as a kid"
+
+_RELATIVES = ("mother", "mom", "mum", "father", "dad", "parent", "sister", "brother", "sibling", "wife",
+              "husband", "partner", "boyfriend", "girlfriend", "son", "daughter", "child", "baby", "grandmother",
+              "grandma", "grandfather", "grandpa", "aunt", "uncle", "cousin", "friend", "roommate", "coworker",
+              "colleague", "neighbor", "neighbour")
+CONTEXT_TRIGGERS = {
+    OTHER_EXPERIENCER: {
+        # "mothers" also covers "mother's" (apostrophes are dropped before matching)
+        "pre": [relative + suffix for relative in _RELATIVES for suffix in ("", "s")],
+        "post": ["runs in my family", "runs in the family"],
+    },
+    HISTORICAL: {
+        "pre": ["history of", "used to", "when i was", "previously", "in the past"],
+        "post": ["last year", "years ago", "months ago", "as a kid", "as a child", "as a teenager",
+                 "when i was younger", "when i was little", "in the past"],
+    },
+}
+CONTEXT_TERMINATORS = {
+    OTHER_EXPERIENCER: frozenset(["i", "im", "ive", "id", "me", "my", "myself", "mine"]),
+    HISTORICAL: frozenset(["now", "currently", "today", "tonight", "lately", "recently", "still", "again",
+                           "since", "this"]),
+}
+
+_CLAUSE_BREAK = re.compile(r"[.,;:!?]|\b(?:but|however|although|though|except)\b")
+_WORD = re.compile(r"[a-z']+")
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'"})
+
+# context: None for the patient's current symptom, else OTHER_EXPERIENCER or HISTORICAL
+SymptomMention = namedtuple("SymptomMention", ["canonical", "label", "phrase", "start", "end", "negated", "context"])
+
+
+def build_phrase_table(weights=None, solutions=None, synonyms=None):
+    """canonical symptom -> phrases that mention it; also returns canonical -> display label"""
+    weights = SYMPTOM_WEIGHTS if weights is None else weights
+    solutions = SYMPTOM_SOLUTIONS if solutions is None else solutions
+    synonyms = SYMPTOM_SYNONYMS if synonyms is None else synonyms
+
+    labels = {}
+    for condition in solutions.values():
+        for symptom in condition["symptoms"]:
+            labels.setdefault(symptom.lower(), symptom)
+    for symptom in weights:
+        labels.setdefault(symptom, symptom_display_label(symptom))
+
+    claimed = {phrase for phrases in synonyms.values() for phrase in phrases}
+    table = {canonical: [canonical] for canonical in labels}
+    for canonical in labels:
+        # "acne/pimples" is also said as either word, unless that word is a symptom or synonym of its own
+        if "/" in canonical and " " not in canonical:
+            table[canonical].extend(part for part in canonical.split("/") if part not in labels and part not in claimed)
+    for canonical, phrases in synonyms.items():
+        if canonical in table:
+            table[canonical].extend(phrases)
+    return table, labels
+
+
+PHRASE_TABLE, SYMPTOM_LABELS = build_phrase_table()
+_PHRASE_AUTOMATON = KeywordAutomaton(PHRASE_TABLE)  # categories are the canonical symptoms
+
+
+def _trigger_table():
+    """first word -> [(words, kind, direction)], longest first"""
+    table = {}
+    for kind, directions in CONTEXT_TRIGGERS.items():
+        for direction, phrases in directions.items():
+            for phrase in phrases:
+                words = tuple(phrase.split())
+                table.setdefault(words[0], []).append((words, kind, direction))
+    for triggers in table.values():
+        triggers.sort(key=lambda trigger: -len(trigger[0]))
+    return table
+
+
+_TRIGGERS = _trigger_table()
+
+
+class _ContextScope:
+    """Clause breaks, word offsets and ConText scopes of one transcript, found once, so each
+    mention's checks are a lookup instead of a rescan of the text from the start"""
+
+    def __init__(self, text):
+        self.clause_ends = [match.end() for match in _CLAUSE_BREAK.finditer(text)]
+        words = list(_WORD.finditer(text))
+        self.word_starts = [match.start() for match in words]
+        self.words = [match.group().replace("'", "") for match in words]
+        self.contexts = self._scope_contexts()
+
+    def _clause_bounds(self, start):
+        clause = bisect_right(self.clause_ends, start)
+        return self.clause_ends[clause - 1] if clause else 0
+
+    def is_negated(self, start):
+        first = bisect_left(self.word_starts, self._clause_bounds(start))
+        last = bisect_left(self.word_starts, start)
+        return any(word in NEGATION_CUES for word in self.words[max(first, last - NEGATION_WINDOW):last])
+
+    def context(self, start):
+        """OTHER_EXPERIENCER / HISTORICAL when the word at start is in such a scope, else None"""
+        index = bisect_left(self.word_starts, start)
+        return self.contexts[index] if index < len(self.contexts) else None
+
+    def _scope_contexts(self):
+        """Context per word: one forward sweep for "pre" triggers, one backward for "post" ones"""
+        words = self.words
+        clause_of = [bisect_right(self.clause_ends, start) for start in self.word_starts]
+        triggers = []  # (first word, end word, kind, direction)
+        for index, word in enumerate(words):
+            for trigger_words, kind, direction in _TRIGGERS.get(word, ()):
+                end = index + len(trigger_words)
+                if tuple(words[index:end]) == trigger_words and clause_of[end - 1] == clause_of[index]:
+                    triggers.append((index, end, kind, direction))
+                    break
+
+        contexts = [None] * len(words)
+        for direction, order in (("pre", range(len(words))), ("post", range(len(words) - 1, -1, -1))):
+            opens = {}  # word index where a trigger's scope starts -> kinds
+            for first, end, kind, trigger_direction in triggers:
+                if trigger_direction == direction:
+                    opens.setdefault(end if direction == "pre" else first - 1, []).append(kind)
+            active = set()
+            clause = None
+            for index in order:
+                if clause_of[index] != clause:
+                    clause = clause_of[index]
+                    active.clear()
+                active.update(opens.get(index, ()))
+                active.difference_update([kind for kind in active if words[index] in CONTEXT_TERMINATORS[kind]])
+                if active and contexts[index] is None:
+                    contexts[index] = OTHER_EXPERIENCER if OTHER_EXPERIENCER in active else HISTORICAL
+        return contexts
+
+
+def extract_symptom_mentions(transcript):
+    """Every symptom mention in the transcript, in order, with its negation status and context
+    (someone else's or a past symptom, see CONTEXT_TRIGGERS).
+
+    Phrases must sit on word boundaries; when mentions overlap the longest one wins
+    ("severe head injury" over "head injury").
+    """
+    if not transcript:
+        return []
+    text = transcript.lower().translate(_APOSTROPHES)
+
+    candidates = []
+    for start, end, phrase in _PHRASE_AUTOMATON.iter_matches(text):
+        if start > 0 and (text[start - 1].isalnum() or text[start - 1] == "'"):
+            continue
+        if end < len(text) and text[end].isalnum():
+            continue
+        candidates.append((start, end, phrase))
+
+    # One sweep in text order (longest first at the same start): an overlapping candidate
+    # replaces the last kept mention only when it is longer
+    candidates.sort(key=lambda candidate: (candidate[0], candidate[0] - candidate[1]))
+    kept = []
+    for start, end, phrase in candidates:
+        if kept and start < kept[-1][1]:
+            if end - start > kept[-1][1] - kept[-1][0]:
+                kept[-1] = (start, end, phrase)
+            continue
+        kept.append((start, end, phrase))
+
+    scope = _ContextScope(text)
+    mentions = []
+    for start, end, phrase in kept:
+        negated = scope.is_negated(start)
+        context = scope.context(start)
+        for canonical in _PHRASE_AUTOMATON.categories_of(phrase):
+            mentions.append(SymptomMention(canonical, SYMPTOM_LABELS[canonical], phrase, start, end, negated, context))
+    return mentions
+
+
+def extract_symptoms(transcript):
+    """Symptom labels the patient has now, in order of first mention (negated mentions and
+    other people's or past symptoms dropped)"""
+    labels = []
+    seen = set()
+    for mention in extract_symptom_mentions(transcript):
+        if not mention.negated and mention.context is None and mention.canonical not in seen:
+            seen.add(mention.canonical)
+            labels.append(mention.label)
+    return labels
@@ -1,18 +1,283 @@
 # from dotenv import load_dotenv
 # load_dotenv()
 
+import io
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from gtts import gTTS
+from cache import CACHE_DIR
 
+# Synthesized audio is stored content-addressed, so concurrent users never share an output file
+# and repeated (templated) assessments are served from disk instead of being re-synthesized.
+TTS_CACHE_ENABLED = os.environ.get("TTS_CACHE", "1") != "0"
+TTS_CACHE_DIR = os.path.join(CACHE_DIR, "tts")
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
 
-# --- This is the only function you need for gTTS ---
-def text_to_speech_with_gtts(input_text, output_filepath):
-    """Creates an audio file from text using gTTS and saves it."""
+# Long assessments are split at sentence boundaries and synthesized in parallel.
+# gTTS sends one request per 100 characters, so chunks of that size map to one request each.
+TTS_CHUNK_CHARS = int(os.environ.get("TTS_CHUNK_CHARS", "100"))
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", "6"))
+# Seconds a single gTTS request may wait on the server; with a synthesis timeout, the time left
+# until that deadline, so chunk jobs abandoned by a timed-out call give their thread back
+TTS_REQUEST_TIMEOUT = float(os.environ.get("TTS_REQUEST_TIMEOUT", "15"))
+_tts_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts-chunk")
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+_tts_cache_lock = threading.Lock()
+_tts_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def tts_cache_key(input_text, lang="en", slow=False, backend="gtts"):
+    """Content hash of everything that affects the synthesized audio"""
+    digest = hashlib.sha256()
+    digest.update(f"{backend}\0{lang}\0{int(bool(slow))}\0".encode("utf-8"))
+    digest.update(input_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def tts_cache_path(input_text, lang="en", slow=False, backend="gtts"):
+    extension = TTS_BACKENDS[backend]["extension"]
+    return os.path.join(TTS_CACHE_DIR, tts_cache_key(input_text, lang, slow, backend) + extension)
+
+
+def _write_atomically(output_filepath, write):
+    """Write to a temp file in the target directory, then rename it into place"""
+    directory = os.path.dirname(os.path.abspath(output_filepath))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
     try:
-        audio_obj = gTTS(text=input_text, lang="en", slow=False)
-        audio_obj.save(output_filepath)
-        print(f"gTTS audio saved to {output_filepath}")
-        return output_filepath
+        with os.fdopen(fd, "wb") as tmp_file:
+            write(tmp_file)
+        os.replace(tmp_path, output_filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _copy_file(source_path, output_filepath):
+    with open(source_path, "rb") as source_file:
+        _write_atomically(output_filepath, lambda f: shutil.copyfileobj(source_file, f))
+
+
+def _enforce_tts_quota():
+    """Evict least-recently-used audio files until the cache fits TTS_CACHE_MAX_BYTES"""
+    with _tts_cache_lock:
+        try:
+            extensions = tuple(backend["extension"] for backend in TTS_BACKENDS.values())
+            entries = [entry for entry in os.scandir(TTS_CACHE_DIR)
+                       if entry.is_file() and entry.name.endswith(extensions)]
+        except FileNotFoundError:
+            return
+        infos = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries]
+        total = sum(size for _, size, _ in infos)
+        for _, size, path in sorted(infos):
+            if total <= TTS_CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                _tts_cache_stats["evictions"] += 1
+            except FileNotFoundError:
+                pass
+
+
+def split_into_chunks(input_text, max_chars=None):
+    """Split text at sentence boundaries, packing sentences into chunks of at most max_chars.
+
+    Line breaks always end a chunk (so headings keep their pause); a single sentence
+    longer than max_chars is kept whole and gTTS splits it further on its own.
+    """
+    max_chars = max_chars or TTS_CHUNK_CHARS
+    chunks = []
+    for line in input_text.splitlines():
+        current = ""
+        for sentence in _SENTENCE_BOUNDARY.split(line):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def _synthesize_chunk(chunk_text, lang, slow, deadline=None):
+    request_timeout = TTS_REQUEST_TIMEOUT
+    if deadline is not None:
+        request_timeout = deadline - time.monotonic()
+        if request_timeout <= 0:
+            raise TimeoutError("TTS deadline passed before the chunk started")
+    buffer = io.BytesIO()
+    gTTS(text=chunk_text, lang=lang, slow=slow, timeout=request_timeout).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+def iter_speech_chunks(input_text, lang="en", slow=False):
+    """Yield MP3 bytes chunk by chunk, in order, as soon as each chunk is ready.
+
+    All chunks are synthesized in parallel, so playback can start after the first one.
+    """
+    futures = [_tts_executor.submit(_synthesize_chunk, chunk, lang, slow)
+               for chunk in split_into_chunks(input_text)]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def synthesize_speech(input_text, lang="en", slow=False, timeout=None):
+    """Synthesize the whole text as one MP3 - chunk outputs are concatenated frame-wise, no re-encoding"""
+    if timeout is None:
+        return b"".join(iter_speech_chunks(input_text, lang, slow))
+
+    # Running chunk jobs can't be cancelled, so they carry the deadline and stop with it
+    deadline = time.monotonic() + timeout
+    futures = [_tts_executor.submit(_synthesize_chunk, chunk, lang, slow, deadline)
+               for chunk in split_into_chunks(input_text)]
+    try:
+        return b"".join(future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+# --- Local (offline) engine: espeak-ng / espeak, no network, no rate limits ---
+_LOCAL_TTS_RATE = {False: "165", True: "120"}  # words per minute for normal / slow speech
+
+
+def synthesize_speech_locally(input_text, lang="en", slow=False, timeout=None):
+    """Synthesize WAV audio with the locally installed espeak-ng (or espeak) binary"""
+    executable = shutil.which("espeak-ng") or shutil.which("espeak")
+    if executable is None:
+        raise RuntimeError("Local TTS backend needs espeak-ng or espeak on PATH")
+    # The text goes in on stdin, so a leading "-" can't be read as an option
+    result = subprocess.run(
+        [executable, "-v", lang, "-s", _LOCAL_TTS_RATE[bool(slow)], "--stdout", "--stdin"],
+        input=input_text.encode("utf-8"),
+        capture_output=True,
+        timeout=timeout,
+        check=True
+    )
+    return result.stdout
+
+
+# --- Backend registry ---
+# Each backend turns text into audio bytes; "extension" names the container it produces.
+TTS_BACKENDS = {
+    "gtts": {"synthesize": synthesize_speech, "extension": ".mp3"},
+    "local": {"synthesize": synthesize_speech_locally, "extension": ".wav"},
+}
+
+# "gtts", "local", or "auto" (gTTS first, local engine when gTTS fails or is slower than TTS_REMOTE_TIMEOUT)
+TTS_BACKEND = os.environ.get("TTS_BACKEND", "auto").lower()
+TTS_REMOTE_TIMEOUT = float(os.environ.get("TTS_REMOTE_TIMEOUT", "8"))
+
+
+def register_tts_backend(name, synthesize, extension):
+    """Add a TTS backend: synthesize(text, lang, slow, timeout) -> audio bytes"""
+    TTS_BACKENDS[name] = {"synthesize": synthesize, "extension": extension}
+
+
+def _backend_chain(backend):
+    backend = (backend or TTS_BACKEND).lower()
+    if backend == "auto":
+        return [("gtts", TTS_REMOTE_TIMEOUT), ("local", None)]
+    if backend not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {backend}")
+    return [(backend, None)]
+
+
+def _count_tts_lookup(outcome):
+    with _tts_cache_lock:
+        _tts_cache_stats[outcome] += 1
+
+
+def get_tts_cache_stats():
+    with _tts_cache_lock:
+        stats = dict(_tts_cache_stats)
+    lookups = stats["hits"] + stats["misses"]
+    return dict(stats, hit_rate=stats["hits"] / lookups if lookups else 0.0)
+
+
+def _serve_cached(cached_path, output_filepath):
+    """Return the cached file (copied to output_filepath if given), or None if it is not cached"""
+    try:
+        os.utime(cached_path)  # mark as recently used for quota eviction
+    except FileNotFoundError:
+        return None
+    if output_filepath is None:
+        return cached_path
+    _copy_file(cached_path, output_filepath)
+    return output_filepath
+
+
+def text_to_speech(input_text, output_filepath=None, lang="en", slow=False, use_cache=True, backend=None):
+    """Creates an audio file from text with the configured backend(s) and returns its path.
+
+    With no output_filepath the audio is written to (or served from) the content-addressed
+    TTS cache, which gives every distinct text its own file. In "auto" mode a slow or failing
+    gTTS call falls back to the local engine.
+    """
+    if not input_text or not input_text.strip():
+        raise ValueError("No text to synthesize")
+    use_cache = use_cache and TTS_CACHE_ENABLED
+    chain = _backend_chain(backend)
+
+    if use_cache:
+        for name, _ in chain:
+            served = _serve_cached(tts_cache_path(input_text, lang, slow, name), output_filepath)
+            if served:
+                _count_tts_lookup("hits")
+                return served
+        _count_tts_lookup("misses")
+
+    last_error = None
+    for name, timeout in chain:
+        spec = TTS_BACKENDS[name]
+        try:
+            audio_bytes = spec["synthesize"](input_text, lang, slow, timeout=timeout)
+        except Exception as e:
+            print(f"TTS backend '{name}' failed: {e!r}")
+            last_error = e
+            continue
+
+        cached_path = tts_cache_path(input_text, lang, slow, name) if use_cache else None
+        target_path = output_filepath or cached_path
+        if target_path is None:
+            fd, target_path = tempfile.mkstemp(suffix=spec["extension"])
+            os.close(fd)
+
+        _write_atomically(target_path, lambda f: f.write(audio_bytes))
+        if cached_path and target_path != cached_path:
+            _copy_file(target_path, cached_path)
+        if cached_path:
+            _enforce_tts_quota()
+
+        print(f"{name} audio saved to {target_path}")
+        return target_path
+
+    raise RuntimeError(f"All TTS backends failed: {last_error!r}")
+
+
+def text_to_speech_with_gtts(input_text, output_filepath=None, lang="en", slow=False, use_cache=True, backend=None):
+    """Creates an audio file from text (gTTS by default, see TTS_BACKEND) and returns its path, or None on error"""
+    try:
+        return text_to_speech(input_text, output_filepath, lang=lang, slow=slow, use_cache=use_cache, backend=backend)
     except Exception as e:
         print(f"Error with gTTS: {e}")
         return None
-
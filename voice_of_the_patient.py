@@ -47,19 +47,51 @@ audio_filepath="patient_voice_test_for_patient.mp3"
 
 #Step2: Setup Speech to text–STT–model for transcription
 import os
-from groq import Groq
+from groq_client import get_groq_client, GROQ_STT_TIMEOUT
+from cache import build_tiered_cache, make_cache_key
 
 GROQ_API_KEY=os.environ.get("GROQ_API_KEY")
 stt_model="whisper-large-v3"
 
-def transcribe_with_groq(stt_model, audio_filepath, GROQ_API_KEY):
-    client=Groq(api_key=GROQ_API_KEY)
-    
-    audio_file=open(audio_filepath, "rb")
+#Step3: Cache transcriptions by audio fingerprint so re-analyzing the same clip is free
+STT_CACHE_ENABLED=os.environ.get("STT_CACHE", "1") != "0"
+STT_CACHE_MEMORY_ENTRIES=int(os.environ.get("STT_CACHE_MEMORY_ENTRIES", "512"))
+STT_CACHE_MEMORY_BYTES=int(os.environ.get("STT_CACHE_MEMORY_BYTES", str(2 * 1024 * 1024)))
+STT_CACHE_DISK_ENTRIES=int(os.environ.get("STT_CACHE_DISK_ENTRIES", "20000"))
+STT_CACHE_DISK_BYTES=int(os.environ.get("STT_CACHE_DISK_BYTES", str(20 * 1024 * 1024)))
+
+transcription_cache=build_tiered_cache(
+    "transcriptions",
+    memory_entries=STT_CACHE_MEMORY_ENTRIES,
+    memory_bytes=STT_CACHE_MEMORY_BYTES,
+    disk_entries=STT_CACHE_DISK_ENTRIES,
+    disk_bytes=STT_CACHE_DISK_BYTES,
+    persist=STT_CACHE_ENABLED
+)
+
+def get_transcription_cache_stats():
+    return transcription_cache.stats()
+
+def transcribe_with_groq(stt_model, audio_filepath, GROQ_API_KEY, language="en", timeout=GROQ_STT_TIMEOUT, use_cache=True):
+    with open(audio_filepath, "rb") as audio_file:
+        audio_bytes=audio_file.read()
+
+    use_cache=use_cache and STT_CACHE_ENABLED
+    if use_cache:
+        cache_key=make_cache_key("stt", stt_model, language, audio_bytes)
+        cached=transcription_cache.get(cache_key)
+        if cached is not None:
+            logging.info("Transcription cache hit")
+            return cached
+
+    client=get_groq_client(GROQ_API_KEY)  # pooled, keep-alive client shared across requests
     transcription=client.audio.transcriptions.create(
         model=stt_model,
-        file=audio_file,
-        language="en"
+        file=(os.path.basename(audio_filepath), audio_bytes),
+        language=language,
+        timeout=timeout
     )
 
+    if use_cache and transcription.text is not None:
+        transcription_cache.set(cache_key, transcription.text)
     return transcription.text